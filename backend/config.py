@@ -87,6 +87,12 @@ class ChatOCRConfig:
     EMBEDDING_MODEL = os.environ.get('EMBEDDING_MODEL', 'BAAI/bge-small-zh-v1.5')
     VECTOR_DB_PATH = os.environ.get('VECTOR_DB_PATH', './vector_db')
     
+    # 文档向量缓存（按分块文本哈希复用已生成的向量）
+    ENABLE_EMBEDDING_CACHE = os.environ.get('ENABLE_EMBEDDING_CACHE', 'true').lower() == 'true'
+    EMBEDDING_CACHE_PATH = os.environ.get(
+        'EMBEDDING_CACHE_PATH', os.path.join(VECTOR_DB_PATH, 'embedding_cache.sqlite3')
+    )
+    
     # 文本分块配置
     CHUNK_SIZE = int(os.environ.get('CHUNK_SIZE', '500'))
     CHUNK_OVERLAP = int(os.environ.get('CHUNK_OVERLAP', '50'))
@@ -117,6 +123,8 @@ class ChatOCRConfig:
             'enable_rag': cls.ENABLE_RAG,
             'embedding_model': cls.EMBEDDING_MODEL,
             'vector_db_path': cls.VECTOR_DB_PATH,
+            'enable_embedding_cache': cls.ENABLE_EMBEDDING_CACHE,
+            'embedding_cache_path': cls.EMBEDDING_CACHE_PATH,
             'chunk_size': cls.CHUNK_SIZE,
             'chunk_overlap': cls.CHUNK_OVERLAP,
             'rag_top_k': cls.RAG_TOP_K,
@@ -22,9 +22,9 @@ class RegionType(Enum):
     IMAGE = "image"
     LIST = "list"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BoundingBox:
-    """Bounding box coordinates for regions"""
+    """Bounding box coordinates for regions (immutable, safe to share)"""
     x: float
     y: float
     width: float
@@ -0,0 +1,173 @@
+"""
+Embedding Cache - 文档向量持久化缓存
+以 (模型名, 分块文本) 的哈希为键，将文档向量保存在 SQLite 中，
+重复索引同一文档或跨页重复的页眉页脚时无需再次调用模型
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite 单条语句的参数上限（旧版本为 999）
+_SQL_BATCH_SIZE = 500
+
+
+class EmbeddingCache:
+    """
+    文档向量缓存 - SQLite 存储
+    
+    特点：
+    - 键为 BLAKE2b(模型名 + 文本)，换模型后自动失效
+    - 向量按 float32 字节存储，命中结果与重新编码一致
+    - 读写失败只记录日志并视为未命中，不影响索引流程
+    """
+    
+    def __init__(self, db_path: str = None):
+        """
+        初始化向量缓存
+        
+        Args:
+            db_path: SQLite 数据库文件路径
+        """
+        if db_path is None:
+            from backend.config import ChatOCRConfig
+            db_path = ChatOCRConfig.EMBEDDING_CACHE_PATH
+        
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        
+        # 索引在后台线程中执行，连接由 _lock 串行化
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+        
+        logger.info(f"EmbeddingCache initialized at: {db_path}")
+    
+    @staticmethod
+    def make_key(model_name: str, text: str) -> bytes:
+        """
+        生成缓存键
+        
+        Args:
+            model_name: Embedding 模型名称
+            text: 分块文本
+            
+        Returns:
+            bytes: 16 字节摘要
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(model_name or "").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+    
+    def get_many(self, keys: Sequence[bytes]) -> List[Optional[List[float]]]:
+        """
+        批量读取向量
+        
+        Args:
+            keys: 缓存键列表
+            
+        Returns:
+            List: 与 keys 一一对应，未命中的位置为 None
+        """
+        found = {}
+        try:
+            with self._lock:
+                for start in range(0, len(keys), _SQL_BATCH_SIZE):
+                    batch = keys[start:start + _SQL_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        batch
+                    )
+                    found.update(rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return [None] * len(keys)
+        
+        return [
+            np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None
+            for key in keys
+        ]
+    
+    def set_many(self, items: Sequence[Tuple[bytes, List[float]]]) -> None:
+        """
+        批量写入向量
+        
+        Args:
+            items: (缓存键, 向量) 列表
+        """
+        if not items:
+            return
+        
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    rows
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+    
+    def count(self) -> int:
+        """获取缓存的向量数量"""
+        try:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache count failed: {e}")
+            return 0
+    
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+    
+    def get_status(self) -> dict:
+        """获取缓存状态"""
+        return {
+            "db_path": self.db_path,
+            "cached_vectors": self.count()
+        }
+
+
+# 全局实例
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    获取向量缓存实例
+    
+    Returns:
+        EmbeddingCache: 缓存实例
+    """
+    global _embedding_cache
+    
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache()
+    
+    return _embedding_cache
+
+
+def reset_embedding_cache():
+    """重置缓存实例（用于测试）"""
+    global _embedding_cache
+    if _embedding_cache is not None:
+        _embedding_cache.close()
+    _embedding_cache = None
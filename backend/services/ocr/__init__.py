@@ -5,6 +5,7 @@ OCR Service Package
 - image_preprocessor.py: 图像预处理（增强、缩放、归一化）
 - layout_analyzer.py: 布局分析、区域分类、排序、置信度计算
 - table_processor.py: 表格检测、结构解析、单元格提取
+- table_utils.py: 表格解析共享工具（单元格记录、多边形边界、行转换）
 - output_generator.py: HTML/Markdown 生成
 - ppstructure_parser.py: PPStructureV3 结果解析、格式转换
 - confidence_logger.py: 置信度日志生成
@@ -9,7 +9,9 @@
 import logging
 from typing import Dict, Any, Tuple, Optional
 from pathlib import Path
-from PIL import Image, ImageEnhance, ImageFilter
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance
 
 logger = logging.getLogger(__name__)
 
@@ -85,8 +87,8 @@ class ImagePreprocessor:
         enhancer = ImageEnhance.Sharpness(image)
         image = enhancer.enhance(1.1)
         
-        # 轻微去噪
-        image = image.filter(ImageFilter.MedianFilter(size=3))
+        # 轻微去噪（OpenCV 的 3x3 中值滤波与 PIL MedianFilter 结果一致，但走 SIMD 路径）
+        image = Image.fromarray(cv2.medianBlur(np.asarray(image), 3))
         
         return image
     
@@ -6,12 +6,29 @@
 - 表格结构解析
 - 单元格提取
 """
+import io
 import logging
 from typing import List, Dict, Any, Optional
 import numpy as np
 import cv2
 
 from backend.models.document import Region, TableStructure, BoundingBox, RegionType
+from backend.services.ocr.table_utils import (
+    BS4_AVAILABLE,
+    LXML_AVAILABLE,
+    ZERO_BBOX,
+    ALPHA_RE,
+    DIGIT_RE,
+    ROW_HANDLERS,
+    TableCell,
+    quad_bounds,
+)
+
+if BS4_AVAILABLE:
+    from bs4 import BeautifulSoup
+
+if LXML_AVAILABLE:
+    from lxml import etree as lxml_etree
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +52,7 @@ class TableProcessor:
         try:
             logger.info(f"解析表格项，键: {list(table_item.keys())}")
             
-            bbox = BoundingBox(0, 0, 0, 0)
+            bbox = ZERO_BBOX
             if 'bbox' in table_item:
                 box = table_item['bbox']
                 if len(box) >= 4:
@@ -82,9 +99,17 @@ class TableProcessor:
         Returns:
             TableStructure 对象或 None
         """
+        if LXML_AVAILABLE:
+            try:
+                return self._parse_html_table_lxml(html_content)
+            except Exception as e:
+                logger.debug(f"lxml 表格解析失败，回退到 BeautifulSoup: {e}")
+        
+        if not BS4_AVAILABLE:
+            logger.warning("BeautifulSoup 不可用于 HTML 表格解析")
+            return None
+        
         try:
-            from bs4 import BeautifulSoup
-            
             soup = BeautifulSoup(html_content, 'html.parser')
             table = soup.find('table')
             
@@ -105,8 +130,7 @@ class TableProcessor:
                 max_cols = max(max_cols, len(row_data))
             
             for row in table_grid:
-                while len(row) < max_cols:
-                    row.append('')
+                row.extend([''] * (max_cols - len(row)))
             
             has_headers = bool(rows[0].find_all('th')) if rows else False
             
@@ -114,17 +138,72 @@ class TableProcessor:
                 rows=len(table_grid),
                 columns=max_cols,
                 cells=table_grid,
-                coordinates=BoundingBox(0, 0, 0, 0),
+                coordinates=ZERO_BBOX,
                 has_headers=has_headers
             )
             
-        except ImportError:
-            logger.warning("BeautifulSoup 不可用于 HTML 表格解析")
-            return None
         except Exception as e:
             logger.warning(f"HTML 表格解析失败: {e}")
             return None
     
+    def _parse_html_table_lxml(self, html_content: str) -> Optional[TableStructure]:
+        """
+        使用 lxml iterparse 流式解析第一个 HTML 表格
+        
+        每行在结束标签处收集后立即清理，不在内存中保留完整 DOM；
+        单元格文本与 BeautifulSoup 的 get_text(strip=True) 一致。
+        
+        Args:
+            html_content: HTML 表格内容
+            
+        Returns:
+            TableStructure 对象或 None
+        """
+        table_grid = []
+        max_cols = 0
+        has_headers = False
+        table_depth = 0
+        
+        events = lxml_etree.iterparse(
+            io.BytesIO(html_content.encode('utf-8')),
+            events=('start', 'end'),
+            tag=('table', 'tr'),
+            html=True,
+            encoding='utf-8'
+        )
+        
+        for event, element in events:
+            if element.tag == 'table':
+                table_depth += 1 if event == 'start' else -1
+                if table_depth == 0:
+                    break
+                continue
+            
+            if event != 'end' or table_depth == 0:
+                continue
+            
+            cells = list(element.iter('td', 'th'))
+            if not table_grid:
+                has_headers = any(cell.tag == 'th' for cell in cells)
+            row_data = [''.join(text.strip() for text in cell.itertext()) for cell in cells]
+            table_grid.append(row_data)
+            max_cols = max(max_cols, len(row_data))
+            element.clear()
+        
+        if not table_grid:
+            return None
+        
+        for row in table_grid:
+            row.extend([''] * (max_cols - len(row)))
+        
+        return TableStructure(
+            rows=len(table_grid),
+            columns=max_cols,
+            cells=table_grid,
+            coordinates=ZERO_BBOX,
+            has_headers=has_headers
+        )
+    
     def _parse_cell_bbox_table(self, table_data: Dict) -> Optional[TableStructure]:
         """
         从单元格边界框数据解析表格
@@ -163,8 +242,7 @@ class TableProcessor:
                 max_cols = max(max_cols, len(row_data))
             
             for row in table_grid:
-                while len(row) < max_cols:
-                    row.append('')
+                row.extend([''] * (max_cols - len(row)))
             
             if not table_grid:
                 return None
@@ -173,7 +251,7 @@ class TableProcessor:
                 rows=len(table_grid),
                 columns=max_cols,
                 cells=table_grid,
-                coordinates=BoundingBox(0, 0, 0, 0),
+                coordinates=ZERO_BBOX,
                 has_headers=True
             )
             
@@ -199,20 +277,15 @@ class TableProcessor:
             max_cols = 0
             
             for row_data in table_data:
-                if isinstance(row_data, list):
-                    row = [str(cell) for cell in row_data]
-                    table_grid.append(row)
-                    max_cols = max(max_cols, len(row))
-                elif isinstance(row_data, str):
-                    row = [cell.strip() for cell in row_data.split('\t') if cell.strip()]
-                    if not row:
-                        row = [cell.strip() for cell in row_data.split() if cell.strip()]
-                    table_grid.append(row)
-                    max_cols = max(max_cols, len(row))
+                handler = ROW_HANDLERS.get(type(row_data))
+                if handler is None:
+                    continue
+                row = handler(row_data)
+                table_grid.append(row)
+                max_cols = max(max_cols, len(row))
             
             for row in table_grid:
-                while len(row) < max_cols:
-                    row.append('')
+                row.extend([''] * (max_cols - len(row)))
             
             if not table_grid:
                 return None
@@ -221,7 +294,7 @@ class TableProcessor:
                 rows=len(table_grid),
                 columns=max_cols,
                 cells=table_grid,
-                coordinates=BoundingBox(0, 0, 0, 0),
+                coordinates=ZERO_BBOX,
                 has_headers=self._detect_table_headers(table_grid)
             )
             
@@ -247,20 +320,25 @@ class TableProcessor:
             second_row = table_grid[1] if len(table_grid) > 1 else []
             
             header_indicators = 0
+            threshold = len(first_row) / 2
             
             for i, cell in enumerate(first_row):
                 if not cell:
                     continue
                 
-                if len(cell) < 50 and any(char.isalpha() for char in cell):
+                if len(cell) < 50 and ALPHA_RE.search(cell):
                     header_indicators += 1
                 
                 if i < len(second_row) and second_row[i]:
                     if (cell.replace(' ', '').isalpha() and 
-                        any(char.isdigit() for char in second_row[i])):
+                        DIGIT_RE.search(second_row[i])):
                         header_indicators += 1
+                
+                # 计数只增不减，超过阈值即可提前返回
+                if header_indicators > threshold:
+                    return True
             
-            return header_indicators > len(first_row) / 2
+            return False
             
         except Exception as e:
             logger.warning(f"标题检测失败: {e}")
@@ -348,19 +426,8 @@ class TableProcessor:
             
             cropped_table = image[y:y+h, x:x+w]
             
-            import tempfile
-            import os
-            
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as tmp:
-                temp_path = tmp.name
-                cv2.imwrite(temp_path, cropped_table)
-            
-            table_structure = self._analyze_table_structure(temp_path, region.coordinates, ocr_engine)
-            
-            try:
-                os.remove(temp_path)
-            except OSError:
-                pass
+            # 直接传入内存中的裁剪图像，无需写临时文件
+            table_structure = self._analyze_table_structure(cropped_table, region.coordinates, ocr_engine)
             
             return table_structure
             
@@ -368,13 +435,13 @@ class TableProcessor:
             logger.warning(f"从区域提取表格失败: {e}")
             return None
     
-    def _analyze_table_structure(self, table_image_path: str, original_coords: BoundingBox,
+    def _analyze_table_structure(self, table_image: np.ndarray, original_coords: BoundingBox,
                                   ocr_engine) -> Optional[TableStructure]:
         """
         使用 OCR 和布局分析来分析表格结构
         
         Args:
-            table_image_path: 裁剪的表格图像路径
+            table_image: 裁剪的表格图像数组（PaddleOCR 可直接接受 ndarray）
             original_coords: 表格的原始坐标
             ocr_engine: OCR 引擎实例
             
@@ -382,7 +449,7 @@ class TableProcessor:
             TableStructure 对象或 None
         """
         try:
-            ocr_result = ocr_engine.ocr(table_image_path, cls=True)
+            ocr_result = ocr_engine.ocr(table_image, cls=True)
             
             if not ocr_result or not ocr_result[0]:
                 return None
@@ -411,7 +478,7 @@ class TableProcessor:
             logger.warning(f"表格结构分析失败: {e}")
             return None
     
-    def _parse_table_cells(self, ocr_result: List) -> List[Dict[str, Any]]:
+    def _parse_table_cells(self, ocr_result: List) -> List[TableCell]:
         """
         解析 OCR 结果以提取表格单元格信息
         
@@ -419,36 +486,33 @@ class TableProcessor:
             ocr_result: 表格图像的 OCR 结果
             
         Returns:
-            单元格数据字典列表
+            TableCell 记录列表
         """
         cells = []
+        lines = [line for line in ocr_result if len(line) >= 2]
         
-        for line in ocr_result:
-            if len(line) < 2:
+        # 一次性计算所有单元格的边界框
+        bounds = quad_bounds([line[0] for line in lines])
+        
+        for line, line_bounds in zip(lines, bounds):
+            if line_bounds is None:
+                logger.warning("解析表格单元格失败: 边界框不是四点多边形")
                 continue
             
             try:
-                bbox_coords = line[0]
-                x_coords = [point[0] for point in bbox_coords]
-                y_coords = [point[1] for point in bbox_coords]
-                
-                cell_bbox = BoundingBox(
-                    x=min(x_coords),
-                    y=min(y_coords),
-                    width=max(x_coords) - min(x_coords),
-                    height=max(y_coords) - min(y_coords)
-                )
+                x, y, width, height = line_bounds
+                cell_bbox = BoundingBox(x=x, y=y, width=width, height=height)
                 
                 text_content = line[1][0]
                 confidence = line[1][1]
                 
-                cells.append({
-                    'bbox': cell_bbox,
-                    'content': text_content.strip(),
-                    'confidence': confidence,
-                    'center_x': cell_bbox.x + cell_bbox.width / 2,
-                    'center_y': cell_bbox.y + cell_bbox.height / 2
-                })
+                cells.append(TableCell(
+                    bbox=cell_bbox,
+                    content=text_content.strip(),
+                    confidence=confidence,
+                    center_x=x + width / 2,
+                    center_y=y + height / 2
+                ))
                 
             except Exception as e:
                 logger.warning(f"解析表格单元格失败: {e}")
@@ -456,12 +520,12 @@ class TableProcessor:
         
         return cells
     
-    def _organize_cells_into_grid(self, cells_data: List[Dict[str, Any]]) -> List[List[str]]:
+    def _organize_cells_into_grid(self, cells_data: List[TableCell]) -> List[List[str]]:
         """
         将单元格数据组织成 2D 网格结构
         
         Args:
-            cells_data: 单元格数据字典列表
+            cells_data: TableCell 记录列表
             
         Returns:
             表示表格网格的 2D 列表
@@ -470,26 +534,30 @@ class TableProcessor:
             return []
         
         try:
-            cells_data.sort(key=lambda cell: (cell['center_y'], cell['center_x']))
-            
-            rows = []
-            current_row = []
-            current_y = cells_data[0]['center_y']
+            # 按 y 稳定排序（同一行内保持输入顺序）
+            centers_y = np.fromiter((cell.center_y for cell in cells_data), dtype=np.float64,
+                                    count=len(cells_data))
+            centers_x = np.fromiter((cell.center_x for cell in cells_data), dtype=np.float64,
+                                    count=len(cells_data))
+            order = np.argsort(centers_y, kind='stable')
+            sorted_y = centers_y[order]
+            
+            # 行内所有单元格与该行首个单元格的 y 差不超过 y_tolerance，
+            # 每个行边界只需一次 searchsorted
             y_tolerance = 20
-            
-            for cell in cells_data:
-                if abs(cell['center_y'] - current_y) <= y_tolerance:
-                    current_row.append(cell)
-                else:
-                    if current_row:
-                        current_row.sort(key=lambda c: c['center_x'])
-                        rows.append(current_row)
-                    current_row = [cell]
-                    current_y = cell['center_y']
-            
-            if current_row:
-                current_row.sort(key=lambda c: c['center_x'])
-                rows.append(current_row)
+            row_ids = np.empty(len(order), dtype=np.int64)
+            row_starts = []
+            start = 0
+            while start < len(order):
+                end = int(np.searchsorted(sorted_y, sorted_y[start] + y_tolerance, side='right'))
+                row_ids[order[start:end]] = len(row_starts)
+                row_starts.append(start)
+                start = end
+            
+            # 一次 lexsort 按 (行, x) 排序，x 相同时保持自上而下的顺序
+            final_order = np.lexsort((centers_y, centers_x, row_ids))
+            rows = [[cells_data[i] for i in row_indices]
+                    for row_indices in np.split(final_order, row_starts[1:])]
             
             max_cols = max(len(row) for row in rows) if rows else 0
             table_grid = []
@@ -498,7 +566,7 @@ class TableProcessor:
                 row_data = []
                 for i in range(max_cols):
                     if i < len(row):
-                        row_data.append(row[i]['content'])
+                        row_data.append(row[i].content)
                     else:
                         row_data.append('')
                 table_grid.append(row_data)
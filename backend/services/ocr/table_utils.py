@@ -0,0 +1,96 @@
+"""
+表格解析共享工具
+
+ocr_service.py 与 table_processor.py 共用的表格/几何辅助定义：
+- 占位坐标、文本正则
+- 表格单元格记录
+- 四点多边形边界计算
+- 列表格式表格行转换
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import numpy as np
+
+from backend.models.document import BoundingBox
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+try:
+    from lxml import etree as lxml_etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# 表格解析的共享占位坐标（BoundingBox 不可变，调用方赋值新实例而非原地修改）
+ZERO_BBOX = BoundingBox(0, 0, 0, 0)
+
+# 任意字母（Unicode，与 str.isalpha 一样包含中文）/ 任意十进制数字
+ALPHA_RE = re.compile(r'[^\W\d_]')
+DIGIT_RE = re.compile(r'\d')
+
+
+@dataclass(slots=True)
+class TableCell:
+    """表格内的一行 OCR 文本，以边界框中心定位"""
+    bbox: BoundingBox
+    content: str
+    confidence: float
+    center_x: float
+    center_y: float
+
+
+def quad_bounds(quads: List) -> List[Optional[Tuple[float, float, float, float]]]:
+    """
+    批量计算四点多边形的 (x, y, width, height)
+    
+    所有多边形堆叠为 (N, 4, 2) 数组后一次 min/max；若批次不规整，
+    则逐个计算，格式错误的返回 None
+    """
+    if not quads:
+        return []
+    
+    try:
+        points = np.asarray(quads, dtype=np.float64)
+    except (ValueError, TypeError):
+        points = None
+    
+    if points is None or points.shape != (len(quads), 4, 2):
+        if len(quads) == 1:
+            return [None]
+        return [quad_bounds([quad])[0] if is_quad(quad) else None for quad in quads]
+    
+    mins = points.min(axis=1)
+    maxs = points.max(axis=1)
+    return [tuple(row) for row in np.concatenate([mins, maxs - mins], axis=1).tolist()]
+
+
+def is_quad(quad) -> bool:
+    """检查多边形是否恰好为四个 (x, y) 点"""
+    try:
+        return len(quad) == 4 and all(len(point) == 2 for point in quad)
+    except TypeError:
+        return False
+
+
+def stringify_row(row_data) -> List[str]:
+    """将 list/tuple 表格行转换为单元格字符串"""
+    return list(map(str, row_data))
+
+
+def split_string_row(row_data: str) -> List[str]:
+    """按制表符拆分字符串表格行，失败时按空白拆分"""
+    row = [stripped for cell in row_data.split('\t') if (stripped := cell.strip())]
+    return row or row_data.split()
+
+
+# 列表格式表格数据的行转换器，按行的具体类型查找
+ROW_HANDLERS = {
+    list: stringify_row,
+    tuple: stringify_row,
+    str: split_string_row,
+}
@@ -19,8 +19,12 @@ CPU 性能优化：
 - 线程数配置：根据 Intel CPU 特性优化
 - 参考：MDFiles/implementation/PADDLEOCR_CPU_PERFORMANCE_OPTIMIZATION.md
 """
+import hashlib
+import io
 import os
 import logging
+import queue
+import re
 import threading
 
 # ============================================================================
@@ -38,20 +42,77 @@ os.environ.setdefault('OPENBLAS_NUM_THREADS', _CPU_THREADS)
 # 禁用 oneDNN 详细日志
 os.environ.setdefault('DNNL_VERBOSE', '0')
 os.environ.setdefault('MKLDNN_VERBOSE', '0')
+# 高性能推理（HPI）：默认尝试开启，不可用时自动回退；设置 PADDLEOCR_ENABLE_HPI=0 可关闭
+_ENABLE_HPI = os.environ.get('PADDLEOCR_ENABLE_HPI', '1') != '0'
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image
 import cv2
 
 from backend.models.document import LayoutResult, Region, TableStructure, BoundingBox, RegionType
 from backend.services.interfaces import OCRServiceInterface
 from backend.services.retry_handler import retry_handler, RetryConfig, NetworkRetryError
+from backend.services.ocr.table_utils import (
+    BS4_AVAILABLE,
+    LXML_AVAILABLE,
+    ZERO_BBOX,
+    ALPHA_RE,
+    DIGIT_RE,
+    ROW_HANDLERS,
+    TableCell,
+    quad_bounds,
+)
+
+if BS4_AVAILABLE:
+    from bs4 import BeautifulSoup
+
+if LXML_AVAILABLE:
+    from lxml import etree as lxml_etree
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# A bullet or "1." .. "19." marker at the start of the text or of any line
+_LIST_MARKER_RE = re.compile(r'(?:^|\n)(?:[•\-*○▪▫]|(?:1[0-9]|[1-9])\.)')
+
+# Header keywords, matched anywhere in the text regardless of case
+_HEADER_KEYWORD_RE = re.compile(r'title|chapter|section', re.IGNORECASE)
+
+# An ASCII digit within the first 10 characters; for ASCII text this equals
+# any(c.isdigit() for c in text[:10]) as a single C-level scan
+_HAS_DIGIT_10_RE = re.compile(r'.{0,9}[0-9]', re.DOTALL)
+
+# 1.1 * identity - 0.1 * PIL's SMOOTH kernel: ImageEnhance.Sharpness(1.1) as one filter2D pass
+_SHARPEN_KERNEL = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) * (-0.1 / 13)
+_SHARPEN_KERNEL[1, 1] += 1.1
+
+# libjpeg DCT-domain downscale factors, largest first
+_JPEG_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Max pages buffered between stages of analyze_layout_batch
+LAYOUT_PIPELINE_QUEUE_SIZE = 8
+
+# Region crops sent to the OCR engine per call in extract_text
+EXTRACT_TEXT_BATCH_SIZE = 16
+
+# Adaptive resize: keep the median glyph around this many pixels tall,
+# never shrinking the long side below MIN_ADAPTIVE_DIMENSION
+MIN_TEXT_HEIGHT = 20
+MIN_ADAPTIVE_DIMENSION = 640
+TEXT_HEIGHT_PROBE_WIDTH = 1024
+
+# Max distinct region crops whose OCR text is kept per service instance
+REGION_TEXT_CACHE_SIZE = 1024
+
 # ============================================================================
 # 模型缓存 - 单例模式，避免重复加载模型
 # ============================================================================
@@ -207,29 +268,35 @@ def is_models_loading() -> bool:
 
 # ============================================================================
 # PaddleOCR 基础引擎缓存
+# 按 (lang, use_gpu) 缓存，跨 PaddleOCRService 实例复用已加载的模型
 # ============================================================================
-_paddleocr_instance = None
+_paddleocr_instances: Dict[Tuple[str, bool], Any] = {}
 _paddleocr_lock = threading.Lock()
 
 
-def get_paddleocr_instance(lang: str = 'ch'):
+def get_paddleocr_instance(lang: str = 'ch', use_gpu: bool = False):
     """
-    获取 PaddleOCR 基础引擎的单例实例
+    获取 PaddleOCR 基础引擎的缓存实例
+    
+    每个 (lang, use_gpu) 组合只加载一次模型，后续调用直接返回缓存的实例
     
     Args:
         lang: 语言设置
+        use_gpu: 是否使用 GPU（仅 PaddleOCR 2.x 构造参数使用）
         
     Returns:
-        PaddleOCR 实例
+        PaddleOCR 实例，加载失败时返回 None
     """
-    global _paddleocr_instance
-    
-    if _paddleocr_instance is not None:
-        return _paddleocr_instance
+    key = (lang, use_gpu)
+    instance = _paddleocr_instances.get(key)
+    if instance is not None:
+        return instance
     
     with _paddleocr_lock:
-        if _paddleocr_instance is not None:
-            return _paddleocr_instance
+        # 双重检查
+        instance = _paddleocr_instances.get(key)
+        if instance is not None:
+            return instance
         
         try:
             from paddleocr import PaddleOCR
@@ -238,30 +305,49 @@ def get_paddleocr_instance(lang: str = 'ch'):
             version = getattr(paddleocr, '__version__', '2.0.0')
             is_v3 = version.startswith('3.')
             
-            logger.info(f"正在加载 PaddleOCR 基础引擎 (版本: {version})...")
+            logger.info(f"正在加载 PaddleOCR 基础引擎 (版本: {version}, lang: {lang})...")
             import time
             start_time = time.time()
             
             if is_v3:
                 # 关闭方向分类器（不需要处理旋转文档），显式设置 det_limit_side_len=960
-                _paddleocr_instance = PaddleOCR(
+                base_kwargs = dict(
                     use_textline_orientation=False,  # 关闭方向分类，提速 10-20%
                     lang=lang,
                     det_limit_side_len=960  # 显式设置检测图像最大边长
                 )
+                performance_kwargs = dict(
+                    text_recognition_batch_size=1,  # 识别批次为 1，避免 CPU 内存池按批次预留
+                    precision='fp16' if use_gpu else 'fp32'
+                )
+                if _ENABLE_HPI:
+                    # 高性能推理：安装 HPI 依赖后自动选择 OpenVINO/ONNX Runtime 后端
+                    performance_kwargs['enable_hpi'] = True
             else:
                 # 关闭方向分类器，显式设置 det_limit_side_len=960
-                _paddleocr_instance = PaddleOCR(
+                base_kwargs = dict(
                     use_angle_cls=False,  # 关闭方向分类，提速 10-20%
                     lang=lang,
-                    use_gpu=False,
+                    use_gpu=use_gpu,
                     show_log=False,
                     det_limit_side_len=960  # 显式设置检测图像最大边长
                 )
+                performance_kwargs = dict(
+                    rec_batch_num=1,  # 识别批次为 1，避免 CPU 内存池按批次预留
+                    precision='fp16' if use_gpu else 'fp32'
+                )
             
+            try:
+                instance = PaddleOCR(**base_kwargs, **performance_kwargs)
+            except Exception as e:
+                # 旧版本不支持这些参数，或 HPI 依赖未安装（如 Windows）
+                logger.warning(f"PaddleOCR 性能参数不可用 ({e})，使用默认参数加载")
+                instance = PaddleOCR(**base_kwargs)
+            
+            _paddleocr_instances[key] = instance
             elapsed = time.time() - start_time
             logger.info(f"PaddleOCR 基础引擎加载完成，耗时 {elapsed:.1f} 秒")
-            return _paddleocr_instance
+            return instance
             
         except Exception as e:
             logger.error(f"PaddleOCR 基础引擎加载失败: {e}")
@@ -293,6 +379,11 @@ class PaddleOCRService(OCRServiceInterface):
         # key: image_path, value: processed_result
         self._ppstructure_result_cache = {}
         
+        # 区域裁剪图 OCR 结果的 LRU 缓存
+        # key: 裁剪图内容哈希, value: (text, confidence)
+        self._region_text_cache: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._region_text_cache_lock = threading.Lock()
+        
         # Initialize engines lazily to avoid import errors during testing
         self._initialize_engines()
     
@@ -319,36 +410,13 @@ class PaddleOCRService(OCRServiceInterface):
                     logger.info("使用缓存的 PPStructureV3 作为 OCR 引擎")
                     return
                 
-                # 如果 PPStructureV3 不可用，回退到 PaddleOCR
-                cached_ocr = get_paddleocr_instance(self.lang)
-                if cached_ocr is not None:
-                    self._ocr_engine = cached_ocr
-                    self._structure_engine = cached_ocr
-                    logger.info("使用缓存的 PaddleOCR 引擎实例")
-                    return
-            
-            # PaddleOCR 2.x 或缓存不可用时，创建新实例
-            logger.warning("缓存实例不可用，创建新的 PaddleOCR 实例...")
-            from paddleocr import PaddleOCR
-            
-            if is_v3:
-                # 关闭方向分类器（不需要处理旋转文档），显式设置 det_limit_side_len=960
-                self._ocr_engine = PaddleOCR(
-                    use_textline_orientation=False,  # 关闭方向分类，提速 10-20%
-                    lang=self.lang,
-                    det_limit_side_len=960  # 显式设置检测图像最大边长
-                )
-            else:
-                # 关闭方向分类器，显式设置 det_limit_side_len=960
-                self._ocr_engine = PaddleOCR(
-                    use_angle_cls=False,  # 关闭方向分类，提速 10-20%
-                    lang=self.lang,
-                    use_gpu=self.use_gpu,
-                    show_log=False,
-                    det_limit_side_len=960  # 显式设置检测图像最大边长
-                )
+            # PPStructureV3 不可用或 PaddleOCR 2.x：使用按 (lang, use_gpu) 缓存的 PaddleOCR 实例
+            cached_ocr = get_paddleocr_instance(self.lang, self.use_gpu)
+            if cached_ocr is None:
+                raise OCRProcessingError("PaddleOCR engine could not be loaded")
             
-            self._structure_engine = self._ocr_engine
+            self._ocr_engine = cached_ocr
+            self._structure_engine = cached_ocr
             logger.info(f"PaddleOCR engines initialized (version: {version})")
             
         except Exception as e:
@@ -473,7 +541,10 @@ class PaddleOCRService(OCRServiceInterface):
     
     def preprocess_image(self, image_path: str, output_path: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
         """
-        Preprocess image for optimal OCR results
+        Preprocess image for optimal OCR results and save it to disk
+        
+        Layout analysis uses preprocess_image_array directly; this method is
+        kept for callers that need the preprocessed image as a file.
         
         Args:
             image_path: Path to input image
@@ -482,29 +553,16 @@ class PaddleOCRService(OCRServiceInterface):
         Returns:
             Tuple of (path to preprocessed image, scale info dict)
         """
+        image, scale_info = self.preprocess_image_array(image_path)
+        
         try:
-            # Load image
-            image = Image.open(image_path)
-            original_width, original_height = image.size
-            
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Apply preprocessing steps
-            image = self._enhance_image_quality(image)
-            image, scale_info = self._normalize_image_size_with_scale(image)
-            
-            # Record original dimensions for coordinate mapping
-            scale_info['original_width'] = original_width
-            scale_info['original_height'] = original_height
-            
             # Save preprocessed image
             if output_path is None:
                 base_path = Path(image_path)
                 output_path = str(base_path.parent / f"{base_path.stem}_preprocessed{base_path.suffix}")
             
-            image.save(output_path, quality=95, optimize=True)
+            if not cv2.imwrite(output_path, image, [cv2.IMWRITE_JPEG_QUALITY, 95]):
+                raise ValueError(f"Unable to write preprocessed image: {output_path}")
             
             logger.info(f"Image preprocessed and saved to: {output_path}, scale_info: {scale_info}")
             return output_path, scale_info
@@ -512,41 +570,123 @@ class PaddleOCRService(OCRServiceInterface):
         except Exception as e:
             raise OCRProcessingError(f"Image preprocessing failed: {e}")
     
-    def _enhance_image_quality(self, image: Image.Image) -> Image.Image:
+    def preprocess_image_array(self, image_path: str) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Preprocess image for optimal OCR results, keeping it in memory
+        
+        Args:
+            image_path: Path to input image
+            
+        Returns:
+            Tuple of (preprocessed BGR image array, scale info dict)
+        """
+        try:
+            # Load image as 3-channel BGR (large JPEGs are downscaled while decoding)
+            image, (original_width, original_height) = self._read_image_bgr(image_path)
+            decoded_height, decoded_width = image.shape[:2]
+            
+            # Apply preprocessing steps; downsample first so enhancement
+            # only touches the pixels that reach the OCR engine
+            image, scale_info = self._normalize_image_size_with_scale(image)
+            image = self._enhance_image_quality(image)
+            
+            # Fold the decode-time reduction into the scale back to the original
+            if (decoded_width, decoded_height) != (original_width, original_height):
+                scale_info['scale_x'] = original_width / scale_info['preprocessed_width']
+                scale_info['scale_y'] = original_height / scale_info['preprocessed_height']
+                scale_info['was_resized'] = True
+            
+            # Record original dimensions for coordinate mapping
+            scale_info['original_width'] = original_width
+            scale_info['original_height'] = original_height
+            
+            return image, scale_info
+            
+        except Exception as e:
+            raise OCRProcessingError(f"Image preprocessing failed: {e}")
+    
+    def _read_image_bgr(self, image_path: str, max_dimension: int = 1280) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """
+        Load an image as a BGR array, using libjpeg's DCT scaling for large JPEGs
+        
+        JPEG 解码时可直接按 1/2、1/4、1/8 缩小（IMREAD_REDUCED_COLOR_*），
+        只要缩小后长边仍不小于 max_dimension，后续 resize 结果不变，但解码量大幅减少
+        
+        Args:
+            image_path: Path to input image
+            max_dimension: Long side the image will be resized to afterwards
+            
+        Returns:
+            Tuple of (BGR image array, (original width, original height))
+        """
+        flags = cv2.IMREAD_COLOR
+        original_size = None
+        try:
+            # Image.open only parses the header here
+            with Image.open(image_path) as header:
+                if header.format == 'JPEG':
+                    original_size = header.size
+                    # EXIF orientations 5-8 are transposed by cv2.imread
+                    if header.getexif().get(0x0112) in (5, 6, 7, 8):
+                        original_size = original_size[::-1]
+        except Exception:
+            pass
+        
+        if original_size:
+            long_side = max(original_size)
+            for factor, reduced_flag in _JPEG_REDUCED_FLAGS:
+                if long_side // factor >= max_dimension:
+                    flags = reduced_flag
+                    break
+        
+        image = cv2.imread(image_path, flags)
+        if image is None:
+            raise ValueError(f"Unable to read image: {image_path}")
+        
+        if flags == cv2.IMREAD_COLOR:
+            original_size = (image.shape[1], image.shape[0])
+        else:
+            logger.info(f"JPEG decoded at reduced size {image.shape[1]}x{image.shape[0]} "
+                        f"from {original_size[0]}x{original_size[1]}")
+        return image, original_size
+    
+    def _enhance_image_quality(self, image: np.ndarray) -> np.ndarray:
         """
         Enhance image quality for better OCR results
         
+        Contrast, sharpening and denoising run as three OpenCV passes on the
+        BGR array, matching the former PIL ImageEnhance/MedianFilter chain.
+        
         Args:
-            image: PIL Image object
+            image: BGR uint8 image array
             
         Returns:
-            Enhanced PIL Image object
+            Enhanced BGR uint8 image array
         """
-        # Enhance contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.2)
+        # Enhance contrast (x1.2 around the mean grey level, like ImageEnhance.Contrast)
+        mean_gray = cv2.mean(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))[0]
+        image = cv2.convertScaleAbs(image, alpha=1.2, beta=-0.2 * mean_gray)
         
-        # Enhance sharpness
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(1.1)
+        # Enhance sharpness (x1.1 away from the PIL smooth kernel) in one convolution
+        image = cv2.filter2D(image, -1, _SHARPEN_KERNEL)
         
         # Apply slight denoising
-        image = image.filter(ImageFilter.MedianFilter(size=3))
+        image = cv2.medianBlur(image, 3)
         
         return image
     
-    def _normalize_image_size_with_scale(self, image: Image.Image, max_dimension: int = 1280) -> Tuple[Image.Image, Dict[str, Any]]:
+    def _normalize_image_size_with_scale(self, image: np.ndarray, max_dimension: int = 1280) -> Tuple[np.ndarray, Dict[str, Any]]:
         """
         Normalize image size to optimal dimensions for OCR and return scale info
         
         Args:
-            image: PIL Image object
+            image: BGR image array
             max_dimension: Maximum dimension for resizing
             
         Returns:
-            Tuple of (Resized PIL Image object, scale info dict)
+            Tuple of (Resized image array, scale info dict)
         """
-        width, height = image.size
+        height, width = image.shape[:2]
         scale_info = {
             'preprocessed_width': width,
             'preprocessed_height': height,
@@ -555,6 +695,9 @@ class PaddleOCRService(OCRServiceInterface):
             'was_resized': False
         }
         
+        # Pages with large type can shrink further while keeping text legible
+        max_dimension = self._adaptive_max_dimension(image, max_dimension)
+        
         # Only resize if image is too large
         if max(width, height) > max_dimension:
             if width > height:
@@ -571,23 +714,86 @@ class PaddleOCRService(OCRServiceInterface):
             scale_info['preprocessed_height'] = new_height
             scale_info['was_resized'] = True
             
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            # INTER_AREA: SIMD/multithreaded box filter, the right kernel for downscaling
+            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
             logger.info(f"Image resized from {width}x{height} to {new_width}x{new_height}, scale: {scale_info['scale_x']:.3f}x{scale_info['scale_y']:.3f}")
         
         return image, scale_info
     
-    def _normalize_image_size(self, image: Image.Image, max_dimension: int = 1280) -> Image.Image:
+    def _adaptive_max_dimension(self, image: np.ndarray, max_dimension: int) -> int:
+        """
+        Pick the resize target from the page's median text height
+        
+        The target is the smallest long side that keeps the median glyph at
+        about MIN_TEXT_HEIGHT pixels, clamped to
+        [MIN_ADAPTIVE_DIMENSION, max_dimension].
+        
+        Args:
+            image: BGR image array
+            max_dimension: Upper bound for the long side
+            
+        Returns:
+            Maximum dimension to resize to
+        """
+        text_height = self._estimate_text_height(image)
+        if not text_height:
+            return max_dimension
+        
+        long_side = max(image.shape[:2])
+        target = int(long_side * MIN_TEXT_HEIGHT / text_height)
+        target = min(max_dimension, max(MIN_ADAPTIVE_DIMENSION, target))
+        if target < max_dimension:
+            logger.info(f"Median text height {text_height:.1f}px, adaptive resize target {target}px")
+        return target
+    
+    def _estimate_text_height(self, image: np.ndarray) -> Optional[float]:
+        """
+        Estimate the median text line height of a page
+        
+        Horizontal gradients (glyph strokes, not table rules) are averaged per
+        row on a downscaled copy; runs of rows above half the mean profile are
+        text lines and their median length is the text height.
+        
+        Args:
+            image: BGR image array
+            
+        Returns:
+            Median text height in original pixels, or None if no text is found
+        """
+        height, width = image.shape[:2]
+        probe_scale = min(1.0, TEXT_HEIGHT_PROBE_WIDTH / width)
+        
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if probe_scale < 1.0:
+            probe_size = (max(1, round(width * probe_scale)), max(1, round(height * probe_scale)))
+            gray = cv2.resize(gray, probe_size, interpolation=cv2.INTER_AREA)
+        
+        gradient = np.abs(cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3))
+        profile = cv2.reduce(gradient, 1, cv2.REDUCE_AVG).ravel()
+        if profile.max() <= 0:
+            return None
+        
+        text_rows = np.concatenate(([False], profile > profile.mean() * 0.5, [False]))
+        edges = np.diff(text_rows.astype(np.int8))
+        runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        runs = runs[runs >= 2]
+        if runs.size == 0:
+            return None
+        
+        return float(np.median(runs)) / probe_scale
+    
+    def _normalize_image_size(self, image: np.ndarray, max_dimension: int = 1280) -> np.ndarray:
         """
         Normalize image size to optimal dimensions for OCR (legacy method)
         
         Args:
-            image: PIL Image object
+            image: BGR image array
             max_dimension: Maximum dimension for resizing
             
         Returns:
-            Resized PIL Image object
+            Resized image array
         """
-        width, height = image.size
+        height, width = image.shape[:2]
         
         # Only resize if image is too large
         if max(width, height) > max_dimension:
@@ -598,7 +804,7 @@ class PaddleOCRService(OCRServiceInterface):
                 new_height = max_dimension
                 new_width = int(width * (max_dimension / height))
             
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
             logger.info(f"Image resized from {width}x{height} to {new_width}x{new_height}")
         
         return image
@@ -627,104 +833,14 @@ class PaddleOCRService(OCRServiceInterface):
         def perform_layout_analysis():
             try:
                 import time
-                import json
-                import paddleocr
                 start_time = time.time()
                 
                 # Preprocess image for better results and get scale info
-                preprocessed_path, scale_info = self.preprocess_image(image_path)
+                preprocessed_image, scale_info = self.preprocess_image_array(image_path)
                 
-                # 检测 PaddleOCR 版本并使用相应的 API
-                version = getattr(paddleocr, '__version__', '2.0.0')
-                is_v3 = version.startswith('3.')
+                raw_result, is_v3 = self._run_layout_engine(preprocessed_image)
                 
-                if is_v3:
-                    # PaddleOCR 3.x: 使用 predict 方法
-                    # 禁用不必要的功能以加速处理：
-                    # - use_doc_orientation_classify=False: 禁用文档方向分类
-                    # - use_doc_unwarping=False: 禁用文档去畸变
-                    # - use_seal_recognition=False: 禁用印章识别
-                    # - use_formula_recognition=False: 禁用公式识别
-                    # - use_chart_recognition=False: 禁用图表识别
-                    raw_result = list(self._structure_engine.predict(
-                        preprocessed_path,
-                        use_doc_orientation_classify=False,
-                        use_doc_unwarping=False,
-                        use_seal_recognition=False,
-                        use_formula_recognition=False,
-                        use_chart_recognition=False
-                    ))
-                    
-                    # 处理 PPStructureV3 的返回格式并缓存
-                    # 这样 extract_tables 可以直接使用缓存的结果，避免重复调用 predict()
-                    processed_ppstructure_result = self._process_ppstructure_v3_result(raw_result, preprocessed_path)
-                    self._ppstructure_result_cache[preprocessed_path] = processed_ppstructure_result
-                    # 同时缓存原始图像路径的结果
-                    self._ppstructure_result_cache[image_path] = processed_ppstructure_result
-                    
-                    # 保存 PPStructure HTML 输出（传入开始时间和 scale_info）
-                    self._save_ppstructure_html(image_path, processed_ppstructure_result, start_time, scale_info)
-                    
-                    # 【修复】使用 PPStructureV3 的布局分析结果创建 regions
-                    # 而不是使用 OCR 文本行结果
-                    regions = self._parse_ppstructure_v3_to_regions(processed_ppstructure_result)
-                    
-                    # 同时保存 OCR 文本行结果用于下载
-                    structure_result = self._convert_v3_result_to_legacy(raw_result)
-                    self._save_raw_ocr_output(image_path, structure_result, scale_info)
-                else:
-                    # PaddleOCR 2.x: 使用 ocr 方法
-                    structure_result = self._structure_engine.ocr(preprocessed_path, cls=True)
-                    
-                    # Save raw OCR output for download
-                    self._save_raw_ocr_output(image_path, structure_result, scale_info)
-                    
-                    # Parse structure results with enhanced classification
-                    regions = self._parse_structure_result(structure_result)
-                
-                # Convert coordinates back to original image scale
-                regions = self._scale_regions_to_original(regions, scale_info)
-                
-                # 【重要】只在 PaddleOCR 2.x 时进行启发式布局分类增强
-                # PaddleOCR 3.x (PPStructureV3) 已经内置了深度学习布局分析，
-                # 不需要也不应该用启发式规则覆盖其分类结果
-                if not is_v3:
-                    regions = self._enhance_layout_classification(regions, image_path)
-                
-                # Sort regions by reading order (top to bottom, left to right)
-                regions = self._sort_regions_by_reading_order(regions)
-                
-                # Calculate confidence metrics
-                confidence_metrics = self._calculate_confidence_metrics(regions)
-                
-                # 计算处理时间
-                end_time = time.time()
-                processing_time = end_time - start_time
-                
-                # 生成置信度计算日志（包含时间信息）
-                try:
-                    output_folder = str(Path(image_path).parent)
-                    # 从 image_path 提取 job_id
-                    image_name = Path(image_path).stem
-                    if '_page' in image_name:
-                        job_id = image_name.split('_page')[0]
-                    else:
-                        job_id = image_name
-                    self.generate_confidence_log(regions, job_id, output_folder, start_time, end_time, processing_time)
-                except Exception as e:
-                    logger.warning(f"生成置信度日志失败: {e}")
-                
-                # 保留预处理后的图像用于调试（不再删除）
-                # 文件名格式: {job_id}_page1_preprocessed.png
-                if preprocessed_path != image_path:
-                    logger.info(f"保留预处理图像用于调试: {preprocessed_path}")
-                
-                return LayoutResult(
-                    regions=regions,
-                    tables=[],  # Tables will be populated in extract_tables method
-                    confidence_score=confidence_metrics['overall'],
-                    processing_time=processing_time
-                )
+                return self._build_layout_result(image_path, scale_info, raw_result, is_v3, start_time)
                 
             except Exception as e:
                 # Convert certain errors to retryable network errors
@@ -740,6 +856,242 @@ class PaddleOCRService(OCRServiceInterface):
         except Exception as e:
             raise OCRProcessingError(f"Layout analysis error: {e}")
     
+    def analyze_layout_batch(self, image_paths: List[str]) -> List[LayoutResult]:
+        """
+        Perform layout analysis on several images with a three-stage pipeline
+        
+        Preprocessing, engine inference and post-processing run in their own
+        threads connected by bounded queues, so CPU-side work for one page
+        overlaps with inference of another (the native predictor releases
+        the GIL). Pages that fail inside the pipeline are re-run through
+        analyze_layout to get its retry handling.
+        
+        Args:
+            image_paths: Paths to image files
+            
+        Returns:
+            LayoutResult for each image, in input order
+        """
+        if not self._structure_engine:
+            raise OCRProcessingError("Structure engine not initialized")
+        
+        import time
+        
+        preprocessed_queue = queue.Queue(maxsize=LAYOUT_PIPELINE_QUEUE_SIZE)
+        inferred_queue = queue.Queue(maxsize=LAYOUT_PIPELINE_QUEUE_SIZE)
+        results: List[Optional[LayoutResult]] = [None] * len(image_paths)
+        failed_indices: List[int] = []
+        
+        def preprocess_stage():
+            try:
+                for index, image_path in enumerate(image_paths):
+                    try:
+                        start_time = time.time()
+                        preprocessed_image, scale_info = self.preprocess_image_array(image_path)
+                        preprocessed_queue.put((index, image_path, preprocessed_image, scale_info, start_time))
+                    except Exception as e:
+                        logger.warning(f"Pipeline preprocessing failed for {image_path}: {e}")
+                        failed_indices.append(index)
+            finally:
+                preprocessed_queue.put(None)
+        
+        def engine_stage():
+            try:
+                while (item := preprocessed_queue.get()) is not None:
+                    index, image_path, preprocessed_image, scale_info, start_time = item
+                    try:
+                        raw_result, is_v3 = self._run_layout_engine(preprocessed_image)
+                        inferred_queue.put((index, image_path, scale_info, raw_result, is_v3, start_time))
+                    except Exception as e:
+                        logger.warning(f"Pipeline inference failed for {image_path}: {e}")
+                        failed_indices.append(index)
+            finally:
+                inferred_queue.put(None)
+        
+        def postprocess_stage():
+            while (item := inferred_queue.get()) is not None:
+                index, image_path = item[0], item[1]
+                try:
+                    results[index] = self._build_layout_result(*item[1:])
+                except Exception as e:
+                    logger.warning(f"Pipeline post-processing failed for {image_path}: {e}")
+                    failed_indices.append(index)
+        
+        threads = [
+            threading.Thread(target=preprocess_stage, name='layout-preprocess', daemon=True),
+            threading.Thread(target=engine_stage, name='layout-engine', daemon=True),
+            threading.Thread(target=postprocess_stage, name='layout-postprocess', daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        for index in sorted(failed_indices):
+            results[index] = self.analyze_layout(image_paths[index])
+        
+        return results
+    
+    def analyze_layout_many(self, image_paths: List[str], max_workers: Optional[int] = None) -> List[LayoutResult]:
+        """
+        Perform layout analysis on several images across worker processes
+        
+        Paddle predictors cannot be pickled, so each worker builds its own
+        PaddleOCRService in the pool initializer and only image paths and
+        LayoutResult objects cross the process boundary. Workers are
+        spawned, not forked: a forked child would inherit this process's
+        cached engines, whose native (MKL/OpenMP) thread pools do not
+        survive fork and can deadlock.
+        
+        Args:
+            image_paths: Paths to image files
+            max_workers: Number of worker processes (default: CPU cores
+                divided by the per-process PADDLEOCR_CPU_THREADS setting)
+            
+        Returns:
+            LayoutResult for each image, in input order
+        """
+        if not image_paths:
+            return []
+        
+        if max_workers is None:
+            threads_per_worker = max(1, int(_CPU_THREADS)) if _CPU_THREADS.isdigit() else 1
+            max_workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+        max_workers = min(max_workers, len(image_paths))
+        
+        logger.info(f"Analyzing {len(image_paths)} images with {max_workers} worker processes")
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_layout_worker,
+            initargs=(self.use_gpu, self.lang)
+        ) as executor:
+            return list(executor.map(_analyze_layout_in_worker, image_paths))
+    
+    def _run_layout_engine(self, preprocessed_image: np.ndarray) -> Tuple[Any, bool]:
+        """
+        Run the structure engine on a preprocessed image
+        
+        Both PaddleOCR APIs accept the BGR array directly, so the image is
+        never re-encoded to disk between preprocessing and inference.
+        
+        Args:
+            preprocessed_image: Preprocessed BGR image array
+            
+        Returns:
+            Tuple of (raw engine result, whether PaddleOCR 3.x API was used)
+        """
+        import paddleocr
+        
+        # 检测 PaddleOCR 版本并使用相应的 API
+        version = getattr(paddleocr, '__version__', '2.0.0')
+        is_v3 = version.startswith('3.')
+        
+        if is_v3:
+            # PaddleOCR 3.x: 使用 predict 方法
+            # 禁用不必要的功能以加速处理：
+            # - use_doc_orientation_classify=False: 禁用文档方向分类
+            # - use_doc_unwarping=False: 禁用文档去畸变
+            # - use_seal_recognition=False: 禁用印章识别
+            # - use_formula_recognition=False: 禁用公式识别
+            # - use_chart_recognition=False: 禁用图表识别
+            raw_result = list(self._structure_engine.predict(
+                preprocessed_image,
+                use_doc_orientation_classify=False,
+                use_doc_unwarping=False,
+                use_seal_recognition=False,
+                use_formula_recognition=False,
+                use_chart_recognition=False
+            ))
+        else:
+            # PaddleOCR 2.x: 使用 ocr 方法
+            raw_result = self._structure_engine.ocr(preprocessed_image, cls=True)
+        
+        return raw_result, is_v3
+    
+    def _build_layout_result(self, image_path: str, scale_info: Dict[str, Any],
+                             raw_result: Any, is_v3: bool, start_time: float) -> LayoutResult:
+        """
+        Turn a raw structure engine result into a LayoutResult
+        
+        Args:
+            image_path: Path to the original image
+            scale_info: Scale information from preprocessing
+            raw_result: Raw result from _run_layout_engine
+            is_v3: Whether the PaddleOCR 3.x API produced the result
+            start_time: Time the analysis of this image started
+            
+        Returns:
+            LayoutResult containing detected regions and metadata
+        """
+        import time
+        
+        if is_v3:
+            # 处理 PPStructureV3 的返回格式并缓存
+            # 这样 extract_tables 可以直接使用缓存的结果，避免重复调用 predict()
+            processed_ppstructure_result = self._process_ppstructure_v3_result(raw_result, image_path)
+            self._ppstructure_result_cache[image_path] = processed_ppstructure_result
+            
+            # 保存 PPStructure HTML 输出（传入开始时间和 scale_info）
+            self._save_ppstructure_html(image_path, processed_ppstructure_result, start_time, scale_info)
+            
+            # 【修复】使用 PPStructureV3 的布局分析结果创建 regions
+            # 而不是使用 OCR 文本行结果
+            regions = self._parse_ppstructure_v3_to_regions(processed_ppstructure_result)
+            
+            # 同时保存 OCR 文本行结果用于下载
+            structure_result = self._convert_v3_result_to_legacy(raw_result)
+            self._save_raw_ocr_output(image_path, structure_result, scale_info)
+        else:
+            structure_result = raw_result
+            
+            # Save raw OCR output for download
+            self._save_raw_ocr_output(image_path, structure_result, scale_info)
+            
+            # Parse structure results with enhanced classification
+            regions = self._parse_structure_result(structure_result)
+        
+        # Convert coordinates back to original image scale
+        regions = self._scale_regions_to_original(regions, scale_info)
+        
+        # 【重要】只在 PaddleOCR 2.x 时进行启发式布局分类增强
+        # PaddleOCR 3.x (PPStructureV3) 已经内置了深度学习布局分析，
+        # 不需要也不应该用启发式规则覆盖其分类结果
+        if not is_v3:
+            regions = self._enhance_layout_classification(
+                regions, (scale_info['original_height'], scale_info['original_width'])
+            )
+        
+        # Sort regions by reading order (top to bottom, left to right)
+        regions = self._sort_regions_by_reading_order(regions)
+        
+        # Calculate confidence metrics
+        confidence_metrics = self._calculate_confidence_metrics(regions)
+        
+        # 计算处理时间
+        end_time = time.time()
+        processing_time = end_time - start_time
+        
+        # 生成置信度计算日志（包含时间信息）
+        try:
+            output_folder = str(Path(image_path).parent)
+            # 从 image_path 提取 job_id
+            image_name = Path(image_path).stem
+            if '_page' in image_name:
+                job_id = image_name.split('_page')[0]
+            else:
+                job_id = image_name
+            self.generate_confidence_log(regions, job_id, output_folder, start_time, end_time, processing_time)
+        except Exception as e:
+            logger.warning(f"生成置信度日志失败: {e}")
+        
+        return LayoutResult(
+            regions=regions,
+            tables=[],  # Tables will be populated in extract_tables method
+            confidence_score=confidence_metrics['overall'],
+            processing_time=processing_time
+        )
+    
     def _save_raw_ocr_output(self, image_path: str, structure_result: List, scale_info: Dict[str, Any]) -> None:
         """
         Save raw PaddleOCR output for download
@@ -1633,46 +1985,57 @@ table tr:nth-child(even) {
         Returns:
             Markdown table string
         """
+        if LXML_AVAILABLE:
+            try:
+                rows = [cell_texts for cell_texts, _ in self._iter_html_table_rows_lxml(html_content)]
+                return self._table_rows_to_markdown(rows)
+            except Exception as e:
+                logger.debug(f"lxml table parsing failed, falling back to BeautifulSoup: {e}")
+        
+        if not BS4_AVAILABLE:
+            logger.warning("BeautifulSoup not available for HTML table parsing")
+            return ""
+        
         try:
-            from bs4 import BeautifulSoup
-            
             soup = BeautifulSoup(html_content, 'html.parser')
             table = soup.find('table')
             
             if not table:
                 return ""
             
-            rows = table.find_all('tr')
-            if not rows:
-                return ""
-            
-            markdown_rows = []
-            max_cols = 0
-            
-            for row_idx, row in enumerate(rows):
-                cells = row.find_all(['td', 'th'])
-                cell_texts = [cell.get_text(strip=True) for cell in cells]
-                max_cols = max(max_cols, len(cell_texts))
-                
-                # 转义 Markdown 特殊字符
-                cell_texts = [text.replace('|', '\\|') for text in cell_texts]
-                
-                markdown_rows.append('| ' + ' | '.join(cell_texts) + ' |')
-                
-                # 在第一行后添加分隔符
-                if row_idx == 0:
-                    separator = '| ' + ' | '.join(['---'] * len(cell_texts)) + ' |'
-                    markdown_rows.append(separator)
-            
-            return '\n'.join(markdown_rows)
+            rows = [[cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])]
+                    for row in table.find_all('tr')]
+            return self._table_rows_to_markdown(rows)
             
-        except ImportError:
-            logger.warning("BeautifulSoup not available for HTML table parsing")
-            return ""
         except Exception as e:
             logger.warning(f"HTML table to Markdown conversion failed: {e}")
             return ""
     
+    def _table_rows_to_markdown(self, rows: List[List[str]]) -> str:
+        """
+        Format parsed table rows as a Markdown table
+        
+        Args:
+            rows: Cell texts for each row
+            
+        Returns:
+            Markdown table string
+        """
+        markdown_rows = []
+        
+        for row_idx, cell_texts in enumerate(rows):
+            # 转义 Markdown 特殊字符
+            cell_texts = [text.replace('|', '\\|') for text in cell_texts]
+            
+            markdown_rows.append('| ' + ' | '.join(cell_texts) + ' |')
+            
+            # 在第一行后添加分隔符
+            if row_idx == 0:
+                separator = '| ' + ' | '.join(['---'] * len(cell_texts)) + ' |'
+                markdown_rows.append(separator)
+        
+        return '\n'.join(markdown_rows)
+    
     def _list_to_markdown_table(self, table_data: List) -> str:
         """
         Convert list-based table data to Markdown format
@@ -1752,54 +2115,59 @@ table tr:nth-child(even) {
         
         return scaled_regions
     
-    def _enhance_layout_classification(self, regions: List[Region], image_path: str) -> List[Region]:
+    def _enhance_layout_classification(self, regions: List[Region], image_shape: Tuple[int, int]) -> List[Region]:
         """
         Enhance layout classification with advanced heuristics
         
         Args:
             regions: Initial regions from structure analysis
-            image_path: Path to preprocessed image
+            image_shape: (height, width) of the image the region coordinates refer to
             
         Returns:
             Enhanced regions with better classification
         """
         try:
-            # Load image for additional analysis
-            image = cv2.imread(image_path)
-            if image is None:
+            image_height, image_width = image_shape
+            if not image_height or not image_width:
                 return regions
             
-            image_height, image_width = image.shape[:2]
+            # Compute position ratios and areas for all regions in one pass
+            coords = np.fromiter(
+                (value for region in regions
+                 for value in (region.coordinates.x, region.coordinates.y,
+                               region.coordinates.width, region.coordinates.height)),
+                dtype=np.float64,
+                count=4 * len(regions)
+            ).reshape(-1, 4)
+            ratio_array = coords / np.array([image_width, image_height, image_width, image_height],
+                                            dtype=np.float64)
+            ratios = ratio_array.tolist()
+            areas = (coords[:, 2] * coords[:, 3]).tolist()
+            
+            # Refine all classifications in one vectorized pass
+            classifications = self._refine_region_classifications(regions, ratio_array)
             
             enhanced_regions = []
             
-            for region in regions:
-                # Create enhanced region copy
-                enhanced_region = Region(
+            for region, (x_ratio, y_ratio, width_ratio, height_ratio), area, classification in zip(
+                    regions, ratios, areas, classifications):
+                # Create enhanced region copy with position-based metadata
+                metadata = region.metadata.copy()
+                metadata['relative_position'] = {
+                    'x_ratio': x_ratio,
+                    'y_ratio': y_ratio,
+                    'width_ratio': width_ratio,
+                    'height_ratio': height_ratio
+                }
+                metadata['area'] = area
+                
+                enhanced_regions.append(Region(
                     coordinates=region.coordinates,
-                    classification=region.classification,
+                    classification=classification,
                     confidence=region.confidence,
                     content=region.content,
-                    metadata=region.metadata.copy()
-                )
-                
-                # Add position-based metadata
-                enhanced_region.metadata.update({
-                    'relative_position': {
-                        'x_ratio': region.coordinates.x / image_width,
-                        'y_ratio': region.coordinates.y / image_height,
-                        'width_ratio': region.coordinates.width / image_width,
-                        'height_ratio': region.coordinates.height / image_height
-                    },
-                    'area': region.coordinates.width * region.coordinates.height
-                })
-                
-                # Refine classification based on enhanced analysis
-                enhanced_region.classification = self._refine_region_classification(
-                    enhanced_region, image_height, image_width
-                )
-                
-                enhanced_regions.append(enhanced_region)
+                    metadata=metadata
+                ))
             
             return enhanced_regions
             
@@ -1807,6 +2175,53 @@ table tr:nth-child(even) {
             logger.warning(f"Layout enhancement failed: {e}")
             return regions
     
+    def _refine_region_classifications(self, regions: List[Region], ratios: np.ndarray) -> List[RegionType]:
+        """
+        Vectorized _refine_region_classification over a whole page
+        
+        与 _refine_region_classification 规则一致，但用 NumPy 字符串/布尔运算
+        一次性计算所有区域，避免逐区域的 Python 循环
+        
+        Args:
+            regions: Regions to classify
+            ratios: (N, 4) array of x/y/width/height ratios to the image size
+            
+        Returns:
+            Refined RegionType for each region, in input order
+        """
+        if not regions:
+            return []
+        
+        has_content = np.fromiter((bool(r.content) for r in regions), dtype=bool, count=len(regions))
+        texts = np.array([r.content.strip() if r.content else '' for r in regions], dtype=np.str_)
+        lengths = np.char.str_len(texts)
+        y_ratio, width_ratio, height_ratio = ratios[:, 1], ratios[:, 2], ratios[:, 3]
+        
+        # List markers may start any line, so keep the compiled regex per text
+        is_list = np.fromiter((_LIST_MARKER_RE.search(t) is not None for t in texts.tolist()),
+                              dtype=bool, count=len(regions))
+        has_keyword = np.fromiter((_HEADER_KEYWORD_RE.search(t) is not None for t in texts.tolist()),
+                                  dtype=bool, count=len(regions))
+        
+        is_header = (y_ratio < 0.2) | (
+            (lengths < 80) & (np.char.isupper(texts) | has_keyword | (width_ratio > 0.6))
+        )
+        is_table = (
+            (np.char.find(texts, '\t') >= 0) |
+            (np.char.find(texts, '|') >= 0) |
+            (np.char.count(texts, ' ') > lengths * 0.3)
+        ) & (height_ratio > 0.1)
+        
+        # First matching rule wins, same order as _refine_region_classification
+        choice = np.select(
+            [~has_content, is_list, is_header, is_table],
+            [0, 1, 2, 3],
+            default=4
+        )
+        lookup = (RegionType.IMAGE, RegionType.LIST, RegionType.HEADER,
+                  RegionType.TABLE, RegionType.PARAGRAPH)
+        return [lookup[i] for i in choice.tolist()]
+    
     def _refine_region_classification(self, region: Region, image_height: int, image_width: int) -> RegionType:
         """
         Refine region classification using advanced heuristics
@@ -1834,20 +2249,14 @@ table tr:nth-child(even) {
         height_ratio = bbox.height / image_height
         
         # List detection (enhanced) - check this first before header detection
-        list_indicators = ['•', '-', '*', '○', '▪', '▫']
-        numbered_pattern = any(text.startswith(f'{i}.') for i in range(1, 20))
-        
-        if (any(text.startswith(indicator) for indicator in list_indicators) or
-            numbered_pattern or
-            any(f'\n{indicator}' in text for indicator in list_indicators) or
-            any(f'\n{i}.' in text for i in range(1, 20))):
+        if _LIST_MARKER_RE.search(text):
             return RegionType.LIST
         
         # Header detection (enhanced)
         if (y_ratio < 0.2 or  # Top 20% of image
             (len(text) < 80 and 
              (text.isupper() or 
-              any(keyword in text.lower() for keyword in ['title', 'chapter', 'section']) or
+              _HEADER_KEYWORD_RE.search(text) or
               width_ratio > 0.6))):  # Wide text likely to be header
             return RegionType.HEADER
         
@@ -1870,12 +2279,19 @@ table tr:nth-child(even) {
         Returns:
             Sorted list of regions
         """
-        def reading_order_key(region: Region) -> Tuple[int, int]:
-            # Group by approximate rows (with tolerance for slight misalignment)
-            row_group = int(region.coordinates.y // 50)  # 50px tolerance
-            return (row_group, int(region.coordinates.x))
+        if not regions:
+            return []
+        
+        count = len(regions)
+        ys = np.fromiter((region.coordinates.y for region in regions), dtype=np.float64, count=count)
+        xs = np.fromiter((region.coordinates.x for region in regions), dtype=np.float64, count=count)
         
-        return sorted(regions, key=reading_order_key)
+        # Group by approximate rows (with tolerance for slight misalignment),
+        # then pack (row_group, x) into one int64 key and sort natively
+        row_groups = np.floor_divide(ys, 50).astype(np.int64)  # 50px tolerance
+        keys = (row_groups << 32) + np.trunc(xs).astype(np.int64)
+        
+        return [regions[i] for i in np.argsort(keys, kind='stable')]
     
     def _calculate_confidence_metrics(self, regions: List[Region]) -> Dict[str, float]:
         """
@@ -1958,9 +2374,20 @@ table tr:nth-child(even) {
         if not regions:
             return 0.0
         
+        # 单次遍历同时统计三个因子
+        region_types = set()
+        reasonable_sizes = 0
+        meaningful_content = 0
+        for region in regions:
+            region_types.add(region.classification)
+            # 放宽面积范围，PPStructureV3 的区域通常较大
+            if 50 < region.coordinates.width * region.coordinates.height < 10000000:
+                reasonable_sizes += 1
+            if region.content and len(region.content.strip()) > 3:
+                meaningful_content += 1
+        
         # Factor 1: Region diversity (降低权重，因为文档可能只有特定类型)
         # 只要有 1 种以上类型就给较高分数
-        region_types = set(r.classification for r in regions)
         num_types = len(region_types)
         if num_types >= 3:
             type_diversity = 1.0
@@ -1970,20 +2397,10 @@ table tr:nth-child(even) {
             type_diversity = 0.7  # 即使只有一种类型也给 0.7
         
         # Factor 2: Reasonable region sizes (not too small or too large)
-        reasonable_sizes = 0
-        for region in regions:
-            area = region.coordinates.width * region.coordinates.height
-            # 放宽面积范围，PPStructureV3 的区域通常较大
-            if 50 < area < 10000000:  # 更宽松的面积范围
-                reasonable_sizes += 1
-        size_factor = reasonable_sizes / len(regions) if regions else 0.5
+        size_factor = reasonable_sizes / len(regions)
         
         # Factor 3: Text content quality (regions should have meaningful content)
-        meaningful_content = 0
-        for region in regions:
-            if region.content and len(region.content.strip()) > 3:
-                meaningful_content += 1
-        content_factor = meaningful_content / len(regions) if regions else 0.5
+        content_factor = meaningful_content / len(regions)
         
         # 加权平均：内容质量权重最高，类型多样性权重最低
         # 权重：内容质量 0.5, 尺寸合理性 0.3, 类型多样性 0.2
@@ -2415,26 +2832,25 @@ table tr:nth-child(even) {
         # Get the actual results from the first element
         actual_results = structure_result[0] if structure_result else []
         
+        items = []
         for item in actual_results:
-            if not item or len(item) < 2:
+            try:
+                # Keep items whose bounding box is a 4-point polygon
+                if item and len(item) >= 2 and len(item[0]) == 4 and len(item[0][0]) == 2:
+                    items.append(item)
+            except TypeError:
+                continue
+        
+        # Calculate all bounding boxes in one vectorized pass
+        bounds = quad_bounds([item[0] for item in items])
+        
+        for item, item_bounds in zip(items, bounds):
+            if item_bounds is None:
                 continue
             
             try:
-                # Extract bounding box coordinates
-                bbox_coords = item[0]
-                if len(bbox_coords) != 4 or len(bbox_coords[0]) != 2:
-                    continue
-                
-                # Calculate bounding box
-                x_coords = [point[0] for point in bbox_coords]
-                y_coords = [point[1] for point in bbox_coords]
-                
-                bbox = BoundingBox(
-                    x=min(x_coords),
-                    y=min(y_coords),
-                    width=max(x_coords) - min(x_coords),
-                    height=max(y_coords) - min(y_coords)
-                )
+                x, y, width, height = item_bounds
+                bbox = BoundingBox(x=x, y=y, width=width, height=height)
                 
                 # Extract text and confidence
                 text_info = item[1]
@@ -2445,12 +2861,11 @@ table tr:nth-child(even) {
                     text_content = str(text_info)
                     confidence = 0.8  # Default confidence
                 
-                # Classify region type based on content and position
-                region_type = self._classify_region(text_content, bbox)
-                
+                # Placeholder: _enhance_layout_classification assigns the
+                # final type for every region parsed here
                 region = Region(
                     coordinates=bbox,
-                    classification=region_type,
+                    classification=RegionType.PARAGRAPH,
                     confidence=confidence,
                     content=text_content
                 )
@@ -2483,20 +2898,15 @@ table tr:nth-child(even) {
         # This can be enhanced with more sophisticated ML models
         
         # Check for list patterns first (before header detection)
-        list_indicators = ['•', '-', '*', '○', '▪', '▫']
-        numbered_pattern = any(text.startswith(f'{i}.') for i in range(1, 20))
-        
-        if (any(text.startswith(indicator) for indicator in list_indicators) or
-            numbered_pattern or
-            any(f'\n{indicator}' in text for indicator in list_indicators) or
-            any(f'\n{i}.' in text for i in range(1, 20))):
+        if _LIST_MARKER_RE.search(text):
             return RegionType.LIST
         
         # Check for header patterns
         if (len(text) < 100 and 
-            (text.isupper() or 
-             any(char.isdigit() for char in text[:10]) or
-             bbox.y < 100)):  # Likely header if near top
+            (bbox.y < 100 or  # Likely header if near top
+             text.isupper() or 
+             (_HAS_DIGIT_10_RE.match(text) if text.isascii()
+              else any(char.isdigit() for char in text[:10])))):
             return RegionType.HEADER
         
         # Default to paragraph for regular text
@@ -2536,55 +2946,59 @@ table tr:nth-child(even) {
                         result = self._ocr_engine.ocr(image_path, cls=True)
                     return self._parse_ocr_result(result)
                 
-                # Extract text from specific regions
-                updated_regions = []
+                # Extract text from specific regions, feeding in-memory crops
+                # to the engine in micro-batches instead of one temp file each
                 image = cv2.imread(image_path)
+                updated_regions = list(regions)
+                pending = []
                 
-                for region in regions:
+                for region in updated_regions:
+                    x = int(region.coordinates.x)
+                    y = int(region.coordinates.y)
+                    w = int(region.coordinates.width)
+                    h = int(region.coordinates.height)
+                    
+                    cropped = image[y:y+h, x:x+w]
+                    if cropped.size == 0:
+                        logger.warning(f"Skipping empty region crop: {region.coordinates}")
+                        continue
+                    
+                    # Identical crops (repeated headers, footers, page numbers) reuse earlier OCR
+                    cache_key = self._region_crop_cache_key(cropped)
+                    cached = self._get_cached_region_text(cache_key)
+                    if cached is not None:
+                        region.content, region.confidence = cached
+                        continue
+                    pending.append((region, cropped, cache_key))
+                
+                for batch_start in range(0, len(pending), EXTRACT_TEXT_BATCH_SIZE):
+                    batch = pending[batch_start:batch_start + EXTRACT_TEXT_BATCH_SIZE]
                     try:
-                        # Crop region from image
-                        x = int(region.coordinates.x)
-                        y = int(region.coordinates.y)
-                        w = int(region.coordinates.width)
-                        h = int(region.coordinates.height)
-                        
-                        cropped = image[y:y+h, x:x+w]
-                        
-                        # Save cropped region temporarily
-                        temp_path = f"/tmp/region_{hash(str(region.coordinates))}.jpg"
-                        cv2.imwrite(temp_path, cropped)
-                        
-                        # Perform OCR on cropped region with retry
-                        if is_v3:
-                            ocr_result = list(self._ocr_engine.predict(temp_path))
-                            ocr_result = self._convert_v3_result_to_legacy(ocr_result)
-                        else:
-                            ocr_result = self._ocr_engine.ocr(temp_path, cls=True)
-                        
+                        batch_results = self._ocr_region_crops([crop for _, crop, _ in batch], is_v3)
+                    except Exception as e:
+                        logger.warning(f"Batched region OCR failed, retrying regions one by one: {e}")
+                        batch_results = []
+                        for _, crop, _ in batch:
+                            try:
+                                batch_results.extend(self._ocr_region_crops([crop], is_v3))
+                            except Exception as region_error:
+                                logger.warning(f"Failed to extract text from region: {region_error}")
+                                batch_results.append(None)
+                    
+                    for (region, _, cache_key), lines in zip(batch, batch_results):
                         # Update region with OCR result
-                        if ocr_result and ocr_result[0]:
+                        if lines:
                             text_parts = []
                             confidences = []
                             
-                            for line in ocr_result[0]:
+                            for line in lines:
                                 if len(line) >= 2:
                                     text_parts.append(line[1][0])
                                     confidences.append(line[1][1])
                             
                             region.content = ' '.join(text_parts)
                             region.confidence = sum(confidences) / len(confidences) if confidences else 0.0
-                        
-                        updated_regions.append(region)
-                        
-                        # Clean up temporary file
-                        try:
-                            os.remove(temp_path)
-                        except OSError:
-                            pass
-                            
-                    except Exception as e:
-                        logger.warning(f"Failed to extract text from region: {e}")
-                        updated_regions.append(region)
+                            self._cache_region_text(cache_key, region.content, region.confidence)
                 
                 return updated_regions
                 
@@ -2602,6 +3016,58 @@ table tr:nth-child(even) {
         except Exception as e:
             raise OCRProcessingError(f"Text extraction error: {e}")
     
+    @staticmethod
+    def _region_crop_cache_key(crop: np.ndarray) -> bytes:
+        """
+        Hash a region crop's shape and pixels for the region text cache
+        
+        Args:
+            crop: Region image as numpy array
+            
+        Returns:
+            Digest identifying the crop content
+        """
+        digest = hashlib.blake2b(str(crop.shape).encode(), digest_size=16)
+        digest.update(np.ascontiguousarray(crop).data)
+        return digest.digest()
+    
+    def _get_cached_region_text(self, cache_key: bytes) -> Optional[Tuple[str, float]]:
+        """Return cached (text, confidence) for a crop and mark it recently used"""
+        with self._region_text_cache_lock:
+            cached = self._region_text_cache.get(cache_key)
+            if cached is not None:
+                self._region_text_cache.move_to_end(cache_key)
+            return cached
+    
+    def _cache_region_text(self, cache_key: bytes, text: str, confidence: float) -> None:
+        """Store OCR output for a crop, evicting the least recently used entry when full"""
+        with self._region_text_cache_lock:
+            self._region_text_cache[cache_key] = (text, confidence)
+            self._region_text_cache.move_to_end(cache_key)
+            if len(self._region_text_cache) > REGION_TEXT_CACHE_SIZE:
+                self._region_text_cache.popitem(last=False)
+    
+    def _ocr_region_crops(self, crops: List[np.ndarray], is_v3: bool) -> List[Optional[List]]:
+        """
+        Run OCR on a batch of in-memory region crops
+        
+        Args:
+            crops: Region images as numpy arrays
+            is_v3: Whether to use the PaddleOCR 3.x predict API
+            
+        Returns:
+            Legacy-format OCR lines for each crop, in input order
+        """
+        if is_v3:
+            # predict() accepts a list of arrays and yields one result per input
+            return self._convert_v3_result_to_legacy(list(self._ocr_engine.predict(crops)))
+        
+        results = []
+        for crop in crops:
+            ocr_result = self._ocr_engine.ocr(crop, cls=True)
+            results.append(ocr_result[0] if ocr_result else None)
+        return results
+    
     def _parse_ocr_result(self, ocr_result: List) -> List[Region]:
         """
         Parse standard OCR result into Region objects
@@ -2617,22 +3083,19 @@ table tr:nth-child(even) {
         if not ocr_result or not ocr_result[0]:
             return regions
         
-        for line in ocr_result[0]:
-            if len(line) < 2:
+        lines = [line for line in ocr_result[0] if len(line) >= 2]
+        
+        # Calculate all bounding boxes in one vectorized pass
+        bounds = quad_bounds([line[0] for line in lines])
+        
+        for line, line_bounds in zip(lines, bounds):
+            if line_bounds is None:
+                logger.warning(f"Failed to parse OCR line: malformed bbox {line[0]}")
                 continue
             
             try:
-                # Extract coordinates
-                bbox_coords = line[0]
-                x_coords = [point[0] for point in bbox_coords]
-                y_coords = [point[1] for point in bbox_coords]
-                
-                bbox = BoundingBox(
-                    x=min(x_coords),
-                    y=min(y_coords),
-                    width=max(x_coords) - min(x_coords),
-                    height=max(y_coords) - min(y_coords)
-                )
+                x, y, width, height = line_bounds
+                bbox = BoundingBox(x=x, y=y, width=width, height=height)
                 
                 # Extract text and confidence
                 text_content = line[1][0]
@@ -2683,10 +3146,20 @@ table tr:nth-child(even) {
             # If no table regions identified, try to detect tables in the full image
             if not table_regions:
                 tables.extend(self._detect_tables_in_full_image(image_path))
+            elif len(table_regions) == 1:
+                # A single table: OCR just its crop
+                table_structure = self._extract_table_from_region(image, table_regions[0])
+                if table_structure:
+                    tables.append(table_structure)
             else:
-                # Process each table region
-                for region in table_regions:
-                    table_structure = self._extract_table_from_region(image, region)
+                # Several tables: OCR the whole page once and hand each
+                # region the text lines that fall inside it
+                ocr_result = self._ocr_engine.ocr(image, cls=True)
+                page_lines = ocr_result[0] if ocr_result and ocr_result[0] else []
+                region_lines = self._assign_lines_to_regions(page_lines, table_regions)
+                
+                for region, lines in zip(table_regions, region_lines):
+                    table_structure = self._build_table_structure(lines, region.coordinates)
                     if table_structure:
                         tables.append(table_structure)
             
@@ -3362,18 +3835,8 @@ table tr:nth-child(even) {
             
             cropped_table = image[y:y+h, x:x+w]
             
-            # Save cropped table temporarily
-            temp_path = f"/tmp/table_{hash(str(region.coordinates))}.jpg"
-            cv2.imwrite(temp_path, cropped_table)
-            
-            # Extract table structure
-            table_structure = self._analyze_table_structure(temp_path, region.coordinates)
-            
-            # Clean up temporary file
-            try:
-                os.remove(temp_path)
-            except OSError:
-                pass
+            # Extract table structure straight from the in-memory crop
+            table_structure = self._analyze_table_structure(cropped_table, region.coordinates)
             
             return table_structure
             
@@ -3381,12 +3844,12 @@ table tr:nth-child(even) {
             logger.warning(f"Failed to extract table from region: {e}")
             return None
     
-    def _analyze_table_structure(self, table_image_path: str, original_coords: BoundingBox) -> Optional[TableStructure]:
+    def _analyze_table_structure(self, table_image: np.ndarray, original_coords: BoundingBox) -> Optional[TableStructure]:
         """
         Analyze table structure using OCR and layout analysis
         
         Args:
-            table_image_path: Path to cropped table image
+            table_image: Cropped table image array (PaddleOCR accepts arrays directly)
             original_coords: Original coordinates of the table
             
         Returns:
@@ -3394,13 +3857,34 @@ table tr:nth-child(even) {
         """
         try:
             # Perform OCR on table image
-            ocr_result = self._ocr_engine.ocr(table_image_path, cls=True)
+            ocr_result = self._ocr_engine.ocr(table_image, cls=True)
             
             if not ocr_result or not ocr_result[0]:
                 return None
             
+            return self._build_table_structure(ocr_result[0], original_coords)
+            
+        except Exception as e:
+            logger.warning(f"Table structure analysis failed: {e}")
+            return None
+    
+    def _build_table_structure(self, ocr_lines: List, original_coords: BoundingBox) -> Optional[TableStructure]:
+        """
+        Build a table structure from the OCR text lines of one table
+        
+        Args:
+            ocr_lines: OCR lines ([bbox, (text, confidence)]) inside the table
+            original_coords: Original coordinates of the table
+            
+        Returns:
+            TableStructure object or None if no grid could be built
+        """
+        try:
+            if not ocr_lines:
+                return None
+            
             # Parse table cells from OCR result
-            cells_data = self._parse_table_cells(ocr_result[0])
+            cells_data = self._parse_table_cells(ocr_lines)
             
             if not cells_data:
                 return None
@@ -3426,7 +3910,46 @@ table tr:nth-child(even) {
             logger.warning(f"Table structure analysis failed: {e}")
             return None
     
-    def _parse_table_cells(self, ocr_result: List) -> List[Dict[str, Any]]:
+    def _assign_lines_to_regions(self, ocr_lines: List, regions: List[Region],
+                                 padding: int = 10) -> List[List]:
+        """
+        Split page-level OCR lines between table regions
+        
+        A line belongs to a region when its bounding-box centre lies inside
+        the region grown by the same padding used for table crops.
+        
+        Args:
+            ocr_lines: Page-level OCR lines ([bbox, (text, confidence)])
+            regions: Table regions
+            padding: Pixels added on every side of each region
+            
+        Returns:
+            OCR lines for each region, in region order
+        """
+        if not ocr_lines or not regions:
+            return [[] for _ in regions]
+        
+        # Line centres as (N,) arrays; malformed boxes get NaN and never match
+        bounds = np.array([b if b is not None else (np.nan,) * 4
+                           for b in quad_bounds([line[0] for line in ocr_lines])], dtype=np.float64)
+        center_x = bounds[:, 0] + bounds[:, 2] / 2
+        center_y = bounds[:, 1] + bounds[:, 3] / 2
+        
+        # Padded region rectangles as (M, 1) columns
+        rects = np.array([(r.coordinates.x, r.coordinates.y, r.coordinates.width, r.coordinates.height)
+                          for r in regions], dtype=np.float64)
+        left = rects[:, 0:1] - padding
+        top = rects[:, 1:2] - padding
+        right = rects[:, 0:1] + rects[:, 2:3] + padding
+        bottom = rects[:, 1:2] + rects[:, 3:4] + padding
+        
+        # (M, N) containment matrix in four broadcast comparisons
+        inside = (center_x >= left) & (center_x <= right) & (center_y >= top) & (center_y <= bottom)
+        
+        region_lines = [[ocr_lines[i] for i in np.flatnonzero(row).tolist()] for row in inside]
+        return region_lines
+    
+    def _parse_table_cells(self, ocr_result: List) -> List[TableCell]:
         """
         Parse OCR result to extract table cell information
         
@@ -3434,38 +3957,34 @@ table tr:nth-child(even) {
             ocr_result: OCR result from table image
             
         Returns:
-            List of cell data dictionaries
+            List of TableCell records
         """
         cells = []
+        lines = [line for line in ocr_result if len(line) >= 2]
+        
+        # Calculate all cell bounding boxes in one vectorized pass
+        bounds = quad_bounds([line[0] for line in lines])
         
-        for line in ocr_result:
-            if len(line) < 2:
+        for line, line_bounds in zip(lines, bounds):
+            if line_bounds is None:
+                logger.warning("Failed to parse table cell: bounding box is not a 4-point polygon")
                 continue
             
             try:
-                # Extract cell coordinates
-                bbox_coords = line[0]
-                x_coords = [point[0] for point in bbox_coords]
-                y_coords = [point[1] for point in bbox_coords]
-                
-                cell_bbox = BoundingBox(
-                    x=min(x_coords),
-                    y=min(y_coords),
-                    width=max(x_coords) - min(x_coords),
-                    height=max(y_coords) - min(y_coords)
-                )
+                x, y, width, height = line_bounds
+                cell_bbox = BoundingBox(x=x, y=y, width=width, height=height)
                 
                 # Extract cell content
                 text_content = line[1][0]
                 confidence = line[1][1]
                 
-                cells.append({
-                    'bbox': cell_bbox,
-                    'content': text_content.strip(),
-                    'confidence': confidence,
-                    'center_x': cell_bbox.x + cell_bbox.width / 2,
-                    'center_y': cell_bbox.y + cell_bbox.height / 2
-                })
+                cells.append(TableCell(
+                    bbox=cell_bbox,
+                    content=text_content.strip(),
+                    confidence=confidence,
+                    center_x=x + width / 2,
+                    center_y=y + height / 2
+                ))
                 
             except Exception as e:
                 logger.warning(f"Failed to parse table cell: {e}")
@@ -3473,12 +3992,12 @@ table tr:nth-child(even) {
         
         return cells
     
-    def _organize_cells_into_grid(self, cells_data: List[Dict[str, Any]]) -> List[List[str]]:
+    def _organize_cells_into_grid(self, cells_data: List[TableCell]) -> List[List[str]]:
         """
         Organize cell data into a 2D grid structure
         
         Args:
-            cells_data: List of cell data dictionaries
+            cells_data: List of TableCell records
             
         Returns:
             2D list representing table grid
@@ -3487,30 +4006,30 @@ table tr:nth-child(even) {
             return []
         
         try:
-            # Sort cells by position (top to bottom, left to right)
-            cells_data.sort(key=lambda cell: (cell['center_y'], cell['center_x']))
-            
-            # Group cells into rows based on Y coordinates
-            rows = []
-            current_row = []
-            current_y = cells_data[0]['center_y']
+            # Sort cells top to bottom (stable, so equal rows keep input order)
+            centers_y = np.fromiter((cell.center_y for cell in cells_data), dtype=np.float64,
+                                    count=len(cells_data))
+            centers_x = np.fromiter((cell.center_x for cell in cells_data), dtype=np.float64,
+                                    count=len(cells_data))
+            order = np.argsort(centers_y, kind='stable')
+            sorted_y = centers_y[order]
+            
+            # Group cells into rows: a row holds every cell within y_tolerance
+            # of its first cell, so each row boundary is one searchsorted
             y_tolerance = 20  # Pixels tolerance for same row
-            
-            for cell in cells_data:
-                if abs(cell['center_y'] - current_y) <= y_tolerance:
-                    current_row.append(cell)
-                else:
-                    if current_row:
-                        # Sort current row by X coordinate
-                        current_row.sort(key=lambda c: c['center_x'])
-                        rows.append(current_row)
-                    current_row = [cell]
-                    current_y = cell['center_y']
-            
-            # Add the last row
-            if current_row:
-                current_row.sort(key=lambda c: c['center_x'])
-                rows.append(current_row)
+            row_ids = np.empty(len(order), dtype=np.int64)
+            row_starts = []
+            start = 0
+            while start < len(order):
+                end = int(np.searchsorted(sorted_y, sorted_y[start] + y_tolerance, side='right'))
+                row_ids[order[start:end]] = len(row_starts)
+                row_starts.append(start)
+                start = end
+            
+            # One lexsort orders cells by row, then X (ties keep top-to-bottom order)
+            final_order = np.lexsort((centers_y, centers_x, row_ids))
+            rows = [[cells_data[i] for i in row_indices]
+                    for row_indices in np.split(final_order, row_starts[1:])]
             
             # Convert to string grid
             max_cols = max(len(row) for row in rows) if rows else 0
@@ -3520,7 +4039,7 @@ table tr:nth-child(even) {
                 row_data = []
                 for i in range(max_cols):
                     if i < len(row):
-                        row_data.append(row[i]['content'])
+                        row_data.append(row[i].content)
                     else:
                         row_data.append('')  # Empty cell
                 table_grid.append(row_data)
@@ -3550,6 +4069,8 @@ table tr:nth-child(even) {
             
             # Heuristics for header detection
             header_indicators = 0
+            # Consider it a header if more than half the cells show header patterns
+            threshold = len(first_row) / 2
             
             # Check if first row has different formatting patterns
             for i, cell in enumerate(first_row):
@@ -3557,18 +4078,21 @@ table tr:nth-child(even) {
                     continue
                 
                 # Headers often shorter and more descriptive
-                if len(cell) < 50 and any(char.isalpha() for char in cell):
+                if len(cell) < 50 and ALPHA_RE.search(cell):
                     header_indicators += 1
                 
                 # Compare with second row if available
                 if i < len(second_row) and second_row[i]:
                     # If first row is text and second row has numbers/data
                     if (cell.replace(' ', '').isalpha() and 
-                        any(char.isdigit() for char in second_row[i])):
+                        DIGIT_RE.search(second_row[i])):
                         header_indicators += 1
+                
+                # Indicators only grow, so stop once the answer is decided
+                if header_indicators > threshold:
+                    return True
             
-            # Consider it a header if more than half the cells show header patterns
-            return header_indicators > len(first_row) / 2
+            return False
             
         except Exception as e:
             logger.warning(f"Header detection failed: {e}")
@@ -3592,7 +4116,7 @@ table tr:nth-child(even) {
                 return []
             
             # Look for table-like patterns in OCR result
-            table_candidates = []
+            candidate_lines = []
             
             for line in ocr_result[0]:
                 if len(line) < 2:
@@ -3600,34 +4124,35 @@ table tr:nth-child(even) {
                 
                 text_content = line[1][0]
                 
-                # Simple heuristics for table detection
+                # Simple heuristics for table detection (`in` and count are
+                # single C-level scans; a regex search measured slower here)
                 if (('\t' in text_content or '|' in text_content or 
                      text_content.count(' ') > len(text_content) * 0.3) and
                     len(text_content.strip()) > 10):
                     
-                    # Extract coordinates
-                    bbox_coords = line[0]
-                    x_coords = [point[0] for point in bbox_coords]
-                    y_coords = [point[1] for point in bbox_coords]
-                    
-                    bbox = BoundingBox(
-                        x=min(x_coords),
-                        y=min(y_coords),
-                        width=max(x_coords) - min(x_coords),
-                        height=max(y_coords) - min(y_coords)
-                    )
-                    
-                    # Create simple table structure
-                    cells = [cell.strip() for cell in text_content.split() if cell.strip()]
+                    # str.split() already drops surrounding whitespace and empty cells
+                    cells = text_content.split()
                     if len(cells) >= 2:  # At least 2 columns
-                        table_structure = TableStructure(
-                            rows=1,
-                            columns=len(cells),
-                            cells=[cells],
-                            coordinates=bbox,
-                            has_headers=False
-                        )
-                        table_candidates.append(table_structure)
+                        candidate_lines.append((line[0], cells))
+            
+            # Calculate all candidate bounding boxes in one vectorized pass
+            bounds = quad_bounds([bbox_coords for bbox_coords, _ in candidate_lines])
+            
+            table_candidates = []
+            for (_, cells), line_bounds in zip(candidate_lines, bounds):
+                if line_bounds is None:
+                    continue
+                
+                x, y, width, height = line_bounds
+                
+                # Create simple table structure
+                table_candidates.append(TableStructure(
+                    rows=1,
+                    columns=len(cells),
+                    cells=[cells],
+                    coordinates=BoundingBox(x=x, y=y, width=width, height=height),
+                    has_headers=False
+                ))
             
             return table_candidates
             
@@ -3649,7 +4174,7 @@ table tr:nth-child(even) {
             logger.info(f"Parsing table item with keys: {list(table_item.keys())}")
             
             # Get bounding box if available
-            bbox = BoundingBox(0, 0, 0, 0)
+            bbox = ZERO_BBOX
             if 'bbox' in table_item:
                 box = table_item['bbox']
                 if len(box) >= 4:
@@ -3741,8 +4266,7 @@ table tr:nth-child(even) {
             
             # Normalize row lengths
             for row in table_grid:
-                while len(row) < max_cols:
-                    row.append('')
+                row.extend([''] * (max_cols - len(row)))
             
             if not table_grid:
                 return None
@@ -3751,7 +4275,7 @@ table tr:nth-child(even) {
                 rows=len(table_grid),
                 columns=max_cols,
                 cells=table_grid,
-                coordinates=BoundingBox(0, 0, 0, 0),
+                coordinates=ZERO_BBOX,
                 has_headers=True  # Assume first row is header
             )
             
@@ -3769,9 +4293,17 @@ table tr:nth-child(even) {
         Returns:
             TableStructure object or None
         """
+        if LXML_AVAILABLE:
+            try:
+                return self._parse_html_table_lxml(html_content)
+            except Exception as e:
+                logger.debug(f"lxml table parsing failed, falling back to BeautifulSoup: {e}")
+        
+        if not BS4_AVAILABLE:
+            logger.warning("BeautifulSoup not available for HTML table parsing")
+            return None
+        
         try:
-            from bs4 import BeautifulSoup
-            
             soup = BeautifulSoup(html_content, 'html.parser')
             table = soup.find('table')
             
@@ -3793,8 +4325,7 @@ table tr:nth-child(even) {
             
             # Normalize row lengths
             for row in table_grid:
-                while len(row) < max_cols:
-                    row.append('')
+                row.extend([''] * (max_cols - len(row)))
             
             # Detect headers (first row with th tags)
             has_headers = bool(rows[0].find_all('th')) if rows else False
@@ -3803,17 +4334,89 @@ table tr:nth-child(even) {
                 rows=len(table_grid),
                 columns=max_cols,
                 cells=table_grid,
-                coordinates=BoundingBox(0, 0, 0, 0),  # Will be updated with actual coordinates
+                coordinates=ZERO_BBOX,  # Will be updated with actual coordinates
                 has_headers=has_headers
             )
             
-        except ImportError:
-            logger.warning("BeautifulSoup not available for HTML table parsing")
-            return None
         except Exception as e:
             logger.warning(f"HTML table parsing failed: {e}")
             return None
     
+    def _iter_html_table_rows_lxml(self, html_content: str):
+        """
+        Stream the rows of the first HTML table with lxml iterparse
+        
+        Rows are yielded as their closing tag is seen and cleared right
+        away, so the full DOM is never held in memory. Cell text matches
+        BeautifulSoup's get_text(strip=True).
+        
+        Args:
+            html_content: HTML table content
+            
+        Yields:
+            Tuple of (cell texts, whether the row has <th> cells)
+        """
+        table_depth = 0
+        
+        events = lxml_etree.iterparse(
+            io.BytesIO(html_content.encode('utf-8')),
+            events=('start', 'end'),
+            tag=('table', 'tr'),
+            html=True,
+            encoding='utf-8'
+        )
+        
+        for event, element in events:
+            if element.tag == 'table':
+                table_depth += 1 if event == 'start' else -1
+                if table_depth == 0:
+                    # Only the first top-level table is parsed
+                    break
+                continue
+            
+            if event != 'end' or table_depth == 0:
+                continue
+            
+            cells = list(element.iter('td', 'th'))
+            yield ([''.join(text.strip() for text in cell.itertext()) for cell in cells],
+                   any(cell.tag == 'th' for cell in cells))
+            element.clear()
+    
+    def _parse_html_table_lxml(self, html_content: str) -> Optional[TableStructure]:
+        """
+        Stream-parse the first HTML table with lxml iterparse
+        
+        Args:
+            html_content: HTML table content
+            
+        Returns:
+            TableStructure object or None
+        """
+        table_grid = []
+        max_cols = 0
+        has_headers = False
+        
+        for row_data, row_has_th in self._iter_html_table_rows_lxml(html_content):
+            if not table_grid:
+                has_headers = row_has_th
+            table_grid.append(row_data)
+            max_cols = max(max_cols, len(row_data))
+        
+        if not table_grid:
+            return None
+        
+        # Normalize row lengths
+        for row in table_grid:
+            row.extend([''] * (max_cols - len(row)))
+        
+        return TableStructure(
+            rows=len(table_grid),
+            columns=max_cols,
+            cells=table_grid,
+            coordinates=ZERO_BBOX,  # Will be updated with actual coordinates
+            has_headers=has_headers
+        )
+    
     def _parse_list_table(self, table_data: List) -> Optional[TableStructure]:
         """
         Parse list-based table data
@@ -3833,22 +4436,16 @@ table tr:nth-child(even) {
             max_cols = 0
             
             for row_data in table_data:
-                if isinstance(row_data, list):
-                    row = [str(cell) for cell in row_data]
-                    table_grid.append(row)
-                    max_cols = max(max_cols, len(row))
-                elif isinstance(row_data, str):
-                    # Split string into cells
-                    row = [cell.strip() for cell in row_data.split('\t') if cell.strip()]
-                    if not row:
-                        row = [cell.strip() for cell in row_data.split() if cell.strip()]
-                    table_grid.append(row)
-                    max_cols = max(max_cols, len(row))
+                handler = ROW_HANDLERS.get(type(row_data))
+                if handler is None:
+                    continue
+                row = handler(row_data)
+                table_grid.append(row)
+                max_cols = max(max_cols, len(row))
             
             # Normalize row lengths
             for row in table_grid:
-                while len(row) < max_cols:
-                    row.append('')
+                row.extend([''] * (max_cols - len(row)))
             
             if not table_grid:
                 return None
@@ -3857,10 +4454,31 @@ table tr:nth-child(even) {
                 rows=len(table_grid),
                 columns=max_cols,
                 cells=table_grid,
-                coordinates=BoundingBox(0, 0, 0, 0),  # Will be updated with actual coordinates
+                coordinates=ZERO_BBOX,  # Will be updated with actual coordinates
                 has_headers=self._detect_table_headers(table_grid)
             )
             
         except Exception as e:
             logger.warning(f"List table parsing failed: {e}")
-            return None
\ No newline at end of file
+            return None
+
+
+# ============================================================================
+# 多进程布局分析 - 每个工作进程持有自己的 PaddleOCRService
+# ============================================================================
+_worker_ocr_service: Optional[PaddleOCRService] = None
+
+
+def _init_layout_worker(use_gpu: bool, lang: str) -> None:
+    """
+    进程池初始化函数：在工作进程内创建 OCR 服务（预测器不可跨进程序列化）
+    
+    进程以 spawn 方式启动，模块级引擎缓存为空，这里加载的是本进程自己的模型
+    """
+    global _worker_ocr_service
+    _worker_ocr_service = PaddleOCRService(use_gpu=use_gpu, lang=lang)
+
+
+def _analyze_layout_in_worker(image_path: str) -> LayoutResult:
+    """在工作进程内对单张图像执行布局分析"""
+    return _worker_ocr_service.analyze_layout(image_path)
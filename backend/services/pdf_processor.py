@@ -1,11 +1,15 @@
 """
 PDF processing service for multi-page handling and page extraction
 """
+import copy
 import io
 import logging
-from typing import Tuple, Optional, Dict, Any
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple, Optional, Dict, Any, Hashable
 from pathlib import Path
-import PyPDF2
+import numpy as np
 from PIL import Image
 import fitz  # PyMuPDF for better PDF to image conversion
 from backend.services.error_handler import error_handler, ErrorCategory
@@ -13,6 +17,40 @@ from backend.services.error_handler import error_handler, ErrorCategory
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Derived results (validation, analysis) per file version; the parsed
+# documents themselves are never kept or shared between calls
+PDF_RESULT_CACHE_SIZE = 128
+
+# Long-side cap for the page image written to disk (also shown in the editor)
+PAGE_IMAGE_MAX_DIMENSION = 2048
+
+# In-memory OCR renders only need what OCR preprocessing keeps (its 1280px
+# resize cap), but never drop below OCR_RENDER_MIN_DPI so small text stays legible
+OCR_RENDER_MAX_DIMENSION = 1280
+OCR_RENDER_MIN_DPI = 150
+
+_result_cache: "OrderedDict[Tuple[str, Hashable], Any]" = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+def _file_key(file_path: Path) -> Tuple[str, int, int]:
+    """(路径, mtime, 大小)，文件被替换后结果自动失效"""
+    stat = os.stat(file_path)
+    return (str(file_path), stat.st_mtime_ns, stat.st_size)
+
+def _get_cached_result(kind: str, file_key: Hashable) -> Optional[Any]:
+    with _result_cache_lock:
+        result = _result_cache.get((kind, file_key))
+        if result is not None:
+            _result_cache.move_to_end((kind, file_key))
+        return result
+
+def _cache_result(kind: str, file_key: Hashable, result: Any) -> None:
+    with _result_cache_lock:
+        _result_cache[(kind, file_key)] = result
+        _result_cache.move_to_end((kind, file_key))
+        while len(_result_cache) > PDF_RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+
 class PDFProcessingError(Exception):
     """Custom exception for PDF processing errors"""
     pass
@@ -20,6 +58,16 @@ class PDFProcessingError(Exception):
 class PDFProcessor:
     """Service for handling PDF documents and page extraction"""
     
+    @staticmethod
+    def _open(file_path: Path) -> fitz.Document:
+        """
+        Open a PDF with PyMuPDF for a single call
+        
+        每次调用独立打开并由调用方在 with 块中关闭：fitz.Document 不是线程安全的，
+        不能在上传请求和后台处理线程之间共享，且关闭后上传文件才能被删除（Windows）
+        """
+        return fitz.open(str(file_path), filetype="pdf")  # skip format sniffing
+    
     @classmethod
     def analyze_pdf(cls, file_path: Path) -> Dict[str, Any]:
         """
@@ -32,27 +80,16 @@ class PDFProcessor:
             Dictionary containing PDF analysis results
         """
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                page_count = len(pdf_reader.pages)
-                
-                # Get metadata if available
-                metadata = pdf_reader.metadata or {}
-                
-                return {
-                    'page_count': page_count,
-                    'is_multi_page': page_count > 1,
-                    'metadata': {
-                        'title': metadata.get('/Title', ''),
-                        'author': metadata.get('/Author', ''),
-                        'creator': metadata.get('/Creator', ''),
-                        'producer': metadata.get('/Producer', ''),
-                        'creation_date': str(metadata.get('/CreationDate', '')),
-                        'modification_date': str(metadata.get('/ModDate', ''))
-                    }
-                }
-                
+            file_key = _file_key(file_path)
+            analysis = _get_cached_result('analysis', file_key)
+            if analysis is None:
+                with cls._open(file_path) as pdf_document:
+                    analysis = cls._describe(pdf_document)
+                _cache_result('analysis', file_key, analysis)
+            
+            # Callers get their own copy, the cached dict stays unchanged
+            return copy.deepcopy(analysis)
+            
         except Exception as e:
             # Log PDF analysis error with context
             context = {
@@ -64,63 +101,106 @@ class PDFProcessor:
                                   context)
             raise PDFProcessingError(f"Failed to analyze PDF: {str(e)}")
     
+    @staticmethod
+    def _describe(pdf_document: fitz.Document) -> Dict[str, Any]:
+        """Page count and metadata of an open document"""
+        page_count = len(pdf_document)
+        
+        # Get metadata if available
+        metadata = pdf_document.metadata or {}
+        
+        return {
+            'page_count': page_count,
+            'is_multi_page': page_count > 1,
+            'metadata': {
+                'title': metadata.get('title') or '',
+                'author': metadata.get('author') or '',
+                'creator': metadata.get('creator') or '',
+                'producer': metadata.get('producer') or '',
+                'creation_date': metadata.get('creationDate') or '',
+                'modification_date': metadata.get('modDate') or ''
+            }
+        }
+    
     @classmethod
-    def extract_first_page_as_image(cls, file_path: Path, output_path: Path, dpi: int = 300) -> Tuple[bool, Optional[str]]:
+    def _render_first_page(cls, file_path: Path, dpi: int = 300,
+                           max_dimension: int = PAGE_IMAGE_MAX_DIMENSION,
+                           min_dpi: Optional[int] = None,
+                           colorspace: str = 'rgb') -> fitz.Pixmap:
         """
-        Extract the first page of PDF as an image for OCR processing
+        Render the first page of a PDF to an RGB or grayscale pixmap
+        
+        The DPI is derived from the page size so the long side lands at
+        max_dimension; min_dpi (if given) takes precedence over that cap.
         
         Args:
             file_path: Path to the PDF file
-            output_path: Path where the image should be saved
-            dpi: Resolution for image extraction
+            dpi: Highest resolution to render at
+            max_dimension: Long-side pixel cap
+            min_dpi: Lowest resolution to render at, regardless of the cap
+            colorspace: 'rgb' (3 bytes per pixel) or 'gray' (1 byte per pixel)
             
         Returns:
-            Tuple of (success, error_message)
+            Rendered fitz.Pixmap without alpha
         """
-        try:
-            # Use PyMuPDF for better image quality
-            pdf_document = fitz.open(str(file_path))
-            
+        # Use PyMuPDF for better image quality; the pixmap outlives the document
+        with cls._open(file_path) as pdf_document:
             if len(pdf_document) == 0:
-                return False, "PDF contains no pages"
+                raise PDFProcessingError("PDF contains no pages")
             
             # Get the first page
-            first_page = pdf_document[0]
+            first_page = pdf_document.load_page(0)
             
-            # 获取页面尺寸（以点为单位，72点=1英寸）
+            # 根据页面长边（以点为单位，72点=1英寸）直接算出目标 DPI
             page_rect = first_page.rect
-            page_width_inches = page_rect.width / 72
-            page_height_inches = page_rect.height / 72
+            long_side_pt = max(page_rect.width, page_rect.height)
+            effective_dpi = min(dpi, int(max_dimension * 72 / long_side_pt))
+            if min_dpi:
+                effective_dpi = max(effective_dpi, min(dpi, min_dpi))
             
-            # 计算在指定 DPI 下的图像尺寸
-            target_width = int(page_width_inches * dpi)
-            target_height = int(page_height_inches * dpi)
-            
-            # 限制最大图像尺寸为 2048 像素（性能优化）
-            # 降低此值可以显著减少 OCR 处理时间，同时保持足够的识别精度
-            max_dimension = 2048
-            if max(target_width, target_height) > max_dimension:
-                # 计算缩放比例
-                scale = max_dimension / max(target_width, target_height)
-                effective_dpi = int(dpi * scale)
-                logger.info(f"PDF page is large ({target_width}x{target_height} at {dpi} DPI), "
-                           f"reducing to {effective_dpi} DPI to fit within {max_dimension}px limit")
-            else:
-                effective_dpi = dpi
+            if effective_dpi < dpi:
+                logger.info("Rendering PDF page at %d DPI instead of %d DPI (long side cap %dpx)",
+                            effective_dpi, dpi, max_dimension)
             
             # Convert to image with effective DPI
-            mat = fitz.Matrix(effective_dpi/72, effective_dpi/72)  # 72 is default DPI
-            pix = first_page.get_pixmap(matrix=mat)
+            zoom = effective_dpi / 72  # 72 is default DPI
+            mat = fitz.Matrix(zoom, zoom)
+            pixmap_colorspace = fitz.csGRAY if colorspace == 'gray' else fitz.csRGB
+            return first_page.get_pixmap(matrix=mat, colorspace=pixmap_colorspace, alpha=False)
+    
+    @classmethod
+    def extract_first_page_as_image(cls, file_path: Path, output_path: Path, dpi: int = 300) -> Tuple[bool, Optional[str]]:
+        """
+        Extract the first page of PDF as an image for OCR processing
+        
+        The encoder follows the output suffix: .jpg/.jpeg is written as
+        JPEG (quality 90), anything else as PNG.
+        
+        Args:
+            file_path: Path to the PDF file
+            output_path: Path where the image should be saved
+            dpi: Resolution for image extraction
             
-            # Save as PNG
-            pix.save(str(output_path))
+        Returns:
+            Tuple of (success, error_message)
+        """
+        try:
+            pix = cls._render_first_page(file_path, dpi)
             
-            logger.info(f"Extracted PDF page as image: {pix.width}x{pix.height} pixels")
+            # Encode in memory and write the file in one call
+            output_path = Path(output_path)
+            if output_path.suffix.lower() in ('.jpg', '.jpeg'):
+                image_bytes = pix.tobytes('jpeg', jpg_quality=90)
+            else:
+                image_bytes = pix.tobytes('png')
+            output_path.write_bytes(image_bytes)
             
-            pdf_document.close()
+            logger.info("Extracted PDF page as image: %dx%d pixels", pix.width, pix.height)
             
             return True, None
             
+        except PDFProcessingError as e:
+            return False, str(e)
         except Exception as e:
             # Log PDF extraction error with context
             context = {
@@ -134,6 +214,67 @@ class PDFProcessor:
                                   context)
             return False, f"Failed to extract first page: {str(e)}"
     
+    @classmethod
+    def extract_first_page_as_array(cls, file_path: Path, dpi: int = 300,
+                                    colorspace: str = 'rgb') -> np.ndarray:
+        """
+        Render the first page of PDF straight to an image array for OCR
+        
+        不经过图像编码和磁盘，直接返回 OpenCV/PaddleOCR 使用的 BGR 数组；
+        分辨率按 OCR 实际需要计算（长边约 OCR_RENDER_MAX_DIMENSION，
+        不低于 OCR_RENDER_MIN_DPI）。colorspace='gray' 时由 MuPDF 直接
+        渲染单通道灰度图，像素数据只有 RGB 的三分之一
+        
+        Args:
+            file_path: Path to the PDF file
+            dpi: Resolution for image extraction
+            colorspace: 'rgb' for a BGR array, 'gray' for a single-channel array
+            
+        Returns:
+            BGR uint8 array of shape (height, width, 3), or a uint8 array of
+            shape (height, width) for colorspace='gray'
+        """
+        if colorspace not in ('rgb', 'gray'):
+            raise ValueError(f"Unsupported colorspace: {colorspace}")
+        
+        try:
+            pix = cls._render_first_page(file_path, dpi, OCR_RENDER_MAX_DIMENSION,
+                                         OCR_RENDER_MIN_DPI, colorspace)
+        except PDFProcessingError:
+            raise
+        except Exception as e:
+            raise PDFProcessingError(f"Failed to extract first page: {str(e)}")
+        
+        if colorspace == 'gray':
+            return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width).copy()
+        
+        rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        return np.ascontiguousarray(rgb[..., 2::-1])
+    
+    @classmethod
+    def extract_first_page_as_pil(cls, file_path: Path, dpi: int = 300) -> Image.Image:
+        """
+        Render the first page of PDF straight to a PIL image
+        
+        与 extract_first_page_as_image 使用相同的分辨率，但不经过 PNG
+        编码和磁盘，直接在渲染得到的 RGB 像素上构建图像
+        
+        Args:
+            file_path: Path to the PDF file
+            dpi: Resolution for image extraction
+            
+        Returns:
+            RGB PIL image
+        """
+        try:
+            pix = cls._render_first_page(file_path, dpi)
+        except PDFProcessingError:
+            raise
+        except Exception as e:
+            raise PDFProcessingError(f"Failed to extract first page: {str(e)}")
+        
+        return Image.frombuffer("RGB", (pix.width, pix.height), pix.samples, "raw", "RGB", 0, 1)
+    
     @classmethod
     def get_processing_notification(cls, page_count: int) -> Optional[str]:
         """
@@ -171,27 +312,37 @@ class PDFProcessor:
             'mixed': 混合型 PDF - 部分页面有文本，部分是图像
         """
         try:
-            doc = fitz.open(str(file_path))
+            # 同一版本的文件只检测一次（阈值不同则分别缓存）
+            file_key = _file_key(file_path)
+            cache_kind = f'type:{min_text_length}'
+            pdf_type = _get_cached_result(cache_kind, file_key)
+            if pdf_type is not None:
+                return pdf_type
+            
             text_pages = 0
             image_pages = 0
             page_details = []
             
-            # 只检查前 5 页或全部页面（取较小值）
-            pages_to_check = min(5, len(doc))
-            
-            for page_num in range(pages_to_check):
-                page = doc[page_num]
-                text = page.get_text().strip()
-                text_len = len(text)
+            with cls._open(file_path) as doc:
+                # 只检查前 5 页或全部页面（取较小值）
+                pages_to_check = min(5, len(doc))
                 
-                if text_len >= min_text_length:
-                    text_pages += 1
-                    page_details.append(f"P{page_num+1}:text({text_len}字符)")
-                else:
-                    image_pages += 1
-                    page_details.append(f"P{page_num+1}:image({text_len}字符)")
-            
-            doc.close()
+                for page_num in range(pages_to_check):
+                    page = doc[page_num]
+                    text = page.get_text().strip()
+                    text_len = len(text)
+                    
+                    if text_len >= min_text_length:
+                        text_pages += 1
+                        page_details.append((page_num + 1, 'text', text_len))
+                    else:
+                        image_pages += 1
+                        page_details.append((page_num + 1, 'image', text_len))
+                    
+                    # 文本页和图像页都已出现，结果必为混合型，无需再提取后续页面
+                    if text_pages and image_pages:
+                        pages_to_check = page_num + 1
+                        break
             
             # 判断类型
             if text_pages == pages_to_check:
@@ -201,11 +352,11 @@ class PDFProcessor:
             else:
                 pdf_type = 'mixed'
             
-            # 记录日志
-            logger.info(f"PDF 类型检测: {pdf_type} | "
-                       f"检查页数: {pages_to_check} | "
-                       f"文本页: {text_pages}, 图像页: {image_pages} | "
-                       f"详情: {', '.join(page_details)}")
+            # 记录日志（详情字符串仅在 INFO 级别开启时拼接）
+            if logger.isEnabledFor(logging.INFO):
+                details = ', '.join(f"P{num}:{kind}({length}字符)" for num, kind, length in page_details)
+                logger.info("PDF 类型检测: %s | 检查页数: %d | 文本页: %d, 图像页: %d | 详情: %s",
+                            pdf_type, pages_to_check, text_pages, image_pages, details)
             
             # TODO: 后续优化 - 根据类型分流处理
             # if pdf_type == 'text':
@@ -215,12 +366,33 @@ class PDFProcessor:
             #     # 图像型/混合型 PDF 需要 OCR 处理
             #     pass
             
+            _cache_result(cache_kind, file_key, pdf_type)
             return pdf_type
             
         except Exception as e:
             logger.warning(f"PDF 类型检测失败: {e}，默认按图像型处理")
             return 'image'
     
+    @staticmethod
+    def _check_structure(pdf_document: fitz.Document) -> Tuple[bool, Optional[str]]:
+        """Structural checks of an open document, returns (is_valid, error_message)"""
+        # Check if PDF is encrypted
+        if pdf_document.is_encrypted:
+            return False, "Encrypted PDFs are not supported. Please provide an unencrypted PDF."
+        
+        # Check if PDF has pages
+        if len(pdf_document) == 0:
+            return False, "PDF contains no pages"
+        
+        # Touch the first page's structure (page object, media box and
+        # content stream references) without decoding any text
+        first_page = pdf_document.load_page(0)
+        if first_page.rect.is_empty:
+            return False, "PDF first page has an empty page area"
+        _ = first_page.get_contents()  # This will fail if the page tree is corrupted
+        
+        return True, None
+    
     @classmethod
     def validate_pdf_structure(cls, file_path: Path) -> Tuple[bool, Optional[str]]:
         """
@@ -233,24 +405,20 @@ class PDFProcessor:
             Tuple of (is_valid, error_message)
         """
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Check if PDF is encrypted
-                if pdf_reader.is_encrypted:
-                    return False, "Encrypted PDFs are not supported. Please provide an unencrypted PDF."
-                
-                # Check if PDF has pages
-                if len(pdf_reader.pages) == 0:
-                    return False, "PDF contains no pages"
-                
-                # Try to access the first page to ensure it's readable
-                first_page = pdf_reader.pages[0]
-                _ = first_page.extract_text()  # This will fail if page is corrupted
-                
-                return True, None
-                
-        except PyPDF2.errors.PdfReadError as e:
+            file_key = _file_key(file_path)
+            result = _get_cached_result('validation', file_key)
+            if result is None:
+                with cls._open(file_path) as pdf_document:
+                    result = cls._check_structure(pdf_document)
+                    # The upload route analyzes right after validating;
+                    # describe the document while it is open
+                    if result[0]:
+                        _cache_result('analysis', file_key, cls._describe(pdf_document))
+                _cache_result('validation', file_key, result)
+            
+            return result
+            
+        except fitz.FileDataError as e:
             # Log PDF read error with context
             context = {
                 'file_path': str(file_path),
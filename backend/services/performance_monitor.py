@@ -6,12 +6,13 @@ import logging
 import time
 import os
 import threading
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from pathlib import Path
 from functools import wraps
 import traceback
+import itertools
+from collections import Counter, deque
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,12 @@ except ImportError:
     PSUTIL_AVAILABLE = False
     logger.warning("psutil not available, memory monitoring will be limited")
 
+try:
+    import fitz  # PyMuPDF: its MuPDF store caches decoded images and fonts
+    FITZ_AVAILABLE = True
+except ImportError:
+    FITZ_AVAILABLE = False
+
 @dataclass
 class PerformanceMetrics:
     """Performance metrics for a processing operation"""
@@ -35,6 +42,7 @@ class PerformanceMetrics:
     success: bool = True
     error_message: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    start_time_ns: Optional[int] = None  # time.monotonic_ns() at start, used for duration
 
 class PerformanceMonitor:
     """
@@ -43,13 +51,23 @@ class PerformanceMonitor:
     
     def __init__(self):
         """Initialize the performance monitor"""
-        self.metrics_history: List[PerformanceMetrics] = []
+        # Bounded history: appending past maxlen evicts the oldest entry
+        self.metrics_history: Deque[PerformanceMetrics] = deque(maxlen=1000)
+        # operation_id -> metrics for entries still in metrics_history
+        self._history_index: Dict[str, PerformanceMetrics] = {}
+        self._reset_summary_totals()
         self.active_operations: Dict[str, PerformanceMetrics] = {}
         self.max_processing_time = 30.0  # 30 seconds max processing time
         self.memory_limit_mb = 4096  # 4GB memory limit
         self.temp_file_limit = 100  # Max 100 temp files
         self.temp_files: List[str] = []
+        # Guards active_operations, metrics_history and the summary totals
         self.lock = threading.Lock()
+        # Temp-file bookkeeping (and its file I/O) never blocks operation tracking
+        self._temp_files_lock = threading.Lock()
+        self._operation_counter = itertools.count()
+        # Reused for RSS sampling instead of constructing a Process per call
+        self._process = psutil.Process() if PSUTIL_AVAILABLE else None
         
         # Performance thresholds
         self.performance_thresholds = {
@@ -70,24 +88,26 @@ class PerformanceMonitor:
         Returns:
             Operation ID
         """
-        operation_id = f"{operation_name}_{int(time.time() * 1000)}"
+        start_time_ns = time.monotonic_ns()
+        # The counter keeps ids unique even when operations start in the same tick
+        operation_id = f"{operation_name}_{start_time_ns}_{next(self._operation_counter)}"
+        
+        metrics = PerformanceMetrics(
+            operation_name=operation_name,
+            start_time=time.time(),
+            metadata=metadata or {},
+            start_time_ns=start_time_ns
+        )
+        
+        # Record initial memory usage if psutil is available (outside the lock)
+        if self._process is not None:
+            metrics.memory_usage_mb = self._current_rss_mb()
+            metrics.peak_memory_mb = metrics.memory_usage_mb
         
         with self.lock:
-            metrics = PerformanceMetrics(
-                operation_name=operation_name,
-                start_time=time.time(),
-                metadata=metadata or {}
-            )
-            
-            # Record initial memory usage if psutil is available
-            if PSUTIL_AVAILABLE:
-                process = psutil.Process()
-                metrics.memory_usage_mb = process.memory_info().rss / 1024 / 1024
-                metrics.peak_memory_mb = metrics.memory_usage_mb
-            
             self.active_operations[operation_id] = metrics
         
-        logger.info(f"Started operation: {operation_name} (ID: {operation_id})")
+        logger.info("Started operation: %s (ID: %s)", operation_name, operation_id)
         return operation_id
     
     def end_operation(self, operation_id: str, success: bool = True, 
@@ -103,38 +123,41 @@ class PerformanceMonitor:
         Returns:
             PerformanceMetrics object or None if operation not found
         """
+        end_time_ns = time.monotonic_ns()
+        end_time = time.time()
+        
+        # Record final memory usage if psutil is available (outside the lock)
+        end_memory_mb = self._current_rss_mb() if self._process is not None else None
+        
         with self.lock:
             if operation_id not in self.active_operations:
                 logger.warning(f"Operation {operation_id} not found in active operations")
                 return None
             
             metrics = self.active_operations.pop(operation_id)
-            metrics.end_time = time.time()
-            metrics.duration = metrics.end_time - metrics.start_time
+            metrics.end_time = end_time
+            # Monotonic clock: unaffected by wall-clock (NTP) adjustments
+            if metrics.start_time_ns is not None:
+                metrics.duration = (end_time_ns - metrics.start_time_ns) / 1e9
+            else:
+                metrics.duration = metrics.end_time - metrics.start_time
             metrics.success = success
             metrics.error_message = error_message
-            
-            # Record final memory usage if psutil is available
-            if PSUTIL_AVAILABLE:
-                process = psutil.Process()
-                metrics.memory_usage_mb = process.memory_info().rss / 1024 / 1024
+            if end_memory_mb is not None:
+                metrics.memory_usage_mb = end_memory_mb
             
             # Check performance thresholds
             self._check_performance_thresholds(metrics)
             
             # Store in history
-            self.metrics_history.append(metrics)
-            
-            # Limit history size
-            if len(self.metrics_history) > 1000:
-                self.metrics_history = self.metrics_history[-500:]
-            
-            logger.info(
-                f"Completed operation: {metrics.operation_name} "
-                f"(ID: {operation_id}) in {metrics.duration:.2f}s"
-            )
-            
-            return metrics
+            self._append_history(operation_id, metrics)
+        
+        logger.info(
+            "Completed operation: %s (ID: %s) in %.2fs",
+            metrics.operation_name, operation_id, metrics.duration
+        )
+        
+        return metrics
     
     def track_operation(self, operation_name: str):
         """
@@ -176,11 +199,7 @@ class PerformanceMonitor:
                 return self.active_operations[operation_id]
             
             # Check history
-            for metrics in reversed(self.metrics_history):
-                if f"{metrics.operation_name}_{int(metrics.start_time * 1000)}" == operation_id:
-                    return metrics
-            
-            return None
+            return self._history_index.get(operation_id)
     
     def get_performance_summary(self) -> Dict[str, Any]:
         """
@@ -201,30 +220,81 @@ class PerformanceMonitor:
                     'peak_memory_mb': 0.0
                 }
             
-            successful_ops = [m for m in self.metrics_history if m.success]
-            failed_ops = [m for m in self.metrics_history if not m.success]
-            
-            durations = [m.duration for m in self.metrics_history if m.duration]
-            memory_usage = [m.peak_memory_mb for m in self.metrics_history if m.peak_memory_mb]
+            # 汇总值在写入/淘汰历史记录时增量维护，这里只做 O(1) 读取
+            total = len(self.metrics_history)
             
             return {
-                'total_operations': len(self.metrics_history),
-                'successful_operations': len(successful_ops),
-                'failed_operations': len(failed_ops),
-                'average_duration': sum(durations) / len(durations) if durations else 0.0,
-                'max_duration': max(durations) if durations else 0.0,
-                'average_memory_mb': sum(memory_usage) / len(memory_usage) if memory_usage else 0.0,
-                'peak_memory_mb': max(memory_usage) if memory_usage else 0.0,
+                'total_operations': total,
+                'successful_operations': self._success_count,
+                'failed_operations': total - self._success_count,
+                'average_duration': self._duration_sum / self._duration_count if self._duration_count else 0.0,
+                'max_duration': self._max_duration,
+                'average_memory_mb': self._memory_sum / self._memory_count if self._memory_count else 0.0,
+                'peak_memory_mb': self._max_memory,
                 'operations_by_type': self._get_operations_by_type()
             }
     
     def _get_operations_by_type(self) -> Dict[str, int]:
         """Get count of operations by type"""
-        operation_counts = {}
-        for metrics in self.metrics_history:
-            op_type = metrics.operation_name
-            operation_counts[op_type] = operation_counts.get(op_type, 0) + 1
-        return operation_counts
+        return dict(self._operation_counts)
+    
+    def _reset_summary_totals(self):
+        """Reset the running aggregates behind get_performance_summary"""
+        self._success_count = 0
+        self._duration_sum = 0.0
+        self._duration_count = 0
+        self._max_duration = 0.0
+        self._memory_sum = 0.0
+        self._memory_count = 0
+        self._max_memory = 0.0
+        self._operation_counts: Counter = Counter()
+    
+    def _append_history(self, operation_id: str, metrics: PerformanceMetrics):
+        """
+        Append completed metrics to history, keeping the index and summary
+        aggregates in step with the entry the bounded deque evicts
+        
+        Must be called with self.lock held.
+        """
+        history = self.metrics_history
+        evicted = history[0] if len(history) == history.maxlen else None
+        history.append(metrics)
+        
+        self._history_index[operation_id] = metrics
+        self._success_count += metrics.success
+        self._operation_counts[metrics.operation_name] += 1
+        if metrics.duration:
+            self._duration_sum += metrics.duration
+            self._duration_count += 1
+            self._max_duration = max(self._max_duration, metrics.duration)
+        if metrics.peak_memory_mb:
+            self._memory_sum += metrics.peak_memory_mb
+            self._memory_count += 1
+            self._max_memory = max(self._max_memory, metrics.peak_memory_mb)
+        
+        if evicted is None:
+            return
+        
+        # Index keys are in history order, so the evicted entry is the oldest key
+        oldest_id = next(iter(self._history_index))
+        if self._history_index[oldest_id] is evicted:
+            del self._history_index[oldest_id]
+        
+        self._success_count -= evicted.success
+        self._operation_counts[evicted.operation_name] -= 1
+        if not self._operation_counts[evicted.operation_name]:
+            del self._operation_counts[evicted.operation_name]
+        if evicted.duration:
+            self._duration_sum -= evicted.duration
+            self._duration_count -= 1
+            # Only rescan when the evicted entry held the maximum
+            if evicted.duration == self._max_duration:
+                self._max_duration = max((m.duration for m in history if m.duration), default=0.0)
+        if evicted.peak_memory_mb:
+            self._memory_sum -= evicted.peak_memory_mb
+            self._memory_count -= 1
+            if evicted.peak_memory_mb == self._max_memory:
+                self._max_memory = max((m.peak_memory_mb for m in history if m.peak_memory_mb), default=0.0)
     
     def _check_performance_thresholds(self, metrics: PerformanceMetrics):
         """
@@ -257,6 +327,17 @@ class PerformanceMonitor:
                 f"(exceeds {self.performance_thresholds['warning_memory_mb']}MB threshold)"
             )
     
+    def _memory_info(self):
+        """psutil memory_info() of this process"""
+        # The global monitor is created at import time; re-bind after a fork
+        if self._process.pid != os.getpid():
+            self._process = psutil.Process()
+        return self._process.memory_info()
+    
+    def _current_rss_mb(self) -> float:
+        """Current resident set size of this process in MB"""
+        return self._memory_info().rss / 1024 / 1024
+    
     def check_memory_usage(self) -> Dict[str, Any]:
         """
         Check current memory usage
@@ -265,9 +346,8 @@ class PerformanceMonitor:
             Dictionary with memory usage information
         """
         try:
-            if PSUTIL_AVAILABLE:
-                process = psutil.Process()
-                memory_info = process.memory_info()
+            if self._process is not None:
+                memory_info = self._memory_info()
                 
                 rss_mb = memory_info.rss / 1024 / 1024
                 vms_mb = memory_info.vms / 1024 / 1024
@@ -326,13 +406,14 @@ class PerformanceMonitor:
         Args:
             file_path: Path to temporary file
         """
-        with self.lock:
+        with self._temp_files_lock:
             self.temp_files.append(file_path)
-            
-            # Check temp file limit
-            if len(self.temp_files) > self.temp_file_limit:
-                logger.warning(f"Temp file limit exceeded: {len(self.temp_files)} files")
-                self.cleanup_temp_files(force=True)
+            temp_file_count = len(self.temp_files)
+        
+        # Check temp file limit (cleanup takes the lock itself)
+        if temp_file_count > self.temp_file_limit:
+            logger.warning(f"Temp file limit exceeded: {temp_file_count} files")
+            self.cleanup_temp_files(force=True)
     
     def cleanup_temp_files(self, force: bool = False):
         """
@@ -341,24 +422,22 @@ class PerformanceMonitor:
         Args:
             force: Force cleanup of all temp files
         """
-        with self.lock:
-            files_to_remove = self.temp_files.copy() if force else self.temp_files
+        with self._temp_files_lock:
+            failed_files = []
             
-            for file_path in files_to_remove:
+            # One unlink per file; a missing file counts as already removed
+            for file_path in self.temp_files:
                 try:
-                    path = Path(file_path)
-                    if path.exists():
-                        path.unlink()
-                        logger.debug(f"Removed temp file: {file_path}")
-                except Exception as e:
+                    os.unlink(file_path)
+                    logger.debug("Removed temp file: %s", file_path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
                     logger.warning(f"Failed to remove temp file {file_path}: {e}")
+                    failed_files.append(file_path)
             
-            # Clear the list
-            if force:
-                self.temp_files.clear()
-            else:
-                # Keep only files that couldn't be removed
-                self.temp_files = [f for f in self.temp_files if Path(f).exists()]
+            # Clear the list, or keep only files that couldn't be removed
+            self.temp_files = [] if force else failed_files
     
     def trigger_cleanup(self):
         """Trigger cleanup of resources"""
@@ -371,17 +450,23 @@ class PerformanceMonitor:
         import gc
         gc.collect()
         
+        # Empty MuPDF's resource store; it refills on the next render
+        if FITZ_AVAILABLE:
+            fitz.TOOLS.store_shrink(100)
+        
         logger.info("Resource cleanup completed")
     
     def get_temp_file_count(self) -> int:
         """Get count of registered temporary files"""
-        with self.lock:
+        with self._temp_files_lock:
             return len(self.temp_files)
     
     def reset_metrics(self):
         """Reset all metrics and history"""
         with self.lock:
             self.metrics_history.clear()
+            self._history_index.clear()
+            self._reset_summary_totals()
             self.active_operations.clear()
             logger.info("Performance metrics reset")
 
@@ -2,17 +2,78 @@
 RAG Service - 检索增强生成服务
 整合 Embedding、VectorStore 和 TextChunker，提供文档索引和检索功能
 """
+import copy
+import hashlib
+import json
 import logging
+import threading
 import time
-from typing import List, Dict, Optional, Any
-from dataclasses import dataclass
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Callable, Hashable, Tuple
+from dataclasses import dataclass, replace
 
 from backend.services.embedding_service import EmbeddingService, get_embedding_service
+from backend.services.embedding_cache import EmbeddingCache, get_embedding_cache
 from backend.services.vector_store import VectorStore, get_vector_store, QueryResult
 from backend.services.text_chunker import TextChunker, TextChunk
 
 logger = logging.getLogger(__name__)
 
+# 检索结果缓存：多轮对话中同一问题的重复检索直接复用
+RETRIEVAL_CACHE_SIZE = 256
+RETRIEVAL_CACHE_TTL = 300.0  # 秒
+# 查询向量缓存：不同 top_k / 过滤条件下的同一问题也无需重新编码
+QUERY_EMBEDDING_CACHE_SIZE = 1024
+# 索引状态缓存上限，淘汰的条目由 get_index_status 从向量库重建
+INDEX_STATUS_CACHE_SIZE = 4096
+
+
+class _LRUCache:
+    """线程安全的有界 LRU 缓存，可选按条目过期（TTL）"""
+    
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if self.ttl is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return entry[1] if entry is not None else None
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
 
 @dataclass
 class RetrievalResult:
@@ -34,23 +95,26 @@ class RetrievalResult:
         """
         获取合并后的上下文文本
         
+        分隔符也计入长度，返回的上下文不会超过 max_length
+        
         Args:
             max_length: 最大长度
             
         Returns:
             str: 合并的上下文
         """
+        separator = "\n\n"
         context_parts = []
-        current_length = 0
+        current_length = -len(separator)  # 第一段前没有分隔符
         
         for chunk in self.chunks:
             text = chunk.get("document", "")
-            if current_length + len(text) > max_length:
+            current_length += len(separator) + len(text)
+            if current_length > max_length:
                 break
             context_parts.append(text)
-            current_length += len(text)
         
-        return "\n\n".join(context_parts)
+        return separator.join(context_parts)
 
 
 @dataclass
@@ -88,7 +152,8 @@ class RAGService:
         vector_store: VectorStore = None,
         chunk_size: int = None,
         chunk_overlap: int = None,
-        top_k: int = None
+        top_k: int = None,
+        embedding_cache: EmbeddingCache = None
     ):
         """
         初始化 RAG 服务
@@ -99,6 +164,7 @@ class RAGService:
             chunk_size: 分块大小
             chunk_overlap: 分块重叠
             top_k: 默认检索数量
+            embedding_cache: 文档向量缓存，默认按配置启用
         """
         self.embedding_service = embedding_service or get_embedding_service()
         self.vector_store = vector_store or get_vector_store()
@@ -109,13 +175,24 @@ class RAGService:
         self.chunk_overlap = chunk_overlap or ChatOCRConfig.CHUNK_OVERLAP
         self.top_k = top_k or ChatOCRConfig.RAG_TOP_K
         
+        if embedding_cache is None and ChatOCRConfig.ENABLE_EMBEDDING_CACHE:
+            try:
+                embedding_cache = get_embedding_cache()
+            except Exception as e:
+                logger.warning(f"Embedding cache unavailable, encoding without cache: {e}")
+        self.embedding_cache = embedding_cache
+        
         self.chunker = TextChunker(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap
         )
         
         # 索引状态缓存
-        self._index_status: Dict[str, IndexStatus] = {}
+        self._index_status = _LRUCache(INDEX_STATUS_CACHE_SIZE)
+        
+        # 检索缓存，键以 job_id 开头，重新索引/删除索引时按 job 失效
+        self._retrieval_cache = _LRUCache(RETRIEVAL_CACHE_SIZE, ttl=RETRIEVAL_CACHE_TTL)
+        self._query_embedding_cache = _LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
         
         logger.info("RAGService initialized")
     
@@ -123,6 +200,122 @@ class RAGService:
         """生成集合名称"""
         return f"doc_{job_id}"
     
+    def _invalidate_retrieval_cache(self, job_id: str) -> None:
+        """丢弃某个 job 的检索缓存（索引内容变化后调用）"""
+        self._retrieval_cache.discard_where(lambda key: key[0] == job_id)
+    
+    def _encode_query(self, query: str) -> List[float]:
+        """生成查询向量，同一模型下相同问题只编码一次"""
+        key = (self.embedding_service.model_name, query)
+        query_embedding = self._query_embedding_cache.get(key)
+        if query_embedding is None:
+            query_embedding = self.embedding_service.encode_query(query)
+            self._query_embedding_cache.put(key, query_embedding)
+        return query_embedding
+    
+    def _encode_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        生成文档向量，已缓存的分块直接复用，只对未命中的分块调用模型
+        
+        Args:
+            texts: 分块文本列表
+            
+        Returns:
+            List[List[float]]: 与 texts 一一对应的向量
+        """
+        if self.embedding_cache is None:
+            return self.embedding_service.encode_documents(texts)
+        
+        model_name = self.embedding_service.model_name
+        keys = [self.embedding_cache.make_key(model_name, text) for text in texts]
+        embeddings = self.embedding_cache.get_many(keys)
+        
+        miss_indices = [i for i, vector in enumerate(embeddings) if vector is None]
+        if miss_indices:
+            encoded = self.embedding_service.encode_documents([texts[i] for i in miss_indices])
+            for i, vector in zip(miss_indices, encoded):
+                embeddings[i] = vector
+            self.embedding_cache.set_many([(keys[i], embeddings[i]) for i in miss_indices])
+        
+        logger.debug(f"Embedding cache: {len(texts) - len(miss_indices)}/{len(texts)} chunks reused")
+        return embeddings
+    
+    @staticmethod
+    def _make_chunk_ids(job_id: str, texts: List[str]) -> List[str]:
+        """
+        按分块内容生成 ID，内容不变的分块重新索引时 ID 不变
+        
+        同一文档中重复出现的相同文本追加序号，保证 ID 唯一
+        """
+        ids = []
+        seen: Dict[str, int] = {}
+        for text in texts:
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+            occurrence = seen.get(digest, 0)
+            seen[digest] = occurrence + 1
+            ids.append(f"{job_id}_{digest}" if occurrence == 0 else f"{job_id}_{digest}_{occurrence}")
+        return ids
+    
+    def _store_chunks(
+        self,
+        job_id: str,
+        collection_name: str,
+        texts: List[str],
+        metadatas: List[Dict]
+    ) -> bool:
+        """
+        将分块同步到向量库
+        
+        与集合中已有的分块按内容 ID 比对：新增的分块编码后写入，
+        不再出现的分块删除，未变化的分块只在元数据变化时整体替换元数据，不重新编码
+        
+        Args:
+            job_id: 任务ID
+            collection_name: 集合名称
+            texts: 分块文本列表
+            metadatas: 分块元数据列表
+            
+        Returns:
+            bool: 是否成功
+        """
+        ids = self._make_chunk_ids(job_id, texts)
+        existing = self.vector_store.get_document_metadatas(collection_name)
+        if existing is None:
+            logger.error(f"Reindex {job_id}: cannot read existing chunks from {collection_name}")
+            return False
+        
+        new_indices = [i for i, doc_id in enumerate(ids) if doc_id not in existing]
+        changed_indices = [
+            i for i, doc_id in enumerate(ids)
+            if doc_id in existing and existing[doc_id] != metadatas[i]
+        ]
+        stale_ids = list(existing.keys() - set(ids))
+        
+        logger.debug(
+            f"Reindex {job_id}: {len(new_indices)} new, {len(changed_indices)} updated, "
+            f"{len(stale_ids)} removed, {len(ids) - len(new_indices)} kept"
+        )
+        
+        if new_indices:
+            new_texts = [texts[i] for i in new_indices]
+            if not self.vector_store.add_documents(
+                collection_name=collection_name,
+                documents=new_texts,
+                embeddings=self._encode_documents(new_texts),
+                metadatas=[metadatas[i] for i in new_indices],
+                ids=[ids[i] for i in new_indices]
+            ):
+                return False
+        
+        if not self.vector_store.replace_metadatas(
+            collection_name,
+            [ids[i] for i in changed_indices],
+            [metadatas[i] for i in changed_indices]
+        ):
+            return False
+        
+        return self.vector_store.delete_documents(collection_name, stale_ids)
+    
     def index_document(
         self,
         job_id: str,
@@ -155,32 +348,18 @@ class RAGService:
                     chunk_count=0,
                     error="No valid text chunks"
                 )
-                self._index_status[job_id] = status
+                self._index_status.put(job_id, status)
                 return status
             
             # 提取文本和元数据
             texts = self.chunker.get_chunk_texts(chunks)
-            metadatas = self.chunker.get_chunk_metadatas(chunks)
-            
-            # 添加额外元数据
-            if metadata:
-                for m in metadatas:
-                    m.update(metadata)
-            
-            # 生成向量
-            embeddings = self.embedding_service.encode_documents(texts)
+            # 额外元数据在构建每个分块元数据时一并写入
+            metadatas = self.chunker.get_chunk_metadatas(chunks, extra_metadata=metadata)
             
-            # 生成 ID
-            ids = [f"{job_id}_chunk_{i}" for i in range(len(texts))]
-            
-            # 存入向量库
-            success = self.vector_store.add_documents(
-                collection_name=collection_name,
-                documents=texts,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
-            )
+            # 存入向量库（只写入新增分块，删除已不存在的分块）
+            success = self._store_chunks(job_id, collection_name, texts, metadatas)
+            # 索引内容已变化，旧的检索结果不再有效
+            self._invalidate_retrieval_cache(job_id)
             
             index_time = time.time() - start_time
             
@@ -200,7 +379,7 @@ class RAGService:
                     error="Failed to store vectors"
                 )
             
-            self._index_status[job_id] = status
+            self._index_status.put(job_id, status)
             return status
             
         except Exception as e:
@@ -211,7 +390,7 @@ class RAGService:
                 chunk_count=0,
                 error=str(e)
             )
-            self._index_status[job_id] = status
+            self._index_status.put(job_id, status)
             return status
     
     def index_pages(
@@ -247,27 +426,17 @@ class RAGService:
                     chunk_count=0,
                     error="No valid text chunks from pages"
                 )
-                self._index_status[job_id] = status
+                self._index_status.put(job_id, status)
                 return status
             
             # 提取文本和元数据
             texts = self.chunker.get_chunk_texts(all_chunks)
             metadatas = self.chunker.get_chunk_metadatas(all_chunks)
             
-            # 生成向量
-            embeddings = self.embedding_service.encode_documents(texts)
-            
-            # 生成 ID
-            ids = [f"{job_id}_chunk_{i}" for i in range(len(texts))]
-            
-            # 存入向量库
-            success = self.vector_store.add_documents(
-                collection_name=collection_name,
-                documents=texts,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
-            )
+            # 存入向量库（只写入新增分块，删除已不存在的分块）
+            success = self._store_chunks(job_id, collection_name, texts, metadatas)
+            # 索引内容已变化，旧的检索结果不再有效
+            self._invalidate_retrieval_cache(job_id)
             
             index_time = time.time() - start_time
             
@@ -287,7 +456,7 @@ class RAGService:
                     error="Failed to store vectors"
                 )
             
-            self._index_status[job_id] = status
+            self._index_status.put(job_id, status)
             return status
             
         except Exception as e:
@@ -298,7 +467,7 @@ class RAGService:
                 chunk_count=0,
                 error=str(e)
             )
-            self._index_status[job_id] = status
+            self._index_status.put(job_id, status)
             return status
     
     def retrieve(
@@ -324,6 +493,19 @@ class RAGService:
         top_k = top_k or self.top_k
         collection_name = self._get_collection_name(job_id)
         
+        cache_key = (
+            job_id, query, top_k,
+            json.dumps(filter_metadata, sort_keys=True, default=str) if filter_metadata else None
+        )
+        cached = self._retrieval_cache.get(cache_key)
+        if cached is not None:
+            # 返回副本，调用方修改结果不会污染缓存
+            return replace(
+                cached,
+                chunks=copy.deepcopy(cached.chunks),
+                processing_time=time.time() - start_time
+            )
+        
         try:
             # 检查索引是否存在
             if not self.vector_store.collection_exists(collection_name):
@@ -336,7 +518,7 @@ class RAGService:
                 )
             
             # 生成查询向量
-            query_embedding = self.embedding_service.encode_query(query)
+            query_embedding = self._encode_query(query)
             
             # 执行检索
             results = self.vector_store.query(
@@ -353,12 +535,14 @@ class RAGService:
             
             logger.debug(f"Retrieved {len(chunks)} chunks for query in {processing_time:.3f}s")
             
-            return RetrievalResult(
+            result = RetrievalResult(
                 query=query,
                 chunks=chunks,
                 total_found=len(chunks),
                 processing_time=processing_time
             )
+            self._retrieval_cache.put(cache_key, replace(result, chunks=copy.deepcopy(chunks)))
+            return result
             
         except Exception as e:
             logger.error(f"Retrieval failed for job {job_id}: {e}")
@@ -369,6 +553,43 @@ class RAGService:
                 processing_time=time.time() - start_time
             )
     
+    def retrieve_many(
+        self,
+        job_id: str,
+        queries: List[str],
+        top_k: int = None,
+        filter_metadata: Optional[Dict] = None
+    ) -> List[RetrievalResult]:
+        """
+        批量检索多个问题（如拆分后的子问题）
+        
+        未缓存的查询向量在一次模型调用中批量编码，随后逐个检索
+        
+        Args:
+            job_id: 任务ID
+            queries: 查询文本列表
+            top_k: 返回数量
+            filter_metadata: 元数据过滤条件
+            
+        Returns:
+            List[RetrievalResult]: 与 queries 一一对应的检索结果
+        """
+        model_name = self.embedding_service.model_name
+        missing = [
+            query for query in dict.fromkeys(queries)
+            if self._query_embedding_cache.get((model_name, query)) is None
+        ]
+        if len(missing) > 1:
+            try:
+                result = self.embedding_service.encode(missing, is_query=True)
+                for query, embedding in zip(missing, result.embeddings):
+                    self._query_embedding_cache.put((model_name, query), embedding)
+            except Exception as e:
+                # 批量编码失败时由 retrieve 逐个编码并处理错误
+                logger.warning(f"Batch query encoding failed for job {job_id}: {e}")
+        
+        return [self.retrieve(job_id, query, top_k, filter_metadata) for query in queries]
+    
     def get_index_status(self, job_id: str) -> IndexStatus:
         """
         获取索引状态
@@ -380,8 +601,9 @@ class RAGService:
             IndexStatus: 索引状态
         """
         # 先检查缓存
-        if job_id in self._index_status:
-            return self._index_status[job_id]
+        status = self._index_status.get(job_id)
+        if status is not None:
+            return status
         
         # 检查向量库
         collection_name = self._get_collection_name(job_id)
@@ -399,7 +621,7 @@ class RAGService:
                 chunk_count=0
             )
         
-        self._index_status[job_id] = status
+        self._index_status.put(job_id, status)
         return status
     
     def delete_index(self, job_id: str) -> bool:
@@ -414,9 +636,10 @@ class RAGService:
         """
         collection_name = self._get_collection_name(job_id)
         success = self.vector_store.delete_collection(collection_name)
+        self._invalidate_retrieval_cache(job_id)
         
-        if success and job_id in self._index_status:
-            del self._index_status[job_id]
+        if success:
+            self._index_status.pop(job_id)
         
         return success
     
@@ -450,6 +673,7 @@ class RAGService:
             "chunk_size": self.chunk_size,
             "chunk_overlap": self.chunk_overlap,
             "top_k": self.top_k,
+            "embedding_cache": self.embedding_cache.get_status() if self.embedding_cache else None,
             "indexed_documents": len(self._index_status)
         }
 
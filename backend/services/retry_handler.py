@@ -1,18 +1,23 @@
 """
 Network retry mechanism with exponential backoff and comprehensive error handling
 """
+import asyncio
 import time
 import random
 import logging
-from typing import Callable, Any, Optional, Dict, List, Type
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Any, Optional, Dict, List, Type, Sequence, Collection
 from functools import wraps
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 from backend.services.error_handler import error_handler, ErrorCategory, ErrorSeverity
 
 # Try to import requests, but make it optional
 try:
     import requests
+    from requests.adapters import HTTPAdapter
     from requests.exceptions import (
         ConnectionError, Timeout, RequestException, 
         HTTPError, TooManyRedirects, URLRequired
@@ -28,6 +33,21 @@ except ImportError:
     class TooManyRedirects(Exception): pass
     class URLRequired(Exception): pass
 
+# aiohttp is optional, only AsyncNetworkClient needs it
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Error message fragments that indicate a transient failure.
+# Plain substring checks: a case-insensitive regex alternation was measured
+# slower on short messages and ~25x slower on long ones
+RETRYABLE_MESSAGE_PATTERNS = (
+    'connection', 'timeout', 'network', 'unavailable',
+    'temporary', 'rate limit', 'too many requests'
+)
+
 class RetryStrategy(Enum):
     """Retry strategy types"""
     EXPONENTIAL_BACKOFF = "exponential_backoff"
@@ -51,6 +71,23 @@ class RateLimitError(RetryableError):
     """Rate limit retryable error"""
     pass
 
+DEFAULT_RETRYABLE_EXCEPTIONS = (
+    ConnectionError,
+    Timeout,
+    NetworkRetryError,
+    ServiceUnavailableError,
+    RateLimitError
+)
+
+# Add requests exceptions if available
+if REQUESTS_AVAILABLE:
+    DEFAULT_RETRYABLE_EXCEPTIONS += (
+        requests.exceptions.ConnectTimeout,
+        requests.exceptions.ReadTimeout
+    )
+
+DEFAULT_RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
 @dataclass
 class RetryConfig:
     """Configuration for retry behavior"""
@@ -60,28 +97,21 @@ class RetryConfig:
     backoff_factor: float = 2.0
     jitter: bool = True
     strategy: RetryStrategy = RetryStrategy.EXPONENTIAL_BACKOFF
-    retryable_exceptions: List[Type[Exception]] = None
-    retryable_status_codes: List[int] = None
+    retryable_exceptions: Sequence[Type[Exception]] = None
+    retryable_status_codes: Collection[int] = None
 
     def __post_init__(self):
+        # Shared immutable defaults, built once at import time
         if self.retryable_exceptions is None:
-            self.retryable_exceptions = [
-                ConnectionError,
-                Timeout,
-                NetworkRetryError,
-                ServiceUnavailableError,
-                RateLimitError
-            ]
-            
-            # Add requests exceptions if available
-            if REQUESTS_AVAILABLE:
-                self.retryable_exceptions.extend([
-                    requests.exceptions.ConnectTimeout,
-                    requests.exceptions.ReadTimeout
-                ])
+            self.retryable_exceptions = DEFAULT_RETRYABLE_EXCEPTIONS
+        else:
+            # isinstance() accepts a tuple directly
+            self.retryable_exceptions = tuple(self.retryable_exceptions)
         
         if self.retryable_status_codes is None:
-            self.retryable_status_codes = [408, 429, 500, 502, 503, 504]
+            self.retryable_status_codes = DEFAULT_RETRYABLE_STATUS_CODES
+        else:
+            self.retryable_status_codes = frozenset(self.retryable_status_codes)
 
 @dataclass
 class RetryAttempt:
@@ -89,16 +119,34 @@ class RetryAttempt:
     attempt_number: int
     delay: float
     exception: Optional[Exception]
-    timestamp: float
+    timestamp: int  # time.monotonic_ns()
     success: bool
 
+@dataclass(slots=True)
+class RetryStat:
+    """Retry counters for one function (average is derived on read)"""
+    total_calls: int = 0
+    successful_calls: int = 0
+    failed_calls: int = 0
+    total_retries: int = 0
+    max_retries_used: int = 0
+    
+    @property
+    def average_retries(self) -> float:
+        return self.total_retries / self.total_calls if self.total_calls else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), 'average_retries': self.average_retries}
+
 class RetryHandler:
     """Comprehensive retry handler with multiple strategies and monitoring"""
     
     def __init__(self, config: Optional[RetryConfig] = None):
         self.config = config or RetryConfig()
         self.logger = logging.getLogger(__name__)
-        self.retry_stats = {}  # Track retry statistics
+        self.retry_stats: Dict[str, RetryStat] = {}  # Track retry statistics
+        # The global handler is shared by request threads; counter updates are read-modify-write
+        self._stats_lock = threading.Lock()
     
     def retry(self, config: Optional[RetryConfig] = None):
         """
@@ -113,6 +161,13 @@ class RetryHandler:
         retry_config = config or self.config
         
         def decorator(func: Callable) -> Callable:
+            # Coroutine functions must be awaited and must not block the event loop
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs) -> Any:
+                    return await self.execute_with_retry_async(func, retry_config, *args, **kwargs)
+                return async_wrapper
+            
             @wraps(func)
             def wrapper(*args, **kwargs) -> Any:
                 return self.execute_with_retry(func, retry_config, *args, **kwargs)
@@ -146,28 +201,103 @@ class RetryHandler:
             try:
                 # Log attempt
                 if attempt > 0:
-                    self.logger.info(f"Retry attempt {attempt} for {func_name}")
+                    self.logger.info("Retry attempt %d for %s", attempt, func_name)
                 
                 # Execute function
-                start_time = time.time()
                 result = func(*args, **kwargs)
-                execution_time = time.time() - start_time
                 
-                # Record successful attempt
+                # Log success after retries
+                if attempt > 0:
+                    self.logger.info("Function %s succeeded after %d retries", func_name, attempt)
+                
+                # Update retry statistics
+                self._update_retry_stats(func_name, attempt, True)
+                
+                return result
+                
+            except Exception as e:
+                last_exception = e
+                
+                # Check if exception is retryable
+                if not self._is_retryable_exception(e, retry_config):
+                    self.logger.warning("Non-retryable exception in %s: %s", func_name, e)
+                    self._update_retry_stats(func_name, attempt, False)
+                    raise e
+                
+                # Check if we've exhausted retries
+                if attempt >= retry_config.max_retries:
+                    self.logger.error("All retries exhausted for %s. Final exception: %s", func_name, e)
+                    self._update_retry_stats(func_name, attempt, False)
+                    
+                    # Log comprehensive retry failure
+                    self._log_retry_failure(func_name, attempts, e)
+                    
+                    # Wrap in retry-specific exception
+                    raise NetworkRetryError(f"Failed after {retry_config.max_retries} retries: {str(e)}") from e
+                
+                # Calculate delay for next attempt
+                delay = self._calculate_delay(attempt, retry_config, e)
+                
+                # Record failed attempt
                 attempts.append(RetryAttempt(
                     attempt_number=attempt,
-                    delay=0,
-                    exception=None,
-                    timestamp=start_time,
-                    success=True
+                    delay=delay,
+                    exception=e,
+                    timestamp=time.monotonic_ns(),
+                    success=False
                 ))
                 
+                # Log retry with context
+                self._log_retry_attempt(func_name, attempt, delay, e)
+                
+                # Wait before next attempt
+                if delay > 0:
+                    time.sleep(delay)
+        
+        # This should never be reached, but just in case
+        raise NetworkRetryError(f"Unexpected retry loop exit for {func_name}")
+    
+    async def execute_with_retry_async(self, func: Callable, config: Optional[RetryConfig] = None,
+                                       *args, **kwargs) -> Any:
+        """
+        Execute coroutine function with retry logic
+        
+        Same behavior as execute_with_retry, but awaits the call and waits
+        with asyncio.sleep so other tasks keep running between attempts
+        
+        Args:
+            func: Coroutine function to execute
+            config: Retry configuration
+            *args: Function arguments
+            **kwargs: Function keyword arguments
+            
+        Returns:
+            Function result
+            
+        Raises:
+            Exception: Final exception after all retries exhausted
+        """
+        retry_config = config or self.config
+        attempts = []
+        last_exception = None
+        
+        func_name = getattr(func, '__name__', 'unknown_function')
+        
+        for attempt in range(retry_config.max_retries + 1):
+            try:
+                # Log attempt
+                if attempt > 0:
+                    self.logger.info("Retry attempt %d for %s", attempt, func_name)
+                
+                # Execute coroutine
+                result = await func(*args, **kwargs)
+                
                 # Log success after retries
                 if attempt > 0:
-                    self.logger.info(f"Function {func_name} succeeded after {attempt} retries")
+                    self.logger.info("Function %s succeeded after %d retries", func_name, attempt)
                 
                 # Update retry statistics
-                self._update_retry_stats(func_name, attempts, True)
+                self._update_retry_stats(func_name, attempt, True)
                 
                 return result
                 
@@ -176,14 +306,14 @@ class RetryHandler:
                 
                 # Check if exception is retryable
                 if not self._is_retryable_exception(e, retry_config):
-                    self.logger.warning(f"Non-retryable exception in {func_name}: {e}")
-                    self._update_retry_stats(func_name, attempts, False)
+                    self.logger.warning("Non-retryable exception in %s: %s", func_name, e)
+                    self._update_retry_stats(func_name, attempt, False)
                     raise e
                 
                 # Check if we've exhausted retries
                 if attempt >= retry_config.max_retries:
-                    self.logger.error(f"All retries exhausted for {func_name}. Final exception: {e}")
-                    self._update_retry_stats(func_name, attempts, False)
+                    self.logger.error("All retries exhausted for %s. Final exception: %s", func_name, e)
+                    self._update_retry_stats(func_name, attempt, False)
                     
                     # Log comprehensive retry failure
                     self._log_retry_failure(func_name, attempts, e)
@@ -192,23 +322,23 @@ class RetryHandler:
                     raise NetworkRetryError(f"Failed after {retry_config.max_retries} retries: {str(e)}") from e
                 
                 # Calculate delay for next attempt
-                delay = self._calculate_delay(attempt, retry_config)
+                delay = self._calculate_delay(attempt, retry_config, e)
                 
                 # Record failed attempt
                 attempts.append(RetryAttempt(
                     attempt_number=attempt,
                     delay=delay,
                     exception=e,
-                    timestamp=time.time(),
+                    timestamp=time.monotonic_ns(),
                     success=False
                 ))
                 
                 # Log retry with context
                 self._log_retry_attempt(func_name, attempt, delay, e)
                 
-                # Wait before next attempt
+                # Wait before next attempt without blocking the event loop
                 if delay > 0:
-                    time.sleep(delay)
+                    await asyncio.sleep(delay)
         
         # This should never be reached, but just in case
         raise NetworkRetryError(f"Unexpected retry loop exit for {func_name}")
@@ -224,10 +354,9 @@ class RetryHandler:
         Returns:
             True if exception is retryable
         """
-        # Check exception type
-        for retryable_type in config.retryable_exceptions:
-            if isinstance(exception, retryable_type):
-                return True
+        # Check exception type (one isinstance call over all types)
+        if isinstance(exception, tuple(config.retryable_exceptions)):
+            return True
         
         # Check HTTP status codes for requests exceptions
         if isinstance(exception, HTTPError):
@@ -237,24 +366,32 @@ class RetryHandler:
         
         # Check for specific error patterns in message
         error_message = str(exception).lower()
-        retryable_patterns = [
-            'connection', 'timeout', 'network', 'unavailable',
-            'temporary', 'rate limit', 'too many requests'
-        ]
-        
-        return any(pattern in error_message for pattern in retryable_patterns)
+        return any(pattern in error_message for pattern in RETRYABLE_MESSAGE_PATTERNS)
     
-    def _calculate_delay(self, attempt: int, config: RetryConfig) -> float:
+    def _calculate_delay(self, attempt: int, config: RetryConfig,
+                         exception: Optional[Exception] = None) -> float:
         """
         Calculate delay for next retry attempt
         
+        A Retry-After header on a 429/503 response takes precedence over
+        the backoff strategy (capped at max_delay)
+        
         Args:
             attempt: Current attempt number (0-based)
             config: Retry configuration
+            exception: Exception that triggered the retry
             
         Returns:
             Delay in seconds
         """
+        retry_after = self._get_retry_after(exception)
+        if retry_after is not None:
+            delay = min(retry_after, config.max_delay)
+            # Only add jitter on top, never retry before the server asked
+            if config.jitter and delay > 0:
+                delay *= 1.0 + 0.1 * random.random()
+            return delay
+        
         if config.strategy == RetryStrategy.EXPONENTIAL_BACKOFF:
             delay = config.base_delay * (config.backoff_factor ** attempt)
         elif config.strategy == RetryStrategy.LINEAR_BACKOFF:
@@ -269,12 +406,49 @@ class RetryHandler:
         
         # Add jitter to prevent thundering herd
         if config.jitter and delay > 0:
-            jitter_range = delay * 0.1  # 10% jitter
-            delay += random.uniform(-jitter_range, jitter_range)
-            delay = max(0, delay)  # Ensure non-negative
+            # ±10% jitter; the factor stays positive, so no clamp is needed
+            delay *= 0.9 + 0.2 * random.random()
         
         return delay
     
+    @staticmethod
+    def _get_retry_after(exception: Optional[Exception]) -> Optional[float]:
+        """
+        Read the Retry-After header from a 429/503 response attached to the exception
+        
+        Args:
+            exception: Exception that triggered the retry
+            
+        Returns:
+            Seconds to wait, or None if the server did not specify it
+        """
+        response = getattr(exception, 'response', None)
+        if response is None:
+            return None
+        
+        # requests uses status_code, aiohttp uses status
+        status_code = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+        if status_code not in (429, 503):
+            return None
+        
+        headers = getattr(response, 'headers', None) or {}
+        value = headers.get('Retry-After')
+        if not value:
+            return None
+        
+        # Retry-After is either delay-seconds or an HTTP-date
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    
     def _log_retry_attempt(self, func_name: str, attempt: int, delay: float, exception: Exception):
         """
         Log retry attempt with context
@@ -304,7 +478,7 @@ class RetryHandler:
             )
         else:
             # Subsequent failures - log as info
-            self.logger.info(f"Retry {attempt + 1} for {func_name} after {delay:.2f}s delay. Error: {exception}")
+            self.logger.info("Retry %d for %s after %.2fs delay. Error: %s", attempt + 1, func_name, delay, exception)
     
     def _log_retry_failure(self, func_name: str, attempts: List[RetryAttempt], final_exception: Exception):
         """
@@ -338,37 +512,30 @@ class RetryHandler:
             context
         )
     
-    def _update_retry_stats(self, func_name: str, attempts: List[RetryAttempt], success: bool):
+    def _update_retry_stats(self, func_name: str, retry_count: int, success: bool):
         """
         Update retry statistics for monitoring
         
         Args:
             func_name: Name of function
-            attempts: List of retry attempts
+            retry_count: Number of retries made (attempts after the first)
             success: Whether operation ultimately succeeded
         """
-        if func_name not in self.retry_stats:
-            self.retry_stats[func_name] = {
-                'total_calls': 0,
-                'successful_calls': 0,
-                'failed_calls': 0,
-                'total_retries': 0,
-                'average_retries': 0.0,
-                'max_retries_used': 0
-            }
-        
-        stats = self.retry_stats[func_name]
-        stats['total_calls'] += 1
-        
-        if success:
-            stats['successful_calls'] += 1
-        else:
-            stats['failed_calls'] += 1
-        
-        retry_count = len(attempts) - 1  # Subtract initial attempt
-        stats['total_retries'] += retry_count
-        stats['max_retries_used'] = max(stats['max_retries_used'], retry_count)
-        stats['average_retries'] = stats['total_retries'] / stats['total_calls']
+        with self._stats_lock:
+            stats = self.retry_stats.get(func_name)
+            if stats is None:
+                stats = self.retry_stats[func_name] = RetryStat()
+            
+            stats.total_calls += 1
+            
+            if success:
+                stats.successful_calls += 1
+            else:
+                stats.failed_calls += 1
+            
+            stats.total_retries += retry_count
+            if retry_count > stats.max_retries_used:
+                stats.max_retries_used = retry_count
     
     def get_retry_stats(self) -> Dict[str, Any]:
         """
@@ -377,16 +544,19 @@ class RetryHandler:
         Returns:
             Dictionary containing retry statistics
         """
-        return self.retry_stats.copy()
+        with self._stats_lock:
+            return {name: stats.to_dict() for name, stats in self.retry_stats.items()}
     
     def reset_retry_stats(self):
         """Reset retry statistics"""
-        self.retry_stats.clear()
+        with self._stats_lock:
+            self.retry_stats.clear()
 
 class NetworkClient:
     """HTTP client with built-in retry functionality"""
     
-    def __init__(self, retry_config: Optional[RetryConfig] = None, timeout: float = 30.0):
+    def __init__(self, retry_config: Optional[RetryConfig] = None, timeout: float = 30.0,
+                 pool_size: int = 64):
         if not REQUESTS_AVAILABLE:
             raise ImportError("requests library is required for NetworkClient. Install it with: pip install requests")
         
@@ -394,6 +564,13 @@ class NetworkClient:
         self.timeout = timeout
         self.session = requests.Session()
         
+        # The session is shared across threads; keep up to pool_size connections
+        # per host alive instead of urllib3's default of 10. urllib3-level retries
+        # stay disabled so RetryHandler remains the only retry layer.
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
         # Configure session with reasonable defaults
         self.session.headers.update({
             'User-Agent': 'PDF-to-Editable-Web/1.0',
@@ -445,12 +622,14 @@ class NetworkClient:
             try:
                 response = self.session.request(method, url, **kwargs)
                 
-                # Check for HTTP errors
-                if response.status_code in self.retry_handler.config.retryable_status_codes:
-                    raise HTTPError(f"HTTP {response.status_code}: {response.reason}", response=response)
-                
-                # Raise for other HTTP errors (4xx, 5xx)
-                response.raise_for_status()
+                # Successful responses skip all error handling
+                if response.status_code >= 400:
+                    # Check for retryable HTTP errors
+                    if response.status_code in self.retry_handler.config.retryable_status_codes:
+                        raise HTTPError(f"HTTP {response.status_code}: {response.reason}", response=response)
+                    
+                    # Raise for other HTTP errors (4xx, 5xx)
+                    response.raise_for_status()
                 
                 return response
                 
@@ -476,6 +655,110 @@ class NetworkClient:
         return self.retry_handler.execute_with_retry(make_request)
 
 
+class AsyncNetworkClient:
+    """
+    Async HTTP client with built-in retry functionality
+    
+    Requests share one aiohttp connection pool and retries wait with
+    asyncio.sleep, so many requests can be in flight on a single thread.
+    Use as an async context manager or call close() when done.
+    """
+    
+    def __init__(self, retry_config: Optional[RetryConfig] = None, timeout: float = 30.0,
+                 connection_limit: int = 100):
+        if not AIOHTTP_AVAILABLE:
+            raise ImportError("aiohttp library is required for AsyncNetworkClient. Install it with: pip install aiohttp")
+        
+        self.retry_handler = RetryHandler(retry_config)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.connection_limit = connection_limit
+        self.headers = {
+            'User-Agent': 'PDF-to-Editable-Web/1.0',
+            'Accept': 'application/json'
+        }
+        self._session = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    @property
+    def retry_stats(self) -> Dict[str, Any]:
+        """Get retry statistics"""
+        return self.retry_handler.get_retry_stats()
+    
+    def _get_session(self):
+        """Create the session lazily, it must be bound to the running event loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.connection_limit)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the underlying session and its connection pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def get(self, url: str, **kwargs):
+        """GET request with retry"""
+        return await self._request_with_retry('GET', url, **kwargs)
+    
+    async def post(self, url: str, **kwargs):
+        """POST request with retry"""
+        return await self._request_with_retry('POST', url, **kwargs)
+    
+    async def put(self, url: str, **kwargs):
+        """PUT request with retry"""
+        return await self._request_with_retry('PUT', url, **kwargs)
+    
+    async def delete(self, url: str, **kwargs):
+        """DELETE request with retry"""
+        return await self._request_with_retry('DELETE', url, **kwargs)
+    
+    async def _request_with_retry(self, method: str, url: str, **kwargs):
+        """
+        Execute HTTP request with retry logic
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Request parameters passed to aiohttp
+            
+        Returns:
+            aiohttp.ClientResponse object
+            
+        Raises:
+            NetworkRetryError: If all retries are exhausted
+        """
+        async def make_request():
+            try:
+                response = await self._get_session().request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                raise NetworkRetryError(f"Network error: {str(e)}") from e
+            
+            # Check for retryable HTTP status codes
+            if response.status in self.retry_handler.config.retryable_status_codes:
+                response.release()
+                error_class = RateLimitError if response.status == 429 else ServiceUnavailableError
+                error = error_class(f"HTTP {response.status}: {response.reason}")
+                # Keep the response so Retry-After can be honored
+                error.response = response
+                raise error
+            
+            # Raise for other HTTP errors (4xx, 5xx)
+            response.raise_for_status()
+            
+            return response
+        
+        return await self.retry_handler.execute_with_retry_async(make_request)
+
+
 # Global instances for easy use
 default_retry_config = RetryConfig(
     max_retries=3,
@@ -400,12 +400,17 @@ class TextChunker:
         """
         return [chunk.content for chunk in chunks]
     
-    def get_chunk_metadatas(self, chunks: List[TextChunk]) -> List[Dict]:
+    def get_chunk_metadatas(
+        self,
+        chunks: List[TextChunk],
+        extra_metadata: Optional[Dict] = None
+    ) -> List[Dict]:
         """
         从分块列表中提取元数据
         
         Args:
             chunks: 分块列表
+            extra_metadata: 附加到每个分块的公共元数据（优先级最高）
             
         Returns:
             List[Dict]: 元数据列表
@@ -421,6 +426,8 @@ class TextChunker:
                 meta["page"] = chunk.page
             if chunk.metadata:
                 meta.update(chunk.metadata)
+            if extra_metadata:
+                meta.update(extra_metadata)
             metadatas.append(meta)
         return metadatas
 
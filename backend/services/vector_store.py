@@ -210,6 +210,93 @@ class VectorStore:
             logger.error(f"Failed to add documents: {e}")
             return False
     
+    def get_document_metadatas(self, collection_name: str) -> Optional[Dict[str, Dict]]:
+        """
+        获取集合中所有文档的 ID 及元数据（不读取向量和文本）
+        
+        Args:
+            collection_name: 集合名称
+            
+        Returns:
+            Optional[Dict[str, Dict]]: 文档ID -> 元数据，读取失败时返回 None
+                （与空集合区分，避免调用方误判为全部需要重建）
+        """
+        try:
+            collection = self.get_or_create_collection(collection_name)
+            results = collection.get(include=["metadatas"])
+            metadatas = results.get("metadatas") or [None] * len(results["ids"])
+            return {doc_id: meta or {} for doc_id, meta in zip(results["ids"], metadatas)}
+        except Exception as e:
+            logger.error(f"Failed to get document metadatas: {e}")
+            return None
+    
+    def replace_metadatas(
+        self,
+        collection_name: str,
+        ids: List[str],
+        metadatas: List[Dict]
+    ) -> bool:
+        """
+        整体替换已有文档的元数据（沿用已存储的向量和文本，不重新编码）
+        
+        ChromaDB 的 update/upsert 会把新元数据合并进旧记录，新元数据中
+        不存在的键会被保留；这里先读出向量和文本，删除后按新元数据重新写入
+        
+        Args:
+            collection_name: 集合名称
+            ids: 文档ID列表
+            metadatas: 元数据列表
+            
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            if not ids:
+                return True
+            collection = self.get_or_create_collection(collection_name)
+            stored = collection.get(ids=ids, include=["embeddings", "documents"])
+            records = {
+                doc_id: (embedding, document)
+                for doc_id, embedding, document in zip(stored["ids"], stored["embeddings"], stored["documents"])
+            }
+            missing = [doc_id for doc_id in ids if doc_id not in records]
+            if missing:
+                raise KeyError(f"Documents not found: {missing}")
+            
+            collection.delete(ids=ids)
+            collection.add(
+                ids=ids,
+                embeddings=[records[doc_id][0] for doc_id in ids],
+                documents=[records[doc_id][1] for doc_id in ids],
+                metadatas=metadatas
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Failed to replace metadatas: {e}")
+            return False
+    
+    def delete_documents(self, collection_name: str, ids: List[str]) -> bool:
+        """
+        按 ID 删除文档
+        
+        Args:
+            collection_name: 集合名称
+            ids: 文档ID列表
+            
+        Returns:
+            bool: 是否成功
+        """
+        try:
+            if not ids:
+                return True
+            collection = self.get_or_create_collection(collection_name)
+            collection.delete(ids=ids)
+            logger.info(f"Deleted {len(ids)} documents from collection '{collection_name}'")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to delete documents: {e}")
+            return False
+    
     def query(
         self,
         collection_name: str,
@@ -49,6 +49,14 @@ class TestBoundingBox:
         assert bbox.width == 100.0
         assert bbox.height == 50.0
 
+    def test_bounding_box_is_immutable(self):
+        """Test bounding box cannot be mutated in place"""
+        from dataclasses import FrozenInstanceError
+        bbox = BoundingBox(x=0, y=0, width=0, height=0)
+
+        with pytest.raises(FrozenInstanceError):
+            bbox.width = 10
+
 class TestRegion:
     """Test Region model"""
     
@@ -69,6 +69,47 @@ class TestPaddleOCRService:
             assert service.use_gpu is False
             assert service.lang == 'en'
     
+    def test_paddleocr_engine_cached_per_lang(self):
+        """Test PaddleOCR engines are loaded once per (lang, use_gpu)"""
+        from backend.services import ocr_service as ocr_module
+        
+        mock_paddleocr = MagicMock()
+        mock_paddleocr.__version__ = '2.7.0'
+        mock_paddleocr.PaddleOCR.side_effect = lambda **kwargs: Mock()
+        
+        with patch.dict(sys.modules, {'paddleocr': mock_paddleocr}), \
+             patch.dict(ocr_module._paddleocr_instances, clear=True):
+            first = ocr_module.get_paddleocr_instance('ch')
+            second = ocr_module.get_paddleocr_instance('ch')
+            english = ocr_module.get_paddleocr_instance('en')
+        
+        assert first is second
+        assert english is not first
+        assert mock_paddleocr.PaddleOCR.call_count == 2
+    
+    def test_paddleocr_engine_falls_back_without_performance_options(self):
+        """Test engine construction retries without HPI/batch options when unsupported"""
+        from backend.services import ocr_service as ocr_module
+        
+        mock_paddleocr = MagicMock()
+        mock_paddleocr.__version__ = '3.3.3'
+        
+        def fake_paddleocr(**kwargs):
+            if 'enable_hpi' in kwargs:
+                raise TypeError("unexpected keyword argument 'enable_hpi'")
+            return Mock()
+        
+        mock_paddleocr.PaddleOCR.side_effect = fake_paddleocr
+        
+        with patch.dict(sys.modules, {'paddleocr': mock_paddleocr}), \
+             patch.dict(ocr_module._paddleocr_instances, clear=True), \
+             patch.object(ocr_module, '_ENABLE_HPI', True):
+            engine = ocr_module.get_paddleocr_instance('ch')
+        
+        assert engine is not None
+        assert mock_paddleocr.PaddleOCR.call_count == 2
+        assert 'text_recognition_batch_size' not in mock_paddleocr.PaddleOCR.call_args.kwargs
+    
     def test_image_preprocessing(self, mock_ocr_service, sample_image):
         """Test image preprocessing functionality"""
         service, _ = mock_ocr_service
@@ -91,6 +132,43 @@ class TestPaddleOCRService:
         if os.path.exists(preprocessed_path):
             os.unlink(preprocessed_path)
     
+    def test_adaptive_resize_target_follows_text_height(self, mock_ocr_service):
+        """Test pages with large text are downsampled further than the fixed cap"""
+        import cv2
+        service, _ = mock_ocr_service
+        
+        blank = np.full((3300, 2550, 3), 255, dtype=np.uint8)
+        assert service._adaptive_max_dimension(blank, 1280) == 1280
+        
+        large_text = blank.copy()
+        for y in range(200, 3200, 360):
+            cv2.putText(large_text, "LARGE HEADLINE TEXT 123", (50, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 6, (0, 0, 0), 8)
+        target = service._adaptive_max_dimension(large_text, 1280)
+        assert 640 <= target < 1280
+        
+        _, scale_info = service._normalize_image_size_with_scale(large_text)
+        assert max(scale_info['preprocessed_width'], scale_info['preprocessed_height']) == target
+    
+    def test_large_jpeg_decoded_at_reduced_size(self, mock_ocr_service, tmp_path):
+        """Test large JPEGs are decoded reduced but still map back to original size"""
+        import cv2
+        service, _ = mock_ocr_service
+        
+        page = np.full((3300, 2550, 3), 255, dtype=np.uint8)
+        jpeg_path = str(tmp_path / 'page.jpg')
+        cv2.imwrite(jpeg_path, page)
+        
+        image, original_size = service._read_image_bgr(jpeg_path)
+        assert original_size == (2550, 3300)
+        assert image.shape[:2] == (1650, 1275)
+        
+        preprocessed, scale_info = service.preprocess_image_array(jpeg_path)
+        assert (scale_info['original_width'], scale_info['original_height']) == (2550, 3300)
+        assert scale_info['was_resized']
+        assert scale_info['scale_x'] * preprocessed.shape[1] == pytest.approx(2550)
+        assert scale_info['scale_y'] * preprocessed.shape[0] == pytest.approx(3300)
+    
     def test_layout_analysis_success(self, mock_ocr_service, sample_image):
         """Test successful layout analysis"""
         service, mock_engine = mock_ocr_service
@@ -120,7 +198,7 @@ class TestPaddleOCRService:
         # Mock predict 方法返回可迭代结果
         mock_engine.predict.return_value = iter(mock_ppstructure_result)
         
-        # Mock preprocess_image to return tuple (path, scale_info)
+        # Mock preprocess_image_array to return tuple (image, scale_info)
         mock_scale_info = {
             'original_width': 800,
             'original_height': 600,
@@ -136,7 +214,8 @@ class TestPaddleOCRService:
         mock_paddleocr = MagicMock()
         mock_paddleocr.__version__ = '3.3.3'
         
-        with patch.object(service, 'preprocess_image', return_value=(sample_image, mock_scale_info)), \
+        with patch.object(service, 'preprocess_image_array',
+                          return_value=(np.zeros((600, 800, 3), dtype=np.uint8), mock_scale_info)), \
              patch.dict(sys.modules, {'paddleocr': mock_paddleocr}), \
              patch.object(service, 'generate_confidence_log', return_value=''):
             result = service.analyze_layout(sample_image)
@@ -153,7 +232,7 @@ class TestPaddleOCRService:
         # Mock engine to raise exception
         mock_engine.predict.side_effect = Exception("OCR processing failed")
         
-        # Mock preprocess_image to return tuple (path, scale_info)
+        # Mock preprocess_image_array to return tuple (image, scale_info)
         mock_scale_info = {
             'original_width': 800,
             'original_height': 600,
@@ -169,11 +248,53 @@ class TestPaddleOCRService:
         mock_paddleocr = MagicMock()
         mock_paddleocr.__version__ = '3.3.3'
         
-        with patch.object(service, 'preprocess_image', return_value=(sample_image, mock_scale_info)), \
+        with patch.object(service, 'preprocess_image_array',
+                          return_value=(np.zeros((600, 800, 3), dtype=np.uint8), mock_scale_info)), \
              patch.dict(sys.modules, {'paddleocr': mock_paddleocr}):
             with pytest.raises(OCRProcessingError, match="Layout analysis"):
                 service.analyze_layout(sample_image)
     
+    def test_layout_analysis_batch_pipeline(self, mock_ocr_service):
+        """Test batch layout analysis keeps input order and retries failed pages"""
+        service, _ = mock_ocr_service
+        paths = [f"page{i}.png" for i in range(5)]
+        
+        def fake_engine(preprocessed_image):
+            if preprocessed_image == "page2.png_pre":
+                raise RuntimeError("engine failure")
+            return preprocessed_image, False
+        
+        def fake_build(image_path, scale_info, raw_result, is_v3, start_time):
+            return LayoutResult([], [], 0.9, 0.0) if raw_result else None
+        
+        fallback = LayoutResult([], [], 0.5, 0.0)
+        with patch.object(service, 'preprocess_image_array', side_effect=lambda p: (p + "_pre", {})), \
+             patch.object(service, '_run_layout_engine', side_effect=fake_engine), \
+             patch.object(service, '_build_layout_result', side_effect=fake_build), \
+             patch.object(service, 'analyze_layout', return_value=fallback) as mock_analyze:
+            results = service.analyze_layout_batch(paths)
+        
+        assert len(results) == 5
+        assert results[2] is fallback
+        assert all(r.confidence_score == 0.9 for i, r in enumerate(results) if i != 2)
+        mock_analyze.assert_called_once_with("page2.png")
+    
+    def test_layout_many_spawns_workers(self, mock_ocr_service):
+        """Test worker processes are spawned so they never inherit forked Paddle engines"""
+        from backend.services import ocr_service as ocr_module
+        service, _ = mock_ocr_service
+        expected = [LayoutResult([], [], 0.9, 0.0), LayoutResult([], [], 0.8, 0.0)]
+        
+        with patch.object(ocr_module, 'ProcessPoolExecutor') as mock_pool:
+            mock_pool.return_value.__enter__.return_value.map.return_value = iter(expected)
+            results = service.analyze_layout_many(["a.png", "b.png"], max_workers=2)
+        
+        kwargs = mock_pool.call_args.kwargs
+        assert kwargs['mp_context'].get_start_method() == 'spawn'
+        assert kwargs['initializer'] is ocr_module._init_layout_worker
+        assert kwargs['initargs'] == (service.use_gpu, service.lang)
+        assert results == expected
+    
     def test_text_extraction(self, mock_ocr_service, sample_image):
         """Test text extraction from regions"""
         service, mock_engine = mock_ocr_service
@@ -220,6 +341,56 @@ class TestPaddleOCRService:
             # 如果 OCR 失败，会保留原始内容
             assert result[0].content in ['Extracted text content', 'Original text']
     
+    def test_text_extraction_batches_region_crops(self, mock_ocr_service, sample_image):
+        """Test region crops are sent to the engine in one in-memory batch"""
+        service, mock_engine = mock_ocr_service
+        
+        regions = [
+            Region(BoundingBox(0, 0, 100, 40), RegionType.PARAGRAPH, 0.5, "a"),
+            Region(BoundingBox(0, 0, 0, 0), RegionType.PARAGRAPH, 0.5, "empty"),
+            Region(BoundingBox(0, 50, 100, 40), RegionType.PARAGRAPH, 0.5, "b"),
+        ]
+        mock_engine.predict.return_value = iter([
+            {'rec_texts': ['first'], 'rec_scores': [0.9], 'dt_polys': [[[0, 0], [1, 0], [1, 1], [0, 1]]]},
+            {'rec_texts': ['second'], 'rec_scores': [0.8], 'dt_polys': [[[0, 0], [1, 0], [1, 1], [0, 1]]]},
+        ])
+        
+        import sys
+        mock_paddleocr = MagicMock()
+        mock_paddleocr.__version__ = '3.3.3'
+        
+        with patch('cv2.imwrite') as mock_imwrite, \
+             patch.dict(sys.modules, {'paddleocr': mock_paddleocr}):
+            result = service.extract_text(sample_image, regions)
+        
+        mock_imwrite.assert_not_called()
+        assert mock_engine.predict.call_count == 1
+        assert len(mock_engine.predict.call_args[0][0]) == 2
+        assert [r.content for r in result] == ['first', 'empty', 'second']
+    
+    def test_text_extraction_reuses_cached_crops(self, mock_ocr_service, sample_image):
+        """Test identical region crops are only sent to the engine once"""
+        service, mock_engine = mock_ocr_service
+        
+        def make_regions():
+            return [Region(BoundingBox(0, 0, 100, 40), RegionType.PARAGRAPH, 0.5, "header")]
+        
+        mock_engine.predict.return_value = iter([
+            {'rec_texts': ['ACME Corp'], 'rec_scores': [0.9], 'dt_polys': [[[0, 0], [1, 0], [1, 1], [0, 1]]]},
+        ])
+        
+        import sys
+        mock_paddleocr = MagicMock()
+        mock_paddleocr.__version__ = '3.3.3'
+        
+        with patch.dict(sys.modules, {'paddleocr': mock_paddleocr}):
+            first = service.extract_text(sample_image, make_regions())
+            second = service.extract_text(sample_image, make_regions())
+        
+        assert mock_engine.predict.call_count == 1
+        assert first[0].content == second[0].content == 'ACME Corp'
+        assert second[0].confidence == 0.9
+    
     def test_region_classification(self, mock_ocr_service):
         """Test region classification logic"""
         service, _ = mock_ocr_service
@@ -239,6 +410,59 @@ class TestPaddleOCRService:
         para_type = service._classify_region("This is regular paragraph text.", para_bbox)
         assert para_type == RegionType.PARAGRAPH
     
+    def test_region_classification_leading_digit(self, mock_ocr_service):
+        """Test header detection by a digit in the first 10 characters"""
+        service, _ = mock_ocr_service
+        bbox = BoundingBox(100, 300, 400, 30)  # Away from the top
+        
+        assert service._classify_region("Section 2 overview", bbox) == RegionType.HEADER
+        assert service._classify_region("第2章 系统设计", bbox) == RegionType.HEADER
+        assert service._classify_region("Overview of section 2", bbox) == RegionType.PARAGRAPH
+    
+    def test_layout_enhancement_metadata(self, mock_ocr_service):
+        """Test layout enhancement adds relative position and area metadata"""
+        service, _ = mock_ocr_service
+        
+        regions = [
+            Region(BoundingBox(80, 300, 400, 60), RegionType.PARAGRAPH, 0.9,
+                   "Body text of the page", metadata={'source': 'ocr'}),
+        ]
+        
+        enhanced = service._enhance_layout_classification(regions, (600, 800))
+        
+        metadata = enhanced[0].metadata
+        assert metadata['source'] == 'ocr'
+        assert metadata['relative_position'] == {
+            'x_ratio': 0.1, 'y_ratio': 0.5, 'width_ratio': 0.5, 'height_ratio': 0.1
+        }
+        assert metadata['area'] == 24000
+        assert 'relative_position' not in regions[0].metadata
+    
+    def test_batch_refinement_matches_single(self, mock_ocr_service):
+        """Test vectorized refinement agrees with the per-region rules"""
+        service, _ = mock_ocr_service
+        image_width, image_height = 800, 600
+        
+        regions = [
+            Region(BoundingBox(0, 10, 700, 30), RegionType.PARAGRAPH, 0.9, "Report"),
+            Region(BoundingBox(0, 200, 300, 80), RegionType.PARAGRAPH, 0.9, "• one\n• two"),
+            Region(BoundingBox(0, 250, 300, 80), RegionType.PARAGRAPH, 0.9, "a | b | c"),
+            Region(BoundingBox(0, 300, 300, 30), RegionType.PARAGRAPH, 0.9, "SUMMARY"),
+            Region(BoundingBox(0, 350, 300, 30), RegionType.PARAGRAPH, 0.9, None),
+            Region(BoundingBox(0, 400, 300, 30), RegionType.PARAGRAPH, 0.9, "plain body text"),
+        ]
+        coords = np.array([[r.coordinates.x, r.coordinates.y, r.coordinates.width, r.coordinates.height]
+                           for r in regions])
+        ratios = coords / np.array([image_width, image_height, image_width, image_height])
+        
+        batch = service._refine_region_classifications(regions, ratios)
+        single = [service._refine_region_classification(r, image_height, image_width) for r in regions]
+        
+        assert batch == single == [
+            RegionType.HEADER, RegionType.LIST, RegionType.TABLE,
+            RegionType.HEADER, RegionType.IMAGE, RegionType.PARAGRAPH
+        ]
+    
     def test_table_extraction_basic(self, mock_ocr_service, sample_image):
         """Test basic table extraction functionality"""
         service, mock_engine = mock_ocr_service
@@ -274,6 +498,150 @@ class TestPaddleOCRService:
             
             assert len(tables) >= 0  # May be 0 if table parsing fails, which is acceptable
     
+    def test_table_region_ocr_uses_in_memory_crop(self, mock_ocr_service):
+        """Test table regions are sent to OCR as arrays, not temp files"""
+        service, mock_engine = mock_ocr_service
+        
+        mock_engine.ocr.return_value = [[
+            [[[0, 0], [100, 0], [100, 30], [0, 30]], ('Name', 0.9)],
+            [[[100, 0], [200, 0], [200, 30], [100, 30]], ('Age', 0.9)],
+            [[[0, 40], [100, 40], [100, 70], [0, 70]], ('John', 0.85)],
+            [[[100, 40], [200, 40], [200, 70], [100, 70]], ('25', 0.88)]
+        ]]
+        region = Region(BoundingBox(100, 200, 400, 150), RegionType.TABLE, 0.85, "")
+        
+        with patch('cv2.imwrite') as mock_imwrite:
+            table = service._extract_table_from_region(np.zeros((600, 800, 3), dtype=np.uint8), region)
+        
+        mock_imwrite.assert_not_called()
+        crop = mock_engine.ocr.call_args.args[0]
+        assert isinstance(crop, np.ndarray)
+        assert crop.shape == (170, 420, 3)
+        assert table.cells == [['Name', 'Age'], ['John', '25']]
+    
+    def test_multiple_table_regions_share_one_page_ocr(self, mock_ocr_service, sample_image):
+        """Test several table regions are filled from a single page OCR pass"""
+        service, mock_engine = mock_ocr_service
+        
+        def line(text, x, y):
+            return [[[x, y], [x + 80, y], [x + 80, y + 20], [x, y + 20]], (text, 0.9)]
+        
+        mock_engine.ocr.return_value = [[
+            line('Name', 100, 100), line('Age', 200, 100),
+            line('Ann', 100, 130), line('30', 200, 130),
+            line('City', 100, 400), line('Zip', 200, 400),
+            line('Oslo', 100, 430), line('0150', 200, 430),
+            line('Footer text', 100, 560),
+        ]]
+        regions = [
+            Region(BoundingBox(90, 90, 220, 70), RegionType.TABLE, 0.9, ""),
+            Region(BoundingBox(90, 390, 220, 70), RegionType.TABLE, 0.9, ""),
+        ]
+        
+        tables = service.extract_tables(sample_image, regions)
+        
+        assert mock_engine.ocr.call_count == 1
+        assert [table.cells for table in tables] == [
+            [['Name', 'Age'], ['Ann', '30']],
+            [['City', 'Zip'], ['Oslo', '0150']],
+        ]
+        assert tables[1].coordinates == regions[1].coordinates
+    
+    def test_assign_lines_to_regions(self, mock_ocr_service):
+        """Test page lines go to every region containing their centre"""
+        service, _ = mock_ocr_service
+        
+        lines = [
+            [[[0, 0], [20, 0], [20, 10], [0, 10]], ('a', 0.9)],       # centre (10, 5)
+            [[[95, 0], [115, 0], [115, 10], [95, 10]], ('b', 0.9)],   # centre (105, 5)
+            [[[0, 0], [20, 0], [20, 10]], ('bad', 0.9)],               # not a quad
+        ]
+        regions = [
+            Region(BoundingBox(0, 0, 100, 20), RegionType.TABLE, 0.9, ""),
+            Region(BoundingBox(100, 0, 50, 20), RegionType.TABLE, 0.9, ""),
+            Region(BoundingBox(500, 500, 10, 10), RegionType.TABLE, 0.9, ""),
+        ]
+        
+        assigned = service._assign_lines_to_regions(lines, regions)
+        
+        # "b" sits inside region 0's 10px padding and inside region 1
+        assert [[line[1][0] for line in group] for group in assigned] == [['a', 'b'], ['b'], []]
+        assert service._assign_lines_to_regions([], regions) == [[], [], []]
+    
+    def test_table_rows_grouped_from_first_cell(self, mock_ocr_service):
+        """Test row tolerance is measured from each row's first cell"""
+        service, _ = mock_ocr_service
+        
+        from backend.services.ocr.table_utils import TableCell
+        
+        def cell(content, center_x, center_y):
+            return TableCell(BoundingBox(0, 0, 0, 0), content, 0.9, center_x, center_y)
+        
+        # 0 -> 15 -> 30: the third cell is within 20px of the second, not the first
+        grid = service._organize_cells_into_grid([
+            cell('b', 50, 15), cell('c', 10, 30), cell('a', 10, 0), cell('d', 50, 40)
+        ])
+        
+        assert grid == [['a', 'b'], ['c', 'd']]
+    
+    def test_table_header_detection(self, mock_ocr_service):
+        """Test header detection for Latin and CJK header rows"""
+        service, _ = mock_ocr_service
+        
+        assert service._detect_table_headers([['Name', 'Age'], ['John', '25']])
+        assert service._detect_table_headers([['姓名', '年龄'], ['张三', '25']])
+        assert not service._detect_table_headers([['1', '2', '3'], ['4', '5', '6']])
+    
+    def test_html_table_parsing_lxml_matches_bs4(self, mock_ocr_service):
+        """Test the lxml streaming parser yields the same table as BeautifulSoup"""
+        from backend.services import ocr_service as ocr_module
+        service, _ = mock_ocr_service
+        
+        html = (
+            "<html><body><table>"
+            "<tr><th>Name</th><th>City</th></tr>"
+            "<tr><td> John <b>Smith</b></td></tr>"
+            "</table><table><tr><td>ignored</td></tr></table></body></html>"
+        )
+        
+        with patch.object(ocr_module, 'LXML_AVAILABLE', False):
+            bs4_table = service._parse_html_table(html)
+        lxml_table = service._parse_html_table(html)
+        
+        assert bs4_table is not None
+        assert lxml_table == bs4_table
+        assert lxml_table.cells == [['Name', 'City'], ['JohnSmith', '']]
+        assert lxml_table.has_headers
+    
+    def test_html_table_markdown_lxml_matches_bs4(self, mock_ocr_service):
+        """Test Markdown conversion gives the same output on both parsers"""
+        from backend.services import ocr_service as ocr_module
+        service, _ = mock_ocr_service
+        
+        html = "<table><tr><th>Name</th><th>A|B</th></tr><tr><td> John </td></tr></table>"
+        
+        with patch.object(ocr_module, 'LXML_AVAILABLE', False):
+            bs4_markdown = service._html_table_to_markdown(html)
+        lxml_markdown = service._html_table_to_markdown(html)
+        
+        assert lxml_markdown == bs4_markdown == '| Name | A\\|B |\n| --- | --- |\n| John |'
+        assert service._html_table_to_markdown("<p>no table</p>") == ""
+    
+    def test_list_table_parsing_row_types(self, mock_ocr_service):
+        """Test list-based tables accept list, tuple and string rows"""
+        service, _ = mock_ocr_service
+        
+        table = service._parse_list_table([
+            ['Name', 'Age'],
+            ('John', 25),
+            'Jane\t 30 ',
+            None,
+        ])
+        
+        assert table.rows == 3
+        assert table.columns == 2
+        assert table.cells == [['Name', 'Age'], ['John', '25'], ['Jane', '30']]
+    
     def test_confidence_metrics_calculation(self, mock_ocr_service):
         """Test confidence metrics calculation"""
         service, _ = mock_ocr_service
@@ -0,0 +1,155 @@
+"""
+Tests for PDF processing service
+"""
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz
+from PIL import Image
+
+from backend.services import pdf_processor as pdf_module
+from backend.services.pdf_processor import PDFProcessor
+
+
+@pytest.fixture(autouse=True)
+def clear_result_cache():
+    """Start every test with an empty result cache"""
+    with patch.dict(pdf_module._result_cache, clear=True):
+        yield
+
+
+class TestPDFProcessor:
+    """Test cases for PDF processor"""
+
+    def test_each_call_closes_its_own_document(self, sample_pdf, tmp_path):
+        """Test no PyMuPDF document is shared between calls or left open"""
+        opened = []
+        real_open = fitz.open
+
+        def tracking_open(*args, **kwargs):
+            opened.append(real_open(*args, **kwargs))
+            return opened[-1]
+
+        with patch.object(pdf_module.fitz, 'open', side_effect=tracking_open):
+            assert PDFProcessor.validate_pdf_structure(Path(sample_pdf)) == (True, None)
+            analysis = PDFProcessor.analyze_pdf(Path(sample_pdf))
+            success, error = PDFProcessor.extract_first_page_as_image(
+                Path(sample_pdf), tmp_path / 'page1.png'
+            )
+            PDFProcessor.detect_pdf_type(Path(sample_pdf))
+
+        assert analysis['page_count'] == 1
+        assert success and error is None
+        assert len({id(doc) for doc in opened}) == len(opened)
+        assert all(doc.is_closed for doc in opened)
+
+    def test_file_can_be_removed_after_processing(self, sample_pdf, tmp_path):
+        """Test the upload can be deleted right after it was processed"""
+        upload = tmp_path / 'upload.pdf'
+        upload.write_bytes(Path(sample_pdf).read_bytes())
+
+        assert PDFProcessor.validate_pdf_structure(upload) == (True, None)
+        PDFProcessor.analyze_pdf(upload)
+        upload.unlink()
+
+        assert not upload.exists()
+
+    def test_validation_and_analysis_share_one_open(self, sample_pdf):
+        """Test the upload route's validate + analyze sequence parses the PDF once"""
+        with patch.object(pdf_module.fitz, 'open', wraps=fitz.open) as mock_open:
+            assert PDFProcessor.validate_pdf_structure(Path(sample_pdf)) == (True, None)
+            analysis = PDFProcessor.analyze_pdf(Path(sample_pdf))
+
+        assert mock_open.call_count == 1
+        assert analysis['page_count'] == 1
+        assert analysis['is_multi_page'] is False
+
+    def test_results_reused_until_file_changes(self, sample_pdf):
+        """Test analysis/validation are cached per (path, mtime, size)"""
+        with patch.object(pdf_module.fitz, 'open', wraps=fitz.open) as mock_open:
+            first = PDFProcessor.analyze_pdf(Path(sample_pdf))
+            first['metadata']['title'] = 'changed by caller'
+            second = PDFProcessor.analyze_pdf(Path(sample_pdf))
+            PDFProcessor.validate_pdf_structure(Path(sample_pdf))
+            PDFProcessor.validate_pdf_structure(Path(sample_pdf))
+
+        assert mock_open.call_count == 2
+        assert second['metadata']['title'] != 'changed by caller'
+
+        document = fitz.open()
+        document.new_page()
+        document.new_page()
+        document.save(sample_pdf)
+        document.close()
+
+        assert PDFProcessor.analyze_pdf(Path(sample_pdf))['page_count'] == 2
+
+    def test_pdf_type_detected_once_per_file_version(self, sample_pdf):
+        """Test repeated type detection reuses the result without reopening"""
+        with patch.object(pdf_module.fitz, 'open', wraps=fitz.open) as mock_open:
+            first = PDFProcessor.detect_pdf_type(Path(sample_pdf))
+            second = PDFProcessor.detect_pdf_type(Path(sample_pdf))
+
+        assert first == second
+        assert mock_open.call_count == 1
+
+    def test_corrupted_pdf_is_rejected(self, tmp_path):
+        """Test unreadable files fail validation with a clear message"""
+        broken = tmp_path / 'broken.pdf'
+        broken.write_bytes(b'%PDF-1.4 not really a pdf')
+
+        is_valid, error = PDFProcessor.validate_pdf_structure(broken)
+
+        assert is_valid is False
+        assert 'corrupted or invalid' in error
+
+    def test_first_page_array_rendered_at_ocr_resolution(self, sample_pdf, tmp_path):
+        """Test the in-memory OCR render is sized for OCR, the saved page for display"""
+        image_path = tmp_path / 'page1.png'
+        assert PDFProcessor.extract_first_page_as_image(Path(sample_pdf), image_path) == (True, None)
+        saved = fitz.Pixmap(str(image_path))
+
+        array = PDFProcessor.extract_first_page_as_array(Path(sample_pdf))
+
+        # US Letter: the display image fills the 2048px cap, the OCR render
+        # stays at the 150 DPI floor (8.5in x 11in)
+        assert 2000 < max(saved.width, saved.height) <= 2048
+        assert array.shape == (1650, 1275, 3)
+
+    def test_first_page_pil_matches_saved_image(self, sample_pdf, tmp_path):
+        """Test the in-memory PIL render has the same pixels as the saved page"""
+        image_path = tmp_path / 'page1.png'
+        assert PDFProcessor.extract_first_page_as_image(Path(sample_pdf), image_path) == (True, None)
+
+        image = PDFProcessor.extract_first_page_as_pil(Path(sample_pdf))
+
+        with Image.open(image_path) as saved:
+            assert image.mode == 'RGB'
+            assert image.size == saved.size
+            assert image.tobytes() == saved.convert('RGB').tobytes()
+
+    def test_first_page_gray_array_is_single_channel(self, sample_pdf):
+        """Test the grayscale OCR render keeps the size and drops the channels"""
+        color = PDFProcessor.extract_first_page_as_array(Path(sample_pdf))
+        gray = PDFProcessor.extract_first_page_as_array(Path(sample_pdf), colorspace='gray')
+
+        assert gray.shape == color.shape[:2]
+        assert gray.dtype == color.dtype
+
+    def test_detect_pdf_type_stops_once_mixed(self, tmp_path):
+        """Test type detection classifies mixed PDFs without reading every page"""
+        pdf_path = tmp_path / 'mixed.pdf'
+        document = fitz.open()
+        document.new_page().insert_text((72, 72), 'Searchable text layer ' * 5)
+        document.new_page()
+        for _ in range(3):
+            document.new_page().insert_text((72, 72), 'Searchable text layer ' * 5)
+        document.save(pdf_path)
+        document.close()
+
+        with patch.object(fitz.Page, 'get_text', autospec=True,
+                          side_effect=fitz.Page.get_text) as mock_get_text:
+            assert PDFProcessor.detect_pdf_type(pdf_path) == 'mixed'
+
+        assert mock_get_text.call_count == 2
@@ -23,6 +23,7 @@ from backend.services.vector_store import (
     get_vector_store,
     reset_vector_store
 )
+from backend.services.embedding_cache import EmbeddingCache
 from backend.services.rag_service import (
     RAGService,
     RetrievalResult,
@@ -154,6 +155,18 @@ class TestTextChunker:
             assert "start_char" in metadatas[0]
             assert "end_char" in metadatas[0]
     
+    def test_get_chunk_metadatas_with_extra_metadata(self, chunker):
+        """测试公共元数据写入每个分块且优先于分块自身字段"""
+        chunks = [
+            TextChunk(content="第一块", index=0, start_char=0, end_char=3, metadata={"source": "ocr"}),
+            TextChunk(content="第二块", index=1, start_char=3, end_char=6)
+        ]
+        metadatas = chunker.get_chunk_metadatas(chunks, extra_metadata={"source": "upload", "job": "j1"})
+        
+        assert [m["source"] for m in metadatas] == ["upload", "upload"]
+        assert [m["job"] for m in metadatas] == ["j1", "j1"]
+        assert metadatas[0] is not metadatas[1]
+    
     def test_chunk_text_convenience_function(self):
         """测试便捷分块函数"""
         # 使用足够长的文本以满足默认 min_chunk_size (50) 要求
@@ -388,6 +401,56 @@ class TestVectorStore:
         
         assert success is True
     
+    def test_replace_metadatas_drops_removed_keys(self, vector_store):
+        """测试替换元数据时旧记录中多余的键被移除，而非合并保留"""
+        vector_store.add_documents(
+            collection_name="test_replace",
+            documents=["文档一"],
+            embeddings=[[0.1] * 512],
+            metadatas=[{"page": 1, "source": "upload"}],
+            ids=["doc_1"]
+        )
+        
+        assert vector_store.replace_metadatas("test_replace", ["doc_1"], [{"source": "upload"}])
+        assert vector_store.get_document_metadatas("test_replace") == {"doc_1": {"source": "upload"}}
+        assert vector_store.get_collection_count("test_replace") == 1
+    
+    def test_replace_metadatas_reuses_stored_vectors(self):
+        """测试替换元数据时删除后按已存储的向量和文本重新写入"""
+        from unittest.mock import MagicMock, patch
+        collection = MagicMock()
+        collection.get.return_value = {
+            "ids": ["b", "a"],
+            "embeddings": [[0.2], [0.1]],
+            "documents": ["乙", "甲"]
+        }
+        store = object.__new__(VectorStore)
+        
+        with patch.object(store, "get_or_create_collection", return_value=collection):
+            assert store.replace_metadatas("c", ["a", "b"], [{"k": 1}, {}])
+        
+        collection.update.assert_not_called()
+        collection.upsert.assert_not_called()
+        collection.delete.assert_called_once_with(ids=["a", "b"])
+        collection.add.assert_called_once_with(
+            ids=["a", "b"],
+            embeddings=[[0.1], [0.2]],
+            documents=["甲", "乙"],
+            metadatas=[{"k": 1}, {}]
+        )
+    
+    def test_replace_metadatas_missing_record_fails_without_delete(self):
+        """测试待替换的记录不存在时返回失败且不删除任何记录"""
+        from unittest.mock import MagicMock, patch
+        collection = MagicMock()
+        collection.get.return_value = {"ids": [], "embeddings": [], "documents": []}
+        store = object.__new__(VectorStore)
+        
+        with patch.object(store, "get_or_create_collection", return_value=collection):
+            assert not store.replace_metadatas("c", ["a"], [{}])
+        
+        collection.delete.assert_not_called()
+    
     def test_query_documents(self, vector_store):
         """
         测试查询文档
@@ -538,6 +601,235 @@ class TestQueryResult:
 
 
 
+class TestEmbeddingCache:
+    """文档向量缓存测试"""
+    
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """创建缓存实例"""
+        cache = EmbeddingCache(str(tmp_path / "cache" / "embeddings.sqlite3"))
+        yield cache
+        cache.close()
+    
+    def test_get_many_returns_none_for_misses(self, cache):
+        """测试未命中的键返回 None，命中的键按顺序返回向量"""
+        hit = cache.make_key("model", "页眉")
+        miss = cache.make_key("model", "正文")
+        cache.set_many([(hit, [0.5, -0.25, 1.0])])
+        
+        assert cache.get_many([miss, hit]) == [None, [0.5, -0.25, 1.0]]
+    
+    def test_key_depends_on_model(self, cache):
+        """测试更换模型后缓存键不同"""
+        assert cache.make_key("model-a", "text") != cache.make_key("model-b", "text")
+        assert cache.make_key("model-a", "text") == cache.make_key("model-a", "text")
+    
+    def test_cache_persists_across_instances(self, cache):
+        """测试向量写入磁盘后可被新实例读取"""
+        key = cache.make_key("model", "text")
+        cache.set_many([(key, [0.125, 0.25])])
+        
+        reopened = EmbeddingCache(cache.db_path)
+        try:
+            assert reopened.get_many([key]) == [[0.125, 0.25]]
+            assert reopened.count() == 1
+        finally:
+            reopened.close()
+    
+    def test_rag_service_encodes_only_cache_misses(self, cache):
+        """测试 RAG 服务只对未缓存的分块调用模型"""
+        from unittest.mock import MagicMock
+        embedding_service = MagicMock()
+        embedding_service.model_name = "model"
+        embedding_service.encode_documents.side_effect = lambda texts: [[float(len(t))] for t in texts]
+        service = RAGService(
+            embedding_service=embedding_service,
+            vector_store=MagicMock(),
+            embedding_cache=cache
+        )
+        
+        assert service._encode_documents(["aa", "bbb"]) == [[2.0], [3.0]]
+        assert service._encode_documents(["bbb", "cccc", "aa"]) == [[3.0], [4.0], [2.0]]
+        
+        calls = [c.args[0] for c in embedding_service.encode_documents.call_args_list]
+        assert calls == [["aa", "bbb"], ["cccc"]]
+
+
+class TestRetrievalCache:
+    """检索缓存测试"""
+    
+    @pytest.fixture
+    def service(self, tmp_path):
+        """创建使用 Mock 依赖的 RAG 服务"""
+        from unittest.mock import MagicMock
+        embedding_service = MagicMock()
+        embedding_service.model_name = "model"
+        embedding_service.encode_query.return_value = [0.1, 0.2]
+        embedding_service.encode_documents.side_effect = lambda texts: [[0.0] for _ in texts]
+        vector_store = MagicMock()
+        vector_store.collection_exists.return_value = True
+        vector_store.add_documents.return_value = True
+        vector_store.get_document_metadatas.return_value = {}
+        vector_store.replace_metadatas.return_value = True
+        vector_store.delete_documents.return_value = True
+        vector_store.query.return_value = QueryResult(
+            documents=["片段"], metadatas=[{}], distances=[0.2], ids=["job_chunk_0"]
+        )
+        return RAGService(
+            embedding_service=embedding_service,
+            vector_store=vector_store,
+            chunk_size=100,
+            chunk_overlap=20,
+            top_k=3,
+            embedding_cache=EmbeddingCache(str(tmp_path / "embedding_cache.sqlite3"))
+        )
+    
+    def test_repeated_query_is_served_from_cache(self, service):
+        """测试相同问题的重复检索不再编码和查询向量库"""
+        first = service.retrieve("job", "发票金额是多少")
+        first.chunks[0]["document"] = "被调用方修改"
+        second = service.retrieve("job", "发票金额是多少")
+        
+        assert second.chunks[0]["document"] == "片段"
+        assert service.embedding_service.encode_query.call_count == 1
+        assert service.vector_store.query.call_count == 1
+    
+    def test_query_embedding_reused_across_top_k(self, service):
+        """测试不同 top_k 会重新检索但复用查询向量"""
+        service.retrieve("job", "发票金额是多少", top_k=3)
+        service.retrieve("job", "发票金额是多少", top_k=5)
+        
+        assert service.vector_store.query.call_count == 2
+        assert service.embedding_service.encode_query.call_count == 1
+    
+    def test_retrieve_many_batches_query_encoding(self, service):
+        """测试批量检索在一次模型调用中编码所有未缓存的问题"""
+        from unittest.mock import MagicMock
+        service.embedding_service.encode.return_value = MagicMock(embeddings=[[0.1], [0.2]])
+        service.retrieve("job", "问题一")
+        
+        results = service.retrieve_many("job", ["问题一", "问题二", "问题三", "问题二"])
+        
+        assert len(results) == 4
+        service.embedding_service.encode.assert_called_once_with(["问题二", "问题三"], is_query=True)
+        assert service.embedding_service.encode_query.call_count == 1
+        assert service.vector_store.query.call_count == 3
+    
+    def test_index_status_cache_is_bounded(self, service, monkeypatch):
+        """测试索引状态缓存有上限，淘汰后从向量库重建"""
+        monkeypatch.setattr(service._index_status, "maxsize", 2)
+        service.vector_store.get_collection_count.return_value = 7
+        for job_id in ("a", "b", "c"):
+            service.index_document(job_id, "短")
+        
+        assert len(service._index_status) == 2
+        assert service.get_index_status("c").error == "No valid text chunks"
+        assert service.get_index_status("a").chunk_count == 7
+    
+    def test_reindex_invalidates_job_results(self, service):
+        """测试重新索引后检索结果缓存失效"""
+        service.retrieve("job", "发票金额是多少")
+        service.index_document("job", "新的文档内容，用于重新索引测试。" * 5)
+        service.retrieve("job", "发票金额是多少")
+        
+        assert service.vector_store.query.call_count == 2
+
+
+class TestIncrementalIndex:
+    """按内容 ID 增量索引测试"""
+    
+    @pytest.fixture
+    def service(self, tmp_path):
+        """创建以字典模拟向量库的 RAG 服务"""
+        from unittest.mock import MagicMock
+        embedding_service = MagicMock()
+        embedding_service.model_name = "model"
+        embedding_service.encode_documents.side_effect = lambda texts: [[0.0] for _ in texts]
+        
+        stored = {}
+        vector_store = MagicMock()
+        vector_store.stored = stored
+        vector_store.get_document_metadatas.side_effect = lambda name: dict(stored)
+        vector_store.add_documents.side_effect = (
+            lambda collection_name, documents, embeddings, metadatas, ids:
+            stored.update(zip(ids, metadatas)) or True
+        )
+        vector_store.replace_metadatas.side_effect = (
+            lambda name, ids, metadatas: stored.update(zip(ids, metadatas)) or True
+        )
+        vector_store.delete_documents.side_effect = (
+            lambda name, ids: all(stored.pop(i, None) is not None for i in ids)
+        )
+        return RAGService(
+            embedding_service=embedding_service,
+            vector_store=vector_store,
+            chunk_size=100,
+            chunk_overlap=0,
+            top_k=3,
+            embedding_cache=EmbeddingCache(str(tmp_path / "embedding_cache.sqlite3"))
+        )
+    
+    def test_chunk_ids_are_content_based_and_unique(self):
+        """测试分块 ID 由内容决定，重复文本也不冲突"""
+        ids = RAGService._make_chunk_ids("job", ["页眉", "正文", "页眉"])
+        
+        assert ids == RAGService._make_chunk_ids("job", ["页眉", "正文", "页眉"])
+        assert len(set(ids)) == 3
+        assert ids[2].startswith(ids[0])
+    
+    def test_reindex_encodes_only_changed_chunks(self, service):
+        """测试重新索引只编码新增分块并删除消失的分块"""
+        paragraphs = [f"第{i}段内容，这是一段足够长的测试文本，用于生成独立的分块。" * 2 for i in range(3)]
+        first = service.index_document("job", "\n\n".join(paragraphs))
+        old_ids = set(service.vector_store.stored)
+        
+        paragraphs[1] = "修改后的第1段内容，这是一段足够长的测试文本，用于生成独立的分块。" * 2
+        second = service.index_document("job", "\n\n".join(paragraphs))
+        
+        assert first.chunk_count == second.chunk_count == 3
+        assert len(service.vector_store.stored) == 3
+        assert len(old_ids & set(service.vector_store.stored)) == 2
+        last_call = service.embedding_service.encode_documents.call_args_list[-1]
+        assert last_call.args[0] == [paragraphs[1]]
+    
+    def test_reindex_unchanged_document_skips_encoding(self, service):
+        """测试内容未变化时不重新编码也不写入向量"""
+        text = "完全相同的文档内容，重新索引时不应再次调用模型。" * 5
+        assert service.index_document("job", text).indexed
+        service.index_document("job", text)
+        
+        assert service.embedding_service.encode_documents.call_count == 1
+        assert service.vector_store.add_documents.call_count == 1
+    
+    def test_reindex_drops_removed_metadata_keys(self, service):
+        """测试重新索引时去掉的元数据键被移除，之后不再重复替换"""
+        text = "元数据变化但文本不变的文档内容，不应重新编码。" * 5
+        service.index_document("job", text, metadata={"source": "upload"})
+        assert all(meta["source"] == "upload" for meta in service.vector_store.stored.values())
+        
+        service.index_document("job", text)
+        service.index_document("job", text)
+        
+        assert all("source" not in meta for meta in service.vector_store.stored.values())
+        replaced = service.vector_store.replace_metadatas.call_args_list
+        assert len(replaced[1].args[1]) == len(service.vector_store.stored)
+        assert replaced[2].args[1] == []
+        assert service.embedding_service.encode_documents.call_count == 1
+    
+    def test_unreadable_collection_fails_without_writing(self, service):
+        """测试读取已有分块失败时任务失败，且不重新编码、不写入或删除"""
+        service.vector_store.get_document_metadatas.side_effect = None
+        service.vector_store.get_document_metadatas.return_value = None
+        
+        status = service.index_document("job", "无法读取集合时不应覆盖已有向量。" * 5)
+        
+        assert not status.indexed
+        assert status.error == "Failed to store vectors"
+        service.embedding_service.encode_documents.assert_not_called()
+        service.vector_store.add_documents.assert_not_called()
+        service.vector_store.delete_documents.assert_not_called()
+
+
 class TestRAGService:
     """
     RAG 服务集成测试
@@ -578,7 +870,8 @@ class TestRAGService:
                 vector_store=vector_store,
                 chunk_size=100,
                 chunk_overlap=20,
-                top_k=3
+                top_k=3,
+                embedding_cache=EmbeddingCache(os.path.join(temp_db_path, "embedding_cache.sqlite3"))
             )
         except Exception as e:
             pytest.skip(f"RAG service dependencies not available: {e}")
@@ -784,6 +1077,18 @@ class TestRetrievalResult:
         
         # 应该只包含部分内容
         assert len(context) <= 200  # 允许一些余量
+    
+    def test_get_context_counts_separators(self):
+        """测试分隔符计入长度限制"""
+        result = RetrievalResult(
+            query="测试",
+            chunks=[{"document": "A" * 100}, {"document": "B" * 100}],
+            total_found=2,
+            processing_time=0.1
+        )
+        
+        assert result.get_context(max_length=201) == "A" * 100
+        assert result.get_context(max_length=202) == "A" * 100 + "\n\n" + "B" * 100
 
 
 class TestIndexStatus:
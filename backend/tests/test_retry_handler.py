@@ -0,0 +1,230 @@
+"""
+Tests for network retry handler
+"""
+import asyncio
+import pytest
+from unittest.mock import patch
+from backend.services.retry_handler import (
+    RetryHandler,
+    RetryConfig,
+    RetryStrategy,
+    NetworkRetryError
+)
+
+
+def fast_config(**overrides):
+    """Retry config without waiting between attempts"""
+    options = dict(max_retries=3, base_delay=0.0, jitter=False, strategy=RetryStrategy.IMMEDIATE)
+    options.update(overrides)
+    return RetryConfig(**options)
+
+
+class TestRetryHandler:
+    """Test suite for RetryHandler"""
+    
+    def test_retries_until_success(self):
+        """Test a transient failure is retried and the result returned"""
+        handler = RetryHandler(fast_config())
+        calls = []
+        
+        @handler.retry()
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError('connection reset')
+            return 'ok'
+        
+        assert flaky() == 'ok'
+        assert len(calls) == 3
+        assert handler.get_retry_stats()['flaky'] == {
+            'total_calls': 1,
+            'successful_calls': 1,
+            'failed_calls': 0,
+            'total_retries': 2,
+            'max_retries_used': 2,
+            'average_retries': 2.0
+        }
+    
+    def test_non_retryable_exception_is_raised_immediately(self):
+        """Test non-retryable errors are not retried"""
+        handler = RetryHandler(fast_config())
+        calls = []
+        
+        @handler.retry()
+        def broken():
+            calls.append(1)
+            raise ValueError('bad input')
+        
+        with pytest.raises(ValueError):
+            broken()
+        assert len(calls) == 1
+        assert handler.get_retry_stats()['broken']['total_retries'] == 0
+    
+    def test_exhausted_retries_raise_network_retry_error(self):
+        """Test the final failure is wrapped once retries are exhausted"""
+        handler = RetryHandler(fast_config(max_retries=2))
+        
+        @handler.retry()
+        def always_down():
+            raise ConnectionError('connection refused')
+        
+        with pytest.raises(NetworkRetryError):
+            always_down()
+        stats = handler.get_retry_stats()['always_down']
+        assert stats['failed_calls'] == 1
+        assert stats['total_retries'] == stats['max_retries_used'] == 2
+
+    
+    def test_retry_after_header_overrides_backoff(self):
+        """Test Retry-After seconds and HTTP-date on 429/503 responses"""
+        from email.utils import format_datetime
+        from datetime import datetime, timedelta, timezone
+        from unittest.mock import MagicMock
+        handler = RetryHandler()
+        config = RetryConfig(base_delay=1.0, max_delay=30.0, jitter=False)
+        
+        def error(status_code, retry_after):
+            exc = Exception('rate limited')
+            exc.response = MagicMock(status_code=status_code, headers={'Retry-After': retry_after})
+            return exc
+        
+        retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=20), usegmt=True)
+        
+        assert handler._calculate_delay(0, config, error(429, '7')) == 7.0
+        assert 18 < handler._calculate_delay(0, config, error(503, retry_at)) <= 20
+        assert handler._calculate_delay(0, config, error(429, '120')) == 30.0
+        assert handler._calculate_delay(0, config, error(500, '7')) == 1.0
+        assert handler._calculate_delay(0, config, error(429, 'soon')) == 1.0
+
+    
+    def test_jitter_stays_within_ten_percent(self):
+        """Test jittered exponential delays stay within ±10% of the base value"""
+        handler = RetryHandler()
+        config = RetryConfig(base_delay=1.0, backoff_factor=2.0, max_delay=60.0, jitter=True)
+        
+        delays = [handler._calculate_delay(2, config) for _ in range(200)]
+        
+        assert all(3.6 <= delay <= 4.4 for delay in delays)
+        assert len(set(delays)) > 1
+    
+    def test_default_config_shares_immutable_defaults(self):
+        """Test configs reuse the module-level default exception/status sets"""
+        first, second = RetryConfig(), RetryConfig(max_retries=5)
+        
+        assert first.retryable_exceptions is second.retryable_exceptions
+        assert isinstance(first.retryable_exceptions, tuple)
+        assert isinstance(first.retryable_status_codes, frozenset)
+        assert 503 in first.retryable_status_codes
+    
+    def test_custom_config_is_normalized(self):
+        """Test user-supplied exception/status lists become tuple/frozenset"""
+        config = RetryConfig(retryable_exceptions=[KeyError, OSError], retryable_status_codes=[503, 503])
+        
+        assert config.retryable_exceptions == (KeyError, OSError)
+        assert config.retryable_status_codes == frozenset({503})
+        assert RetryHandler()._is_retryable_exception(KeyError('missing'), config)
+
+    
+    def test_stats_are_exact_under_concurrent_calls(self):
+        """Test counters from many threads add up without lost updates"""
+        from concurrent.futures import ThreadPoolExecutor
+        handler = RetryHandler(fast_config())
+        
+        @handler.retry()
+        def work():
+            return 1
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: work(), range(2000)))
+        
+        stats = handler.get_retry_stats()['work']
+        assert stats['total_calls'] == stats['successful_calls'] == 2000
+
+
+class TestAsyncRetry:
+    """Test suite for retrying coroutine functions"""
+    
+    def test_coroutine_is_awaited_and_retried(self):
+        """Test decorated coroutines stay coroutines and are retried"""
+        handler = RetryHandler(fast_config())
+        calls = []
+        
+        @handler.retry()
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 2:
+                raise ConnectionError('connection reset')
+            return 'ok'
+        
+        assert asyncio.iscoroutinefunction(flaky)
+        assert asyncio.run(flaky()) == 'ok'
+        assert len(calls) == 2
+    
+    def test_async_retry_does_not_block_event_loop(self):
+        """Test retry delays use asyncio.sleep instead of time.sleep"""
+        handler = RetryHandler(fast_config(base_delay=0.01, strategy=RetryStrategy.FIXED_DELAY))
+        calls = []
+        
+        @handler.retry()
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 2:
+                raise ConnectionError('connection reset')
+            return 'ok'
+        
+        with patch('backend.services.retry_handler.time.sleep') as mock_sleep:
+            assert asyncio.run(flaky()) == 'ok'
+        
+        mock_sleep.assert_not_called()
+
+
+class TestNetworkClient:
+    """Test suite for NetworkClient"""
+    
+    def test_session_uses_sized_pool_without_urllib3_retries(self):
+        """Test the mounted adapter keeps a larger pool and leaves retries to RetryHandler"""
+        pytest.importorskip('requests')
+        from backend.services.retry_handler import NetworkClient
+        
+        client = NetworkClient(fast_config(), pool_size=32)
+        adapter = client.session.get_adapter('https://example.test')
+        
+        assert adapter._pool_maxsize == 32
+        assert adapter.max_retries.total == 0
+        assert client.session.get_adapter('http://example.test') is adapter
+    
+    def test_retryable_status_is_retried_then_returned(self):
+        """Test 503 is retried, and a successful response skips raise_for_status"""
+        pytest.importorskip('requests')
+        from unittest.mock import MagicMock
+        from backend.services.retry_handler import NetworkClient
+        
+        unavailable = MagicMock(status_code=503, reason='Service Unavailable', headers={})
+        ok = MagicMock(status_code=200)
+        client = NetworkClient(fast_config())
+        client.session.request = MagicMock(side_effect=[unavailable, ok])
+        
+        assert client.get('http://example.test') is ok
+        assert client.session.request.call_count == 2
+        ok.raise_for_status.assert_not_called()
+
+
+class TestAsyncNetworkClient:
+    """Test suite for AsyncNetworkClient"""
+    
+    def test_retryable_status_is_retried(self):
+        """Test 503 responses are released and retried"""
+        pytest.importorskip('aiohttp')
+        from unittest.mock import AsyncMock, MagicMock
+        from backend.services.retry_handler import AsyncNetworkClient
+        
+        unavailable = MagicMock(status=503, reason='Service Unavailable')
+        ok = MagicMock(status=200)
+        session = MagicMock(closed=False)
+        session.request = AsyncMock(side_effect=[unavailable, ok])
+        client = AsyncNetworkClient(fast_config())
+        client._session = session
+        
+        assert asyncio.run(client.get('http://example.test')) is ok
+        unavailable.release.assert_called_once()
+        assert session.request.await_count == 2